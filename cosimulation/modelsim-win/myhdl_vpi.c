@@ -41,6 +41,24 @@ static myhdl_time64_t verilog_time;
 static myhdl_time64_t pli_time;
 static int delta;
 
+/* binary protocol, offered to myhdl with "START BIN1" */
+#define BINARY "BIN1"
+/* time skipping: synchronize only at the times that the inputs change */
+#define SKIP "SKIP1"
+#define WORDS(size) (((size) + 31) / 32)
+
+static int binary = 0;
+static int nfrom = 0;
+static int nto = 0;
+static int fromSize[MAXARGS];
+static int toSize[MAXARGS];
+static s_vpi_vecval *vecbuf = NULL;
+static unsigned char *wframe = NULL;
+static size_t wframe_cap = 0;
+static unsigned char *rframe = NULL;
+static size_t rframe_len = 0;
+static size_t rframe_cap = 0;
+
 /* prototypes */
 static PLI_INT32 from_myhdl_calltf(PLI_BYTE8 *user_data);
 static PLI_INT32 to_myhdl_calltf(PLI_BYTE8 *user_data);
@@ -113,6 +131,164 @@ static int init_pipes()
   return (0);
 }
 
+/* binary protocol helpers */
+
+static int read_full(void *buf, size_t count)
+{
+  size_t done = 0;
+  int n;
+
+  while (done < count) {
+    n = read_pipe((char *)buf + done, count - done);
+    if (n <= 0) {
+      return(0);
+    }
+    done += n;
+  }
+  return(1);
+}
+
+static int write_full(const void *buf, size_t count)
+{
+  size_t done = 0;
+  int n;
+
+  while (done < count) {
+    n = write_pipe((const char *)buf + done, count - done);
+    if (n <= 0) {
+      return(0);
+    }
+    done += n;
+  }
+  return(1);
+}
+
+static void put_u32(unsigned char *p, PLI_UINT32 v)
+{
+  p[0] = v & 0xFF;
+  p[1] = (v >> 8) & 0xFF;
+  p[2] = (v >> 16) & 0xFF;
+  p[3] = (v >> 24) & 0xFF;
+}
+
+static PLI_UINT32 get_u32(const unsigned char *p)
+{
+  return p[0] | (p[1] << 8) | (p[2] << 16) | ((PLI_UINT32)p[3] << 24);
+}
+
+static unsigned char *reserve(unsigned char **buf, size_t *cap, size_t size)
+{
+  if (size > *cap) {
+    *buf = realloc(*buf, size);
+    assert(*buf != NULL);
+    *cap = size;
+  }
+  return *buf;
+}
+
+/* send the time and the changed values, and read the reply frame:
+   length, time, bitmap of the changed signals, and for each of them
+   the aval and bval words of the vpi vector value */
+static int exchange_binary()
+{
+  vpiHandle net_iter, net_handle;
+  s_vpi_value value_s;
+  unsigned char lenbuf[4];
+  unsigned char *p;
+  size_t size, pos;
+  int i, w, nw;
+
+  size = 12 + (nto + 7) / 8;
+  for (i = 0; i < nto; i++) {
+    if (changeFlag[i]) {
+      size += 8 * WORDS(toSize[i]);
+    }
+  }
+  p = reserve(&wframe, &wframe_cap, size);
+  put_u32(p, (PLI_UINT32)(size - 4));
+  put_u32(p + 4, (PLI_UINT32)(pli_time & 0xFFFFFFFF));
+  put_u32(p + 8, (PLI_UINT32)(pli_time >> 32));
+  memset(p + 12, 0, (nto + 7) / 8);
+  pos = 12 + (nto + 7) / 8;
+
+  net_iter = vpi_iterate(vpiArgument, to_myhdl_systf_handle);
+  value_s.format = vpiVectorVal;
+  i = 0;
+  while ((net_handle = vpi_scan(net_iter)) != NULL) {
+    if (changeFlag[i]) {
+      nw = WORDS(toSize[i]);
+      p[12 + (i >> 3)] |= 1 << (i & 7);
+      vpi_get_value(net_handle, &value_s);
+      for (w = 0; w < nw; w++) {
+        put_u32(p + pos + 4 * w, value_s.value.vector[w].aval);
+        put_u32(p + pos + 4 * (nw + w), value_s.value.vector[w].bval);
+      }
+      pos += 8 * nw;
+      changeFlag[i] = 0;
+    }
+    i++;
+    vpi_free_object(net_handle);
+  }
+
+  if (!write_full(p, size)) {
+    return(0);
+  }
+  if (!read_full(lenbuf, 4)) {
+    return(0);
+  }
+  rframe_len = get_u32(lenbuf);
+  assert(rframe_len >= 8);
+  reserve(&rframe, &rframe_cap, rframe_len);
+  if (!read_full(rframe, rframe_len)) {
+    return(0);
+  }
+  myhdl_time = get_u32(rframe) | ((myhdl_time64_t)get_u32(rframe + 4) << 32);
+  return(1);
+}
+
+/* put the values of the last reply frame: time, bitmap of the
+   changed signals, and for each of them the aval words */
+static void apply_binary()
+{
+  vpiHandle reg_iter, reg_handle;
+  s_vpi_value value_s;
+  size_t pos;
+  int i, w, nw;
+
+  if (rframe_len <= 8) {
+    return;
+  }
+  if (vecbuf == NULL) {
+    nw = 1;
+    for (i = 0; i < nfrom; i++) {
+      if (WORDS(fromSize[i]) > nw) {
+        nw = WORDS(fromSize[i]);
+      }
+    }
+    vecbuf = malloc(nw * sizeof(s_vpi_vecval));
+    assert(vecbuf != NULL);
+  }
+  pos = 8 + (nfrom + 7) / 8;
+
+  reg_iter = vpi_iterate(vpiArgument, from_myhdl_systf_handle);
+  value_s.format = vpiVectorVal;
+  value_s.value.vector = vecbuf;
+  i = 0;
+  while ((reg_handle = vpi_scan(reg_iter)) != NULL) {
+    if (rframe[8 + (i >> 3)] & (1 << (i & 7))) {
+      nw = WORDS(fromSize[i]);
+      for (w = 0; w < nw; w++) {
+        vecbuf[w].aval = get_u32(rframe + pos + 4 * w);
+        vecbuf[w].bval = 0;
+      }
+      pos += 4 * nw;
+      vpi_put_value(reg_handle, &value_s, NULL, vpiNoDelay);
+    }
+    i++;
+    vpi_free_object(reg_handle);
+  }
+}
+
 static PLI_INT32 from_myhdl_calltf(PLI_BYTE8 *user_data)
 {
   vpiHandle reg_iter, reg_handle;
@@ -156,6 +332,12 @@ static PLI_INT32 from_myhdl_calltf(PLI_BYTE8 *user_data)
     strcat(buf, vpi_get_str(vpiName, reg_handle));
     strcat(buf, " ");
     sprintf(s, "%d ", vpi_get(vpiSize, reg_handle));
+    if (nfrom == MAXARGS) {
+      vpi_printf("ERROR: $from_myhdl max #args (%d) exceeded\n", MAXARGS);
+      vpi_control(vpiFinish, 1);  /* abort simulation */
+      return(0);
+    }
+    fromSize[nfrom++] = vpi_get(vpiSize, reg_handle);
     strcat(buf, s);
     vpi_free_object(reg_handle);
   }
@@ -227,6 +409,8 @@ static PLI_INT32 to_myhdl_calltf(PLI_BYTE8 *user_data)
     strcat(buf, vpi_get_str(vpiName, net_handle));
     strcat(buf, " ");
     sprintf(s, "%d ", vpi_get(vpiSize, net_handle));
+    toSize[i] = vpi_get(vpiSize, net_handle);
+    nto = i + 1;
     strcat(buf, s);
     changeFlag[i] = 0;
     id = malloc(sizeof(int));
@@ -298,13 +482,15 @@ static PLI_INT32 readonly_callback(p_cb_data cb_data)
 
   if (start_flag) {
     start_flag = 0;
-    n = write_pipe("START", 5);
+    n = write_pipe("START " BINARY " " SKIP, 7 + strlen(BINARY) + strlen(SKIP));
     // vpi_printf("INFO: RO cb at start-up\n");
     if ((n = read_pipe(buf, MAXLINE)) <= 0) {
       vpi_printf("ABORT from RO cb at start-up\n");
       vpi_control(vpiFinish, 1);  /* abort simulation */
     }
     assert(n > 0);
+    buf[n] = '\0';
+    binary = (strcmp(buf, "OK " BINARY) == 0);
   }
 
   buf[0] = '\0';
@@ -318,43 +504,49 @@ static PLI_INT32 readonly_callback(p_cb_data cb_data)
   /* Icarus 0.7 fails on this assertion beyond 32 bits due to a bug */
   // assert(verilog_time == pli_time * 1000 + delta);
   assert( (verilog_time & 0xFFFFFFFF) == ( (pli_time * 1000 + delta) & 0xFFFFFFFF ) );
-  sprintf(buf, "%llu ", pli_time);
-  net_iter = vpi_iterate(vpiArgument, to_myhdl_systf_handle);
-  value_s.format = vpiHexStrVal;
-  i = 0;
-  while ((net_handle = vpi_scan(net_iter)) != NULL) {
-    if (changeFlag[i]) {
-      strcat(buf, vpi_get_str(vpiName, net_handle));
-      strcat(buf, " ");
-      vpi_get_value(net_handle, &value_s);
-      strcat(buf, value_s.value.str);
-      strcat(buf, " ");
-      changeFlag[i] = 0;
+  if (binary) {
+    if (!exchange_binary()) {
+      vpi_control(vpiFinish, 1);  /* abort simulation */
+      return(0);
     }
-    i++;
-    vpi_free_object(net_handle);  // done with this one
-  }
-  //vpi_free_object(net_iter);
+  } else {
+    sprintf(buf, "%llu ", pli_time);
+    net_iter = vpi_iterate(vpiArgument, to_myhdl_systf_handle);
+    value_s.format = vpiHexStrVal;
+    i = 0;
+    while ((net_handle = vpi_scan(net_iter)) != NULL) {
+      if (changeFlag[i]) {
+        strcat(buf, vpi_get_str(vpiName, net_handle));
+        strcat(buf, " ");
+        vpi_get_value(net_handle, &value_s);
+        strcat(buf, value_s.value.str);
+        strcat(buf, " ");
+        changeFlag[i] = 0;
+      }
+      i++;
+      vpi_free_object(net_handle);  // done with this one
+    }
+    //vpi_free_object(net_iter);
 
-  n = write_pipe(buf, strlen(buf));
-  if ((n = read_pipe(buf, MAXLINE)) <= 0) {
-    // vpi_printf("ABORT from RO cb\n");
-    vpi_control(vpiFinish, 1);  /* abort simulation */
-    return(0);
-  }
-  assert(n > 0);
-  buf[n] = '\0';
+    n = write_pipe(buf, strlen(buf));
+    if ((n = read_pipe(buf, MAXLINE)) <= 0) {
+      // vpi_printf("ABORT from RO cb\n");
+      vpi_control(vpiFinish, 1);  /* abort simulation */
+      return(0);
+    }
+    assert(n > 0);
+    buf[n] = '\0';
 
 
 
-  /* save copy for later callback */
-  strcpy(bufcp, buf);
+    /* save copy for later callback */
+    strcpy(bufcp, buf);
 
-  myhdl_time_string = strtok(buf, " ");
-  myhdl_time = (myhdl_time64_t) strtoull(myhdl_time_string, (char **) NULL, 10);
+    myhdl_time_string = strtok(buf, " ");
+    myhdl_time = (myhdl_time64_t) strtoull(myhdl_time_string, (char **) NULL, 10);
+  }
   delay = (myhdl_time - pli_time) * 1000;
   assert(delay >= 0);
-  assert(delay <= 0xFFFFFFFF);
   if (delay > 0) { // schedule cbAfterDelay callback
     assert(delay > delta);
     delay -= delta;
@@ -368,8 +560,8 @@ static PLI_INT32 readonly_callback(p_cb_data cb_data)
 
     // register cbAfterDelay callback //
     time_s.type = vpiSimTime;
-    time_s.high = 0;
-    time_s.low = (PLI_UINT32) delay;
+    time_s.high = (PLI_UINT32) (delay >> 32);
+    time_s.low = (PLI_UINT32) (delay & 0xFFFFFFFF);
     cb_data_s.reason = cbAfterDelay;
     cb_data_s.user_data = NULL;
     cb_data_s.cb_rtn = delay_callback;
@@ -431,20 +623,24 @@ static PLI_INT32 delta_callback(p_cb_data cb_data)
     return(0);
   }
 
-  /* skip time value */
-  strtok(bufcp, " ");
+  if (binary) {
+    apply_binary();
+  } else {
+    /* skip time value */
+    strtok(bufcp, " ");
 
-  reg_iter = vpi_iterate(vpiArgument, from_myhdl_systf_handle);
+    reg_iter = vpi_iterate(vpiArgument, from_myhdl_systf_handle);
 
-  value_s.format = vpiHexStrVal;
-  while ((value_s.value.str = strtok(NULL, " ")) != NULL) {
-    reg_handle = vpi_scan(reg_iter);
-    vpi_put_value(reg_handle, &value_s, NULL, vpiNoDelay);
-    vpi_free_object(reg_handle);
-  }
+    value_s.format = vpiHexStrVal;
+    while ((value_s.value.str = strtok(NULL, " ")) != NULL) {
+      reg_handle = vpi_scan(reg_iter);
+      vpi_put_value(reg_handle, &value_s, NULL, vpiNoDelay);
+      vpi_free_object(reg_handle);
+    }
 
-  if (reg_iter != NULL) {
-    vpi_free_object(reg_iter);
+    if (reg_iter != NULL) {
+      vpi_free_object(reg_iter);
+    }
   }
 
   // register readonly callback //
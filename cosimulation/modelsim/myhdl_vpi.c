@@ -1,6 +1,9 @@
 
 #include <stdlib.h>
 #include <unistd.h>
+#include <fcntl.h>
+#include <poll.h>
+#include <sys/mman.h>
 #include <assert.h>
 #include <string.h>
 #include <stdio.h>
@@ -41,6 +44,48 @@ static myhdl_time64_t verilog_time;
 static myhdl_time64_t pli_time;
 static int delta;
 
+/* binary protocol, offered to myhdl with "START BIN1" */
+#define BINARY "BIN1"
+/* time skipping: synchronize only at the times that the inputs change */
+#define SKIP "SKIP1"
+#define WORDS(size) (((size) + 31) / 32)
+
+static int binary = 0;
+static int nfrom = 0;
+static int nto = 0;
+static int fromSize[MAXARGS];
+static int toSize[MAXARGS];
+static s_vpi_vecval *vecbuf = NULL;
+static unsigned char *wframe = NULL;
+static size_t wframe_cap = 0;
+static unsigned char *rframe = NULL;
+static size_t rframe_len = 0;
+static size_t rframe_cap = 0;
+
+/* shared memory transport, offered with "START BIN1 SHM1" */
+#define SHM "SHM1"
+#define UPSEQ 0
+#define DOWNSEQ 4
+#define HDLWAIT 8
+#define MYHDLWAIT 12
+/* polls of a sequence number before sleeping, MYHDL_SHM_SPIN if set */
+#define SPIN 100000
+/* eventfd wake ups, offered with "EFD1" when myhdl passes eventfds */
+#define EFD "EFD1"
+
+static unsigned char *shm = NULL;
+static size_t up_frame;
+static size_t down_frame;
+static size_t up_slots[MAXARGS];
+static size_t down_slots[MAXARGS];
+static PLI_UINT32 up_seq = 0;
+static PLI_UINT32 down_seq = 0;
+static long spin = SPIN;
+/* eventfds that we ring and that myhdl rings, and whether they are used */
+static int up_event = -1;
+static int down_event = -1;
+static int efd = 0;
+
 /* prototypes */
 static PLI_INT32 from_myhdl_calltf(PLI_BYTE8 *user_data);
 static PLI_INT32 to_myhdl_calltf(PLI_BYTE8 *user_data);
@@ -85,10 +130,358 @@ static int init_pipes()
   }
   wpipe = atoi(w);
   rpipe = atoi(r);
+  if ((w = getenv("MYHDL_UP_EVENT")) != NULL &&
+      (r = getenv("MYHDL_DOWN_EVENT")) != NULL) {
+    up_event = atoi(w);
+    down_event = atoi(r);
+  }
+  if ((w = getenv("MYHDL_SHM_SPIN")) != NULL) {
+    spin = atol(w);
+  }
   init_pipes_flag = 1;
   return (0);
 }
 
+/* binary protocol helpers */
+
+static int read_full(void *buf, size_t count)
+{
+  size_t done = 0;
+  int n;
+
+  while (done < count) {
+    n = read(rpipe, (char *)buf + done, count - done);
+    if (n <= 0) {
+      return(0);
+    }
+    done += n;
+  }
+  return(1);
+}
+
+static int write_full(const void *buf, size_t count)
+{
+  size_t done = 0;
+  int n;
+
+  while (done < count) {
+    n = write(wpipe, (const char *)buf + done, count - done);
+    if (n <= 0) {
+      return(0);
+    }
+    done += n;
+  }
+  return(1);
+}
+
+static void put_u32(unsigned char *p, PLI_UINT32 v)
+{
+  p[0] = v & 0xFF;
+  p[1] = (v >> 8) & 0xFF;
+  p[2] = (v >> 16) & 0xFF;
+  p[3] = (v >> 24) & 0xFF;
+}
+
+static PLI_UINT32 get_u32(const unsigned char *p)
+{
+  return p[0] | (p[1] << 8) | (p[2] << 16) | ((PLI_UINT32)p[3] << 24);
+}
+
+static unsigned char *reserve(unsigned char **buf, size_t *cap, size_t size)
+{
+  if (size > *cap) {
+    *buf = realloc(*buf, size);
+    assert(*buf != NULL);
+    *cap = size;
+  }
+  return *buf;
+}
+
+/* shared memory transport helpers */
+
+static PLI_UINT32 load_seq(size_t off)
+{
+  return __atomic_load_n((PLI_UINT32 *)(shm + off), __ATOMIC_SEQ_CST);
+}
+
+static void store_seq(size_t off, PLI_UINT32 v)
+{
+  __atomic_store_n((PLI_UINT32 *)(shm + off), v, __ATOMIC_SEQ_CST);
+}
+
+static size_t pad(size_t n, size_t m)
+{
+  return (n + m - 1) / m * m;
+}
+
+/* map the shared memory, with the layout of _shmLayout in myhdl:
+   sequence numbers and sleep flags, the frame to myhdl with the time,
+   a bitmap and a slot with the aval and bval words of each signal,
+   and the frame from myhdl with the time, a flag that is set when it
+   holds values, a bitmap and a slot with the aval words of each signal */
+static int init_shm(const char *path)
+{
+  size_t pos;
+  int i, fd;
+
+  up_frame = 16;
+  pos = pad(up_frame + 8 + (nto + 7) / 8, 4);
+  for (i = 0; i < nto; i++) {
+    up_slots[i] = pos;
+    pos += 8 * WORDS(toSize[i]);
+  }
+  down_frame = pad(pos, 8);
+  pos = pad(down_frame + 12 + (nfrom + 7) / 8, 4);
+  for (i = 0; i < nfrom; i++) {
+    down_slots[i] = pos;
+    pos += 4 * WORDS(fromSize[i]);
+  }
+
+  if ((fd = open(path, O_RDWR)) < 0) {
+    return(0);
+  }
+  shm = mmap(NULL, pos, PROT_READ | PROT_WRITE, MAP_SHARED, fd, 0);
+  close(fd);
+  if (shm == MAP_FAILED) {
+    shm = NULL;
+    return(0);
+  }
+  return(1);
+}
+
+/* wait for a new frame from myhdl: poll its sequence number, then
+   sleep until it rings */
+static int wait_shm()
+{
+  struct pollfd pfd;
+  struct pollfd pfds[2];
+  char buf[64];
+  unsigned long long count;
+  PLI_UINT32 seq;
+  long i;
+
+  for (i = 0; i < spin; i++) {
+    if ((seq = load_seq(DOWNSEQ)) != down_seq) {
+      down_seq = seq;
+      return(1);
+    }
+  }
+  if (efd) {
+    /* myhdl rings the eventfd after every frame, so no wake up is
+       lost; the pipe only tells that it ended */
+    pfds[0].fd = down_event;
+    pfds[0].events = POLLIN;
+    pfds[1].fd = rpipe;
+    pfds[1].events = POLLIN;
+    while ((seq = load_seq(DOWNSEQ)) == down_seq) {
+      if (poll(pfds, 2, -1) <= 0) {
+        continue;
+      }
+      if (pfds[1].revents && read(rpipe, buf, sizeof(buf)) <= 0) {
+        return(0);
+      }
+      if (pfds[0].revents & POLLIN) {
+        if (read(down_event, &count, sizeof(count)) != sizeof(count)) {
+          return(0);
+        }
+      }
+    }
+    down_seq = seq;
+    return(1);
+  }
+  /* on the pipe, myhdl only rings when the flag is set; the timeout
+     covers a wake up that is lost between the flag and the poll */
+  pfd.fd = rpipe;
+  pfd.events = POLLIN;
+  while (1) {
+    store_seq(HDLWAIT, 1);
+    if ((seq = load_seq(DOWNSEQ)) != down_seq) {
+      break;
+    }
+    if (poll(&pfd, 1, 1) > 0) {
+      if (read(rpipe, buf, sizeof(buf)) <= 0) {
+        return(0);
+      }
+    }
+  }
+  store_seq(HDLWAIT, 0);
+  down_seq = seq;
+  return(1);
+}
+
+/* put the time and the changed values in the frame to myhdl, and
+   wait for the frame from myhdl */
+static int exchange_shm()
+{
+  vpiHandle net_iter, net_handle;
+  s_vpi_value value_s;
+  unsigned char *p;
+  unsigned long long count;
+  int i, w, nw;
+
+  put_u32(shm + up_frame, (PLI_UINT32)(pli_time & 0xFFFFFFFF));
+  put_u32(shm + up_frame + 4, (PLI_UINT32)(pli_time >> 32));
+  memset(shm + up_frame + 8, 0, (nto + 7) / 8);
+
+  net_iter = vpi_iterate(vpiArgument, to_myhdl_systf_handle);
+  value_s.format = vpiVectorVal;
+  i = 0;
+  while ((net_handle = vpi_scan(net_iter)) != NULL) {
+    if (changeFlag[i]) {
+      nw = WORDS(toSize[i]);
+      shm[up_frame + 8 + (i >> 3)] |= 1 << (i & 7);
+      vpi_get_value(net_handle, &value_s);
+      p = shm + up_slots[i];
+      for (w = 0; w < nw; w++) {
+        put_u32(p + 4 * w, value_s.value.vector[w].aval);
+        put_u32(p + 4 * (nw + w), value_s.value.vector[w].bval);
+      }
+      changeFlag[i] = 0;
+    }
+    i++;
+    vpi_free_object(net_handle);
+  }
+
+  store_seq(UPSEQ, ++up_seq);
+  if (efd) {
+    count = 1;
+    if (write(up_event, &count, sizeof(count)) != sizeof(count)) {
+      return(0);
+    }
+  } else if (load_seq(MYHDLWAIT)) {
+    if (write(wpipe, "", 1) <= 0) {
+      return(0);
+    }
+  }
+  if (!wait_shm()) {
+    return(0);
+  }
+  myhdl_time = get_u32(shm + down_frame) |
+    ((myhdl_time64_t)get_u32(shm + down_frame + 4) << 32);
+  return(1);
+}
+
+/* send the time and the changed values, and read the reply frame:
+   length, time, bitmap of the changed signals, and for each of them
+   the aval and bval words of the vpi vector value */
+static int exchange_binary()
+{
+  vpiHandle net_iter, net_handle;
+  s_vpi_value value_s;
+  unsigned char lenbuf[4];
+  unsigned char *p;
+  size_t size, pos;
+  int i, w, nw;
+
+  if (shm != NULL) {
+    return exchange_shm();
+  }
+  size = 12 + (nto + 7) / 8;
+  for (i = 0; i < nto; i++) {
+    if (changeFlag[i]) {
+      size += 8 * WORDS(toSize[i]);
+    }
+  }
+  p = reserve(&wframe, &wframe_cap, size);
+  put_u32(p, (PLI_UINT32)(size - 4));
+  put_u32(p + 4, (PLI_UINT32)(pli_time & 0xFFFFFFFF));
+  put_u32(p + 8, (PLI_UINT32)(pli_time >> 32));
+  memset(p + 12, 0, (nto + 7) / 8);
+  pos = 12 + (nto + 7) / 8;
+
+  net_iter = vpi_iterate(vpiArgument, to_myhdl_systf_handle);
+  value_s.format = vpiVectorVal;
+  i = 0;
+  while ((net_handle = vpi_scan(net_iter)) != NULL) {
+    if (changeFlag[i]) {
+      nw = WORDS(toSize[i]);
+      p[12 + (i >> 3)] |= 1 << (i & 7);
+      vpi_get_value(net_handle, &value_s);
+      for (w = 0; w < nw; w++) {
+        put_u32(p + pos + 4 * w, value_s.value.vector[w].aval);
+        put_u32(p + pos + 4 * (nw + w), value_s.value.vector[w].bval);
+      }
+      pos += 8 * nw;
+      changeFlag[i] = 0;
+    }
+    i++;
+    vpi_free_object(net_handle);
+  }
+
+  if (!write_full(p, size)) {
+    return(0);
+  }
+  if (!read_full(lenbuf, 4)) {
+    return(0);
+  }
+  rframe_len = get_u32(lenbuf);
+  assert(rframe_len >= 8);
+  reserve(&rframe, &rframe_cap, rframe_len);
+  if (!read_full(rframe, rframe_len)) {
+    return(0);
+  }
+  myhdl_time = get_u32(rframe) | ((myhdl_time64_t)get_u32(rframe + 4) << 32);
+  return(1);
+}
+
+/* put the values of the last frame from myhdl: time, bitmap of the
+   changed signals, and for each of them the aval words */
+static void apply_binary()
+{
+  vpiHandle reg_iter, reg_handle;
+  s_vpi_value value_s;
+  const unsigned char *bitmap, *p;
+  size_t pos = 0;
+  int i, w, nw;
+
+  if (shm != NULL) {
+    if (!get_u32(shm + down_frame + 8)) {
+      return;
+    }
+  } else if (rframe_len <= 8) {
+    return;
+  }
+  if (vecbuf == NULL) {
+    nw = 1;
+    for (i = 0; i < nfrom; i++) {
+      if (WORDS(fromSize[i]) > nw) {
+        nw = WORDS(fromSize[i]);
+      }
+    }
+    vecbuf = malloc(nw * sizeof(s_vpi_vecval));
+    assert(vecbuf != NULL);
+  }
+  if (shm != NULL) {
+    bitmap = shm + down_frame + 12;
+  } else {
+    bitmap = rframe + 8;
+    pos = 8 + (nfrom + 7) / 8;
+  }
+
+  reg_iter = vpi_iterate(vpiArgument, from_myhdl_systf_handle);
+  value_s.format = vpiVectorVal;
+  value_s.value.vector = vecbuf;
+  i = 0;
+  while ((reg_handle = vpi_scan(reg_iter)) != NULL) {
+    if (bitmap[i >> 3] & (1 << (i & 7))) {
+      nw = WORDS(fromSize[i]);
+      if (shm != NULL) {
+        p = shm + down_slots[i];
+      } else {
+        p = rframe + pos;
+        pos += 4 * nw;
+      }
+      for (w = 0; w < nw; w++) {
+        vecbuf[w].aval = get_u32(p + 4 * w);
+        vecbuf[w].bval = 0;
+      }
+      vpi_put_value(reg_handle, &value_s, NULL, vpiNoDelay);
+    }
+    i++;
+    vpi_free_object(reg_handle);
+  }
+}
+
 static PLI_INT32 from_myhdl_calltf(PLI_BYTE8 *user_data)
 {
   vpiHandle reg_iter, reg_handle;
@@ -132,6 +525,12 @@ static PLI_INT32 from_myhdl_calltf(PLI_BYTE8 *user_data)
     strcat(buf, vpi_get_str(vpiName, reg_handle));
     strcat(buf, " ");
     sprintf(s, "%d ", vpi_get(vpiSize, reg_handle));
+    if (nfrom == MAXARGS) {
+      vpi_printf("ERROR: $from_myhdl max #args (%d) exceeded\n", MAXARGS);
+      vpi_control(vpiFinish, 1);  /* abort simulation */
+      return(0);
+    }
+    fromSize[nfrom++] = vpi_get(vpiSize, reg_handle);
     strcat(buf, s);
     vpi_free_object(reg_handle);
   }
@@ -203,6 +602,8 @@ static PLI_INT32 to_myhdl_calltf(PLI_BYTE8 *user_data)
     strcat(buf, vpi_get_str(vpiName, net_handle));
     strcat(buf, " ");
     sprintf(s, "%d ", vpi_get(vpiSize, net_handle));
+    toSize[i] = vpi_get(vpiSize, net_handle);
+    nto = i + 1;
     strcat(buf, s);
     changeFlag[i] = 0;
     id = malloc(sizeof(int));
@@ -267,6 +668,7 @@ static PLI_INT32 readonly_callback(p_cb_data cb_data)
   char buf[MAXLINE];
   int n;
   int i;
+  char *path;
   char *myhdl_time_string;
   myhdl_time64_t delay;
 
@@ -274,13 +676,31 @@ static PLI_INT32 readonly_callback(p_cb_data cb_data)
 
   if (start_flag) {
     start_flag = 0;
-    n = write(wpipe, "START", 5);
+    strcpy(buf, "START " BINARY " " SHM " " SKIP);
+    if (up_event >= 0) {
+      strcat(buf, " " EFD);
+    }
+    n = write(wpipe, buf, strlen(buf));
     // vpi_printf("INFO: RO cb at start-up\n");
     if ((n = read(rpipe, buf, MAXLINE)) == 0) {
       vpi_printf("ABORT from RO cb at start-up\n");
       vpi_control(vpiFinish, 1);  /* abort simulation */
     }
     assert(n > 0);
+    buf[n] = '\0';
+    binary = (strncmp(buf, "OK " BINARY, 3 + strlen(BINARY)) == 0);
+    if (binary && strncmp(buf + 3 + strlen(BINARY), " " SHM " ", 2 + strlen(SHM)) == 0) {
+      path = buf + 5 + strlen(BINARY) + strlen(SHM);
+      if (strncmp(path, EFD " ", 1 + strlen(EFD)) == 0) {
+        efd = 1;
+        path += 1 + strlen(EFD);
+      }
+      if (!init_shm(path)) {
+        vpi_printf("ERROR: cannot map %s\n", path);
+        vpi_control(vpiFinish, 1);  /* abort simulation */
+        return(0);
+      }
+    }
   }
 
   buf[0] = '\0';
@@ -294,43 +714,49 @@ static PLI_INT32 readonly_callback(p_cb_data cb_data)
   /* Icarus 0.7 fails on this assertion beyond 32 bits due to a bug */
   // assert(verilog_time == pli_time * 1000 + delta);
   assert( (verilog_time & 0xFFFFFFFF) == ( (pli_time * 1000 + delta) & 0xFFFFFFFF ) );
-  sprintf(buf, "%llu ", pli_time);
-  net_iter = vpi_iterate(vpiArgument, to_myhdl_systf_handle);
-  value_s.format = vpiHexStrVal;
-  i = 0;
-  while ((net_handle = vpi_scan(net_iter)) != NULL) {
-    if (changeFlag[i]) {
-      strcat(buf, vpi_get_str(vpiName, net_handle));
-      strcat(buf, " ");
-      vpi_get_value(net_handle, &value_s);
-      strcat(buf, value_s.value.str);
-      strcat(buf, " ");
-      changeFlag[i] = 0;
+  if (binary) {
+    if (!exchange_binary()) {
+      vpi_control(vpiFinish, 1);  /* abort simulation */
+      return(0);
     }
-    i++;
-    vpi_free_object(net_handle);  // done with this one
-  }
-  //vpi_free_object(net_iter);
+  } else {
+    sprintf(buf, "%llu ", pli_time);
+    net_iter = vpi_iterate(vpiArgument, to_myhdl_systf_handle);
+    value_s.format = vpiHexStrVal;
+    i = 0;
+    while ((net_handle = vpi_scan(net_iter)) != NULL) {
+      if (changeFlag[i]) {
+        strcat(buf, vpi_get_str(vpiName, net_handle));
+        strcat(buf, " ");
+        vpi_get_value(net_handle, &value_s);
+        strcat(buf, value_s.value.str);
+        strcat(buf, " ");
+        changeFlag[i] = 0;
+      }
+      i++;
+      vpi_free_object(net_handle);  // done with this one
+    }
+    //vpi_free_object(net_iter);
 
-  n = write(wpipe, buf, strlen(buf));
-  if ((n = read(rpipe, buf, MAXLINE)) == 0) {
-    // vpi_printf("ABORT from RO cb\n");
-    vpi_control(vpiFinish, 1);  /* abort simulation */
-    return(0);
-  }
-  assert(n > 0);
-  buf[n] = '\0';
+    n = write(wpipe, buf, strlen(buf));
+    if ((n = read(rpipe, buf, MAXLINE)) == 0) {
+      // vpi_printf("ABORT from RO cb\n");
+      vpi_control(vpiFinish, 1);  /* abort simulation */
+      return(0);
+    }
+    assert(n > 0);
+    buf[n] = '\0';
 
 
 
-  /* save copy for later callback */
-  strcpy(bufcp, buf);
+    /* save copy for later callback */
+    strcpy(bufcp, buf);
 
-  myhdl_time_string = strtok(buf, " ");
-  myhdl_time = (myhdl_time64_t) strtoull(myhdl_time_string, (char **) NULL, 10);
+    myhdl_time_string = strtok(buf, " ");
+    myhdl_time = (myhdl_time64_t) strtoull(myhdl_time_string, (char **) NULL, 10);
+  }
   delay = (myhdl_time - pli_time) * 1000;
   assert(delay >= 0);
-  assert(delay <= 0xFFFFFFFF);
   if (delay > 0) { // schedule cbAfterDelay callback
     assert(delay > delta);
     delay -= delta;
@@ -344,8 +770,8 @@ static PLI_INT32 readonly_callback(p_cb_data cb_data)
 
     // register cbAfterDelay callback //
     time_s.type = vpiSimTime;
-    time_s.high = 0;
-    time_s.low = (PLI_UINT32) delay;
+    time_s.high = (PLI_UINT32) (delay >> 32);
+    time_s.low = (PLI_UINT32) (delay & 0xFFFFFFFF);
     cb_data_s.reason = cbAfterDelay;
     cb_data_s.user_data = NULL;
     cb_data_s.cb_rtn = delay_callback;
@@ -407,20 +833,24 @@ static PLI_INT32 delta_callback(p_cb_data cb_data)
     return(0);
   }
 
-  /* skip time value */
-  strtok(bufcp, " ");
+  if (binary) {
+    apply_binary();
+  } else {
+    /* skip time value */
+    strtok(bufcp, " ");
 
-  reg_iter = vpi_iterate(vpiArgument, from_myhdl_systf_handle);
+    reg_iter = vpi_iterate(vpiArgument, from_myhdl_systf_handle);
 
-  value_s.format = vpiHexStrVal;
-  while ((value_s.value.str = strtok(NULL, " ")) != NULL) {
-    reg_handle = vpi_scan(reg_iter);
-    vpi_put_value(reg_handle, &value_s, NULL, vpiNoDelay);
-    vpi_free_object(reg_handle);
-  }
+    value_s.format = vpiHexStrVal;
+    while ((value_s.value.str = strtok(NULL, " ")) != NULL) {
+      reg_handle = vpi_scan(reg_iter);
+      vpi_put_value(reg_handle, &value_s, NULL, vpiNoDelay);
+      vpi_free_object(reg_handle);
+    }
 
-  if (reg_iter != NULL) {
-    vpi_free_object(reg_iter);
+    if (reg_iter != NULL) {
+      vpi_free_object(reg_iter);
+    }
   }
 
   // register readonly callback //
@@ -0,0 +1,96 @@
+""" Benchmark concurrent stepping of several cosimulations.
+
+Run it from the test directory of a simulator, so that the dff and inc
+modules found first are the cosimulation versions, e.g.:
+
+    cd cosimulation/icarus/test
+    python ../../test/perf_cosim.py
+
+Each cosimulation runs in its own simulator process. The same number of
+cosimulations is run twice: once with the frames read serially, in a
+fixed order, as before _gather, and once with the frames gathered as
+they arrive. The time per instance should drop as instances are added,
+and more so when the frames are gathered, as the simulators step
+concurrently.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.getcwd())
+
+from myhdl import Simulation, StopSimulation, Signal, delay, intbv, negedge
+from myhdl import _Cosimulation
+
+from dff import dff
+from inc import inc
+
+ACTIVE_LOW, INACTIVE_HIGH = 0, 1
+
+CYCLES = 2000
+N = 8
+
+
+def clockGen(clock):
+    while 1:
+        yield delay(10)
+        clock.next = not clock
+
+
+def stimulus(ds, enable, clock, reset):
+    reset.next = ACTIVE_LOW
+    yield negedge(clock)
+    reset.next = INACTIVE_HIGH
+    for i in range(CYCLES):
+        for k, d in enumerate(ds):
+            d.next = (i >> k) & 1
+        enable.next = i % 3 != 0
+        yield negedge(clock)
+    raise StopSimulation
+
+
+def bench(ninst):
+    clock = Signal(bool(0))
+    reset = Signal(bool(1))
+    enable = Signal(bool(0))
+    ds = [Signal(bool(0)) for k in range(ninst)]
+    qs = [Signal(bool(0)) for k in range(ninst)]
+    counts = [Signal(intbv(0)[8:]) for k in range(ninst)]
+    duts = []
+    for k in range(ninst):
+        duts.append(dff(qs[k], ds[k], clock, reset))
+        duts.append(inc(counts[k], enable, clock, reset, N * 16))
+    return duts, clockGen(clock), stimulus(ds, enable, clock, reset)
+
+
+def _serialCollect(cosims):
+    # the baseline: get the frames in a fixed order
+    for c in cosims:
+        if c._getMode:
+            c._get()
+
+
+def measure(ninst, collect):
+    saved = _Cosimulation._collect
+    _Cosimulation._collect = collect
+    try:
+        sim = Simulation(bench(ninst))
+        start = time.time()
+        sim.run(quiet=1)
+        return time.time() - start
+    finally:
+        _Cosimulation._collect = saved
+
+
+def main():
+    print("%5s %12s %12s %8s" % ("pairs", "serial (s)", "gathered (s)",
+                                 "speedup"))
+    for ninst in (1, 2, 4, N):
+        serial = measure(ninst, _serialCollect)
+        gathered = measure(ninst, _Cosimulation._collect)
+        print("%5d %12.2f %12.2f %8.2f" %
+              (ninst, serial, gathered, serial / gathered))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  Copyright (C) 2003-2008 Jan Decaluwe
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+""" Module that provides the Clock class """
+from __future__ import absolute_import
+
+from myhdl._compat import integer_types
+from myhdl import _simulator
+from myhdl._simulator import _futureEvents, _siglist
+from myhdl._Signal import _Signal
+
+_schedule = _futureEvents.schedule
+
+
+class _error:
+    pass
+_error.ArgType = "Clock: first argument should be a Signal"
+_error.PeriodType = "Clock: period should be an integer"
+_error.Period = "Clock: period should be a natural integer larger than 1"
+_error.DutyCycle = "Clock: duty cycle should give non-zero high and low times"
+
+
+class Clock(object):
+
+    """ Periodic clock generator, scheduled natively by the simulator.
+
+    A Clock toggles a signal as a generator that alternately yields
+    delays and inverts the signal would, but without resuming a
+    generator for every edge: the Clock object itself is the future
+    event, and it toggles the signal in the same phase as the processes
+    that wake up at that time. The signal keeps its initial value until
+    the first edge.
+
+    """
+
+    __slots__ = ('sig', 'period', 'duty', 'name', '_high', '_low', '_levels')
+
+    def __init__(self, sig, period, duty=0.5):
+        """ Construct a clock generator.
+
+        sig -- the signal to drive
+        period -- the clock period, in simulation time units
+        duty -- the fraction of the period that the clock is high
+
+        """
+        if not isinstance(sig, _Signal):
+            raise TypeError(_error.ArgType)
+        if not isinstance(period, integer_types):
+            raise TypeError(_error.PeriodType)
+        if period < 2:
+            raise ValueError(_error.Period)
+        high = int(round(period * duty))
+        if not 0 < high < period:
+            raise ValueError(_error.DutyCycle)
+        self.sig = sig
+        self.period = period
+        self.duty = duty
+        self.name = 'clock'
+        self._high = high
+        self._low = period - high
+        if sig._type is bool:
+            self._levels = (False, True)
+        else:
+            self._levels = (0, 1)
+
+    def _start(self):
+        if self.sig._val:
+            _schedule(_simulator._time + self._high, self)
+        else:
+            _schedule(_simulator._time + self._low, self)
+
+    def apply(self):
+        # toggle in the waiter phase, as a generator woken by a delay does
+        return [self]
+
+    def next(self, waiters, actives, exc):
+        sig = self.sig
+        if sig._val:
+            sig._setNextVal(self._levels[0])
+            _schedule(_simulator._time + self._low, self)
+        else:
+            sig._setNextVal(self._levels[1])
+            _schedule(_simulator._time + self._high, self)
+        if not sig._pending:
+            sig._pending = True
+            _siglist.append(sig)
@@ -23,16 +23,43 @@ from __future__ import absolute_import
 import sys
 import os
 #import shlex
+import mmap
+import select
+import struct
 import subprocess
+import tempfile
+from binascii import hexlify, unhexlify
 
 from myhdl._intbv import intbv
 from myhdl import _simulator, CosimulationError
 from myhdl._compat import set_inheritable, string_types, to_bytes, to_str
 from myhdl._enum import EnumItemType
+from myhdl._Waiter import _Waiter
 from copy import deepcopy
  
 _MAXLINE = 4096
 
+# binary protocol, offered by the HDL side with "START BIN1"
+_BINARY = "BIN1"
+_LENGTH = struct.Struct('<I')
+_TIME = struct.Struct('<Q')
+
+# shared memory transport, offered with "START BIN1 SHM1"
+_SHM = "SHM1"
+_SEQ = struct.Struct('<I')
+# header words: sequence numbers of the frames from the HDL side and
+# from MyHDL, and the flags that are set while a side sleeps on its pipe
+_UPSEQ, _DOWNSEQ, _HDLWAIT, _MYHDLWAIT = 0, 4, 8, 12
+# polls of a sequence number before sleeping, on both sides
+_SPIN = int(os.environ.get('MYHDL_SHM_SPIN', 1000))
+# eventfd wake ups, offered with "START ... SHM1 EFD1": each side rings
+# an eventfd after a frame, and the peer sleeps on it
+_EFD = "EFD1"
+
+# time skipping, offered with "START ... SKIP1": the HDL side accepts
+# to be synchronized only at the times that its inputs change
+_SKIP = "SKIP1"
+
 
 class _error:
     pass
@@ -43,6 +70,100 @@ _error.NoCommunication = "No signals communicating to myhdl"
 _error.SimulationEnd = "Premature simulation end"
 _error.OSError = "OSError"
 
+def _pad(n, m):
+    return (n + m - 1) // m * m
+
+
+def _shmLayout(toSizes, fromSizes):
+    """ Return the layout of the shared memory of a cosimulation.
+
+    The frame from the HDL side starts at offset 16 with the time and a
+    bitmap of the changed signals, followed by a slot with the aval and
+    bval words of each signal. The frame from MyHDL follows with the
+    time, a flag that is set when it holds values, a bitmap and a slot
+    with the aval words of each signal. Return the offsets of the
+    frames, the offsets of the slots and the total size.
+
+    """
+    up = 16
+    pos = _pad(up + 8 + (len(toSizes) + 7) // 8, 4)
+    upSlots = []
+    for n in toSizes:
+        upSlots.append(pos)
+        pos += 8 * ((n + 31) // 32)
+    down = _pad(pos, 8)
+    pos = _pad(down + 12 + (len(fromSizes) + 7) // 8, 4)
+    downSlots = []
+    for n in fromSizes:
+        downSlots.append(pos)
+        pos += 4 * ((n + 31) // 32)
+    return up, upSlots, down, downSlots, pos
+
+
+class _DirtyFlag(object):
+
+    """ Fanout entry that marks a signal of a cosimulation as changed """
+
+    __slots__ = ('cosim', 'index')
+
+    def __init__(self, cosim, index):
+        self.cosim = cosim
+        self.index = index
+
+    def next(self, waiters, actives, exc):
+        self.cosim._dirty.add(self.index)
+        self.cosim._hasChange = 1
+
+
+class _CosimWaiter(_Waiter):
+
+    """ Waiter that registers the dirty flags of a cosimulation """
+
+    __slots__ = ('cosim', 'hasRun')
+
+    def __init__(self, cosim):
+        self.cosim = cosim
+        self.hasRun = 0
+
+    def next(self, waiters, actives, exc):
+        if self.hasRun:
+            raise StopIteration
+        self.hasRun = 1
+        for i, s in enumerate(self.cosim._fromSigs):
+            s._eventFanout.append(_DirtyFlag(self.cosim, i))
+
+
+def _collect(cosims):
+    pending = [c for c in cosims if c._getMode]
+    if sys.platform != "win32":
+        pipes = dict((c._rt, c) for c in pending if c._shm is None)
+        while len(pipes) > 1:
+            for fd in select.select(list(pipes), [], [])[0]:
+                pipes.pop(fd)._get()
+    for c in pending:
+        c._get()
+
+
+def _gather(cosims):
+    """ Get the frames of several cosimulations in the order they arrive.
+
+    The frames were requested from all cosimulations with _put, so that
+    they run concurrently. Pipes are read as they become ready, and
+    shared memory transports are polled after that. The cosimulations
+    that _put moved to a new time get their values after that, and
+    their frames are gathered in the same way.
+
+    """
+    _collect(cosims)
+    jumped = [c for c in cosims if c._deferred is not None]
+    if jumped:
+        for c in jumped:
+            time, changes = c._deferred
+            c._deferred = None
+            c._send(time, changes)
+        _collect(jumped)
+
+
 class CosimulationPipe:
     """Cosimulation pipe base class"""
     def __init__(self, exe="", capture = False, **kwargs):
@@ -69,9 +190,27 @@ class CosimulationPipe:
         self._toSigDict = {}
         self._hasChange = 0
         self._getMode = 1
+        self._binary = False
+        self._shm = None
+        self._skip = False
+        self._putTime = 0
+        # the time and the values to send after a time jump
+        self._deferred = None
+        self._shmPath = None
+        # eventfds that the HDL side and MyHDL ring, if available
+        self._upEvent = None
+        self._downEvent = None
 
         env = os.environ.copy()
 
+        if hasattr(os, 'eventfd'):
+            self._upEvent = os.eventfd(0)
+            self._downEvent = os.eventfd(0)
+            set_inheritable(self._upEvent, True)
+            set_inheritable(self._downEvent, True)
+            env['MYHDL_UP_EVENT'] = str(self._upEvent)
+            env['MYHDL_DOWN_EVENT'] = str(self._downEvent)
+
         # In Windows the FDs aren't inheritable when using Popen,
         # only the HANDLEs are
         if sys.platform != "win32":
@@ -94,6 +233,7 @@ class CosimulationPipe:
             else:
                 sp = subprocess.Popen(exe, env=env, close_fds=False)
         except OSError as e:
+            self._closeEvents()
             raise CosimulationError(_error.OSError, str(e))
 
         self._child = sp
@@ -101,6 +241,10 @@ class CosimulationPipe:
 
         os.close(wt)
         os.close(rf)
+        # the child has them, keep them from later children
+        for fd in (self._upEvent, self._downEvent):
+            if fd is not None:
+                set_inheritable(fd, False)
 
         self.run_cosim(**kwargs)
 
@@ -141,14 +285,133 @@ class CosimulationPipe:
             elif e[0] == "START":
                 if not self._toSignames:
                     raise CosimulationError(_error.NoCommunication)
-                os.write(self._wf, b"OK")
+                self._dirty = set(range(len(self._fromSigs)))
+                self._skip = _SKIP in e[1:]
+                if _BINARY in e[1:] and _SHM in e[1:] and \
+                        sys.platform != "win32":
+                    self._setBinary()
+                    self._setShm()
+                    if _EFD in e[1:] and self._upEvent is not None:
+                        os.write(self._wf, to_bytes("OK %s %s %s %s" %
+                                                    (_BINARY, _SHM, _EFD,
+                                                     self._shmPath)))
+                    else:
+                        self._closeEvents()
+                        os.write(self._wf, to_bytes("OK %s %s %s" %
+                                                    (_BINARY, _SHM,
+                                                     self._shmPath)))
+                elif _BINARY in e[1:]:
+                    self._setBinary()
+                    self._closeEvents()
+                    os.write(self._wf, to_bytes("OK " + _BINARY))
+                else:
+                    self._closeEvents()
+                    os.write(self._wf, b"OK")
                 break
             else:
                 raise CosimulationError("Unexpected cosim input")
 
+    def _setBinary(self):
+        self._binary = True
+        self._fromWords = [(n + 31) // 32 for n in self._fromSizes]
+        self._fromMasks = [(1 << n) - 1 for n in self._fromSizes]
+        self._toWords = [(n + 31) // 32 for n in self._toSizes]
+        self._toMasks = [(1 << n) - 1 for n in self._toSizes]
+
+    def _setShm(self):
+        layout = _shmLayout(self._toSizes, self._fromSizes)
+        self._up, self._upSlots, self._down, self._downSlots, size = layout
+        shmdir = '/dev/shm' if os.path.isdir('/dev/shm') else None
+        fd, self._shmPath = tempfile.mkstemp(prefix='myhdl', suffix='.shm',
+                                             dir=shmdir)
+        try:
+            os.write(fd, b'\0' * size)
+            self._shm = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+        self._upSeq = 0
+        self._downSeq = 0
+
+    def _closeEvents(self):
+        for fd in (self._upEvent, self._downEvent):
+            if fd is not None:
+                os.close(fd)
+        self._upEvent = self._downEvent = None
+
+    def _close(self):
+        if self._shm is not None:
+            self._shm.close()
+            self._shm = None
+        if self._shmPath is not None:
+            os.remove(self._shmPath)
+            self._shmPath = None
+        self._closeEvents()
+
+    def _wait(self, last):
+        # wait for a new frame from the HDL side: poll its sequence
+        # number, then sleep until it rings
+        shm = self._shm
+        for i in range(_SPIN):
+            seq, = _SEQ.unpack_from(shm, _UPSEQ)
+            if seq != last:
+                return seq
+        if self._upEvent is not None:
+            # the HDL side rings the eventfd after every frame, so no
+            # wake up is lost; the pipe only tells that it ended
+            while 1:
+                seq, = _SEQ.unpack_from(shm, _UPSEQ)
+                if seq != last:
+                    return seq
+                ready = select.select([self._upEvent, self._rt], [], [])[0]
+                if self._rt in ready and not os.read(self._rt, _MAXLINE):
+                    self.dump_output()
+                    raise CosimulationError(_error.SimulationEnd)
+                if self._upEvent in ready:
+                    os.eventfd_read(self._upEvent)
+        # on the pipe, the HDL side only rings when the flag is set. The
+        # timeout covers a wake up that is lost between the flag and the
+        # poll.
+        while 1:
+            _SEQ.pack_into(shm, _MYHDLWAIT, 1)
+            seq, = _SEQ.unpack_from(shm, _UPSEQ)
+            if seq != last:
+                break
+            if select.select([self._rt], [], [], 0.001)[0]:
+                if not os.read(self._rt, _MAXLINE):
+                    self.dump_output()
+                    raise CosimulationError(_error.SimulationEnd)
+        _SEQ.pack_into(shm, _MYHDLWAIT, 0)
+        return seq
+
+    def _read(self, n):
+        chunks = []
+        while n:
+            buf = os.read(self._rt, n)
+            if not buf:
+                self.dump_output()
+                raise CosimulationError(_error.SimulationEnd)
+            chunks.append(buf)
+            n -= len(buf)
+        return b''.join(chunks)
+
+    def _setNext(self, s, name, next):
+        try:
+            s.next = next
+        except:
+            # Be a little tolerant with integers:
+            if isinstance(s._val, EnumItemType):
+                tmp = deepcopy(s)
+                tmp._fromInt(next)
+                s._val = tmp
+            else:
+                raise ValueError("Can not assign .next of `%s`, not a supported signal type?" % name)
+
     def _get(self):
         if not self._getMode:
             return
+        if self._binary:
+            self._getBinary()
+            return
         buf = to_str(os.read(self._rt, _MAXLINE))
         if not buf:
             self.dump_output()
@@ -168,44 +431,168 @@ class CosimulationPipe:
                             next |= (-1 << s._nrbits)
                 except ValueError:
                     next = intbv(0)
-            try:
-                s.next = next
-            except:
-                # Be a little tolerant with integers:
-                if isinstance(s._val, EnumItemType):
-                    tmp = deepcopy(s)
-                    tmp._fromInt(next)
-                    s._val = tmp
-                else:
-                    raise ValueError("Can not assign .next of `%s`, not a supported signal type?" % e[i])
+            self._setNext(s, e[i], next)
+
+        self._getMode = 0
+
+    def _setToSig(self, i, a, b):
+        # set a signal from the aval and bval words of a vpi value
+        s = self._toSigs[i]
+        mask = self._toMasks[i]
+        a = int(hexlify(a[::-1]), 16) & mask
+        b = int(hexlify(b[::-1]), 16) & mask
+        if not b:
+            next = a
+            if s._nrbits and s._min is not None and s._min < 0:
+                if next >= (1 << (s._nrbits - 1)):
+                    next |= (-1 << s._nrbits)
+        elif b == mask and not a:
+            next = None
+        elif b == mask and a == mask:
+            next = s._init
+        else:
+            next = intbv(0)
+        self._setNext(s, self._toSignames[i], next)
+
+    def _getBinary(self):
+        # time, bitmap of the changed signals, and for each of them
+        # the aval and bval words of the vpi vector value
+        if self._shm is not None:
+            self._getShm()
+            return
+        n, = _LENGTH.unpack(self._read(_LENGTH.size))
+        data = self._read(n)
+        pos = _TIME.size + (len(self._toSigs) + 7) // 8
+        bitmap = bytearray(data[_TIME.size:pos])
+        for i in range(len(self._toSigs)):
+            if not bitmap[i >> 3] & (1 << (i & 7)):
+                continue
+            m = self._toWords[i] * 4
+            self._setToSig(i, data[pos:pos + m], data[pos + m:pos + 2 * m])
+            pos += 2 * m
+
+        self._getMode = 0
+
+    def _getShm(self):
+        shm = self._shm
+        self._upSeq = self._wait(self._upSeq)
+        if self._shmPath is not None:
+            # the HDL side has mapped it
+            os.remove(self._shmPath)
+            self._shmPath = None
+        pos = self._up + _TIME.size
+        bitmap = bytearray(shm[pos:pos + (len(self._toSigs) + 7) // 8])
+        for i, pos in enumerate(self._upSlots):
+            if not bitmap[i >> 3] & (1 << (i & 7)):
+                continue
+            m = self._toWords[i] * 4
+            self._setToSig(i, shm[pos:pos + m], shm[pos + m:pos + 2 * m])
 
         self._getMode = 0
 
     def _put(self, time):
+        changes = None
+        if self._hasChange:
+            changes = self._changes()
+        if self._skip:
+            if changes is None:
+                # nothing crosses the boundary
+                return
+            if time != self._putTime:
+                # values only take effect in a delta cycle of the HDL
+                # side, so move it to the current time first. _gather
+                # sends the values when it has the reply, so that all
+                # cosimulations make the jump concurrently.
+                self._putTime = time
+                self._deferred = (time, changes)
+                self._send(time, None)
+                return
+        self._send(time, changes)
+
+    def _changes(self):
+        # the values of the signals that changed, all of them for the
+        # text protocol
+        self._hasChange = 0
+        if self._binary:
+            return list(self._changedFromSigs())
+        self._dirty.clear()
+        changes = []
+        for s in self._fromSigs:
+            v = int(s._val)
+            # signed support
+            if s._nrbits and v < 0:
+                v += (1 << s._nrbits)
+            buf = hex(v)[2:]
+            if buf[-1] == 'L':
+                buf = buf[:-1]  # strip trailing L
+            changes.append(buf)
+        return changes
+
+    def _send(self, time, changes):
+        if self._binary:
+            self._putBinary(time, changes)
+            return
         buflist = []
         buf = repr(time)
         if buf[-1] == 'L':
             buf = buf[:-1]  # strip trailing L
         buflist.append(buf)
-        if self._hasChange:
-            self._hasChange = 0
-            for s in self._fromSigs:
-                v = int(s._val)
-                # signed support
-                if s._nrbits and v < 0:
-                    v += (1 << s._nrbits)
-                buf = hex(v)[2:]
-                if buf[-1] == 'L':
-                    buf = buf[:-1]  # strip trailing L
-                buflist.append(buf)
+        if changes is not None:
+            buflist.extend(changes)
         os.write(self._wf, to_bytes(" ".join(buflist)))
         self._getMode = 1
 
+    def _changedFromSigs(self):
+        # the indices and aval words of the signals that changed
+        dirty = sorted(self._dirty)
+        self._dirty.clear()
+        for i in dirty:
+            m = self._fromWords[i] * 4
+            v = int(self._fromSigs[i]._val)
+            yield i, unhexlify('%0*x' % (2 * m, v & self._fromMasks[i]))[::-1]
+
+    def _putBinary(self, time, changes):
+        # time, and if a signal changed, a bitmap of the signals that
+        # changed and their aval words
+        if self._shm is not None:
+            self._putShm(time, changes)
+            return
+        buflist = [_TIME.pack(time)]
+        if changes is not None:
+            bitmap = bytearray((len(self._fromSigs) + 7) // 8)
+            buflist.append(bitmap)
+            for i, v in changes:
+                bitmap[i >> 3] |= 1 << (i & 7)
+                buflist.append(v)
+        data = b''.join(bytes(b) for b in buflist)
+        os.write(self._wf, _LENGTH.pack(len(data)) + data)
+        self._getMode = 1
+
+    def _putShm(self, time, changes):
+        shm = self._shm
+        down = self._down
+        _TIME.pack_into(shm, down, time)
+        flag = 0
+        if changes is not None:
+            flag = 1
+            bitmap = bytearray((len(self._fromSigs) + 7) // 8)
+            for i, v in changes:
+                bitmap[i >> 3] |= 1 << (i & 7)
+                pos = self._downSlots[i]
+                shm[pos:pos + len(v)] = v
+            pos = down + _TIME.size + _SEQ.size
+            shm[pos:pos + len(bitmap)] = bytes(bitmap)
+        _SEQ.pack_into(shm, down + _TIME.size, flag)
+        self._downSeq = (self._downSeq + 1) & 0xFFFFFFFF
+        _SEQ.pack_into(shm, _DOWNSEQ, self._downSeq)
+        if self._downEvent is not None:
+            os.eventfd_write(self._downEvent, 1)
+        elif _SEQ.unpack_from(shm, _HDLWAIT)[0]:
+            os.write(self._wf, b'\0')
+        self._getMode = 1
+
     def _waiter(self):
-        sigs = tuple(self._fromSigs)
-        while 1:
-            yield sigs
-            self._hasChange = 1
+        return _CosimWaiter(self)
 
     def dump_output(self):
         if self.capture:
@@ -0,0 +1,466 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  Copyright (C) 2003-2008 Jan Decaluwe
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+""" Module that provides the PartitionedSimulation class
+
+The instances of a design are divided into partitions, and each
+partition runs in its own worker process. The workers run in
+conservative lockstep: before every update phase they exchange the
+next values of the signals that cross partition boundaries, and they
+only advance time together. The result is therefore delta cycle
+accurate, as with a single Simulation.
+
+The exchange costs a round trip through a pipe per worker and delta
+cycle, so that the partitions should do enough work per delta cycle.
+scripts/benchmark/perf_partitioned.py compares it with a Simulation.
+
+"""
+from __future__ import absolute_import
+from __future__ import print_function
+
+import os
+import sys
+import traceback
+from multiprocessing import Pipe
+from types import GeneratorType
+
+from myhdl import StopSimulation, _SuspendSimulation
+from myhdl import _simulator, SimulationError
+from myhdl._simulator import _signals, _siglist, _futureEvents
+from myhdl._compat import integer_types
+from myhdl._intbv import intbv
+from myhdl._Signal import _Signal, _isListOfSigs
+from myhdl._ShadowSignal import (_ShadowSignal, _TristateSignal,
+                                 _TristateDriver)
+from myhdl._Waiter import _Waiter
+from myhdl._Clock import Clock
+from myhdl._Cosimulation import CosimulationPipe
+from myhdl._instance import _Instantiator
+from myhdl._block import _Block
+from myhdl._Simulation import Simulation, _flatten, _makeWaiters
+from myhdl._util import _printExcInfo
+from myhdl import _util
+
+
+class _error:
+    pass
+_error.NrOfPartitions = "At least two partitions are required"
+_error.Cosim = "Cosimulation is not supported in a partitioned simulation"
+_error.Tracing = "Signal tracing is not supported in a partitioned simulation"
+_error.BoundaryType = "Boundary signal should be a bool, int or intbv signal"
+_error.Tristate = "Tristate signal cannot cross a partition boundary"
+_error.Worker = "Error in partition worker"
+_error.Finished = "Simulation has already finished"
+_error.MultipleSim = "Only a single Simulation instance is allowed"
+_error.Fork = "Partitioned simulation requires os.fork()"
+
+
+def _instanceSignals(arglist):
+    """ Return a dict of the signals that instances refer to, by id
+
+    A shadow signal is computed in each partition that refers to it,
+    so such a partition also refers to the signals that it derives from.
+    """
+    sigs = {}
+
+    def add(v):
+        if isinstance(v, _Signal):
+            if id(v) in sigs:
+                return
+            sigs[id(v)] = v
+            if isinstance(v, (_ShadowSignal, _TristateDriver)):
+                add(getattr(v, '_sig', None))
+                for arg in getattr(v, '_args', ()):
+                    add(arg)
+        elif _isListOfSigs(v):
+            for s in v:
+                add(s)
+
+    for arg in arglist:
+        if isinstance(arg, _Instantiator):
+            for v in arg.sigdict.values():
+                add(v)
+            for v in arg.losdict.values():
+                add(v)
+        elif isinstance(arg, Clock):
+            add(arg.sig)
+        else:
+            if isinstance(arg, _Waiter):
+                arg = arg.generator
+            if isinstance(arg, GeneratorType) and arg.gi_frame is not None:
+                for v in arg.gi_frame.f_locals.values():
+                    add(v)
+    return sigs
+
+
+def _weight(arg):
+    """ Number of leaf instances in an instance """
+    if isinstance(arg, _Block):
+        return sum(_weight(sub) for sub in arg.subs)
+    return 1
+
+
+def _autoPartition(args, n):
+    """ Cut a design into n partitions along its block hierarchy
+
+    Blocks that are too large for a single partition are replaced by
+    their subblocks. The resulting blocks are then distributed greedily,
+    largest first, over the partitions. Other instances, such as
+    testbench processes, go to the first partition.
+    """
+    units = list(args)
+    total = sum(_weight(u) for u in units)
+    while 1:
+        blocks = [u for u in units if isinstance(u, _Block)]
+        if not blocks:
+            break
+        big = max(blocks, key=_weight)
+        if _weight(big) * n <= total:
+            break
+        units.remove(big)
+        units.extend(big.subs)
+    partitions = [[] for i in range(n)]
+    weights = [0] * n
+    blocks = []
+    for unit in units:
+        if isinstance(unit, _Block):
+            blocks.append(unit)
+        else:
+            partitions[0].append(unit)
+            weights[0] += 1
+    blocks.sort(key=_weight, reverse=True)
+    for b in blocks:
+        i = weights.index(min(weights))
+        partitions[i].append(b)
+        weights[i] += _weight(b)
+    return [p for p in partitions if p]
+
+
+def _encode(sig, val=None):
+    """ Return the next value of a signal, or val, in a picklable form """
+    if val is None:
+        val = sig._next
+    if isinstance(val, intbv):
+        return val._val
+    return val
+
+
+def _pendingBoundary(boundary):
+    """ Return the boundary signals with a pending update """
+    return [(boundary[id(s)], _encode(s)) for s in _siglist if id(s) in boundary]
+
+
+class _Worker(object):
+
+    """ State of a partition in its worker process """
+
+    def __init__(self, conn, waiters, clocks, boundary, boundarySigs, own):
+        self.conn = conn
+        self.waiters = waiters
+        self.clocks = clocks
+        self.boundary = boundary
+        self.boundarySigs = boundarySigs
+        # the signals of the partition, with their index in the parent
+        self.own = own
+        self.actives = {}
+        self.exc = []
+
+    def run(self):
+        for clock in self.clocks:
+            clock._start()
+        conn = self.conn
+        while 1:
+            try:
+                cmd, arg = conn.recv()
+            except EOFError:
+                return
+            if cmd == 'quit':
+                return
+            try:
+                if cmd == 'delta':
+                    reply = self.delta(arg)
+                elif cmd == 'sync':
+                    reply = ('ok', [(i, _encode(s, s._val))
+                                    for i, s in self.own])
+                else:
+                    reply = self.advance(arg)
+            except StopSimulation as e:
+                reply = ('stop', str(e))
+            except Exception:
+                reply = ('error', traceback.format_exc())
+            conn.send(reply)
+
+    def _nextTime(self):
+        if _futureEvents:
+            return _futureEvents.nextTime()
+        return None
+
+    def delta(self, incoming):
+        """ Run an update phase and a waiter phase """
+        waiters = self.waiters
+        actives = self.actives
+        exc = self.exc
+        _extend = waiters.extend
+        _pop = waiters.pop
+        sigs = self.boundarySigs
+        for i, v in incoming:
+            s = sigs[i]
+            s._setNextVal(v)
+            if not s._pending:
+                s._pending = True
+                _siglist.append(s)
+        if _siglist:
+            _simulator._nrScheduled += len(_siglist)
+            for s in _siglist:
+                s._pending = False
+                _extend(s._update())
+            del _siglist[:]
+        while waiters:
+            waiter = _pop()
+            try:
+                waiter.next(waiters, actives, exc)
+            except StopIteration:
+                continue
+        _simulator._delta += 1
+        if not _siglist:
+            if actives:
+                for wl in actives.values():
+                    wl.purge()
+                self.actives = {}
+            if exc:
+                raise exc.pop(0)
+        return ('ok', _pendingBoundary(self.boundary), bool(_siglist),
+                self._nextTime())
+
+    def advance(self, t):
+        """ Advance time and collect the events for the new time """
+        _simulator._time = t
+        if _futureEvents and _futureEvents.nextTime() == t:
+            t, events = _futureEvents.pop()
+            for event in events:
+                if isinstance(event, _Waiter):
+                    self.waiters.append(event)
+                else:
+                    self.waiters.extend(event.apply())
+        return ('ok', _pendingBoundary(self.boundary), bool(_siglist),
+                self._nextTime())
+
+
+class PartitionedSimulation(object):
+
+    """ Simulation that runs partitions of a design in parallel processes.
+
+    Methods:
+    run -- run a simulation for some duration
+    quit -- stop the worker processes
+
+    """
+
+    def __init__(self, *partitions, **kwargs):
+        """ Construct a partitioned simulation object.
+
+        *partitions -- list of partitions. Each partition is an instance,
+                       or a nested sequence of instances.
+        nprocs -- if given, cut the design that the arguments make up
+                  automatically into at most nprocs partitions.
+
+        """
+        if not hasattr(os, 'fork'):
+            raise SimulationError(_error.Fork)
+        nprocs = kwargs.pop('nprocs', None)
+        if nprocs is not None:
+            partitions = _autoPartition(_util._flatten(*partitions), nprocs)
+        if len(partitions) < 2:
+            raise SimulationError(_error.NrOfPartitions)
+        if _simulator._tracing:
+            raise SimulationError(_error.Tracing)
+        if Simulation._no_of_instances > 0:
+            raise SimulationError(_error.MultipleSim)
+        _simulator._time = 0
+        _simulator._delta = 0
+        _futureEvents.clear()
+        for s in _siglist:
+            s._pending = False
+        del _siglist[:]
+        _simulator._nrScheduled = _simulator._nrApplied = 0
+
+        arglists = [_flatten(p) for p in partitions]
+        # signals that more than one partition refers to
+        owners = {}
+        allsigs = {}
+        for i, arglist in enumerate(arglists):
+            for arg in arglist:
+                if isinstance(arg, CosimulationPipe):
+                    raise SimulationError(_error.Cosim)
+            sigs = _instanceSignals(arglist)
+            allsigs.update(sigs)
+            for k in sigs:
+                owners.setdefault(k, set()).add(i)
+        order = dict((id(s), i) for i, s in enumerate(_signals))
+        boundarySigs = [allsigs[k] for k in owners if len(owners[k]) > 1]
+        boundarySigs.sort(key=lambda s: order[id(s)])
+        for s in boundarySigs:
+            if isinstance(s, (_TristateSignal, _TristateDriver)):
+                # resolved from the drivers in each partition
+                raise SimulationError(_error.Tristate, repr(s))
+            if s._type not in (bool, integer_types, intbv):
+                raise SimulationError(_error.BoundaryType, repr(s))
+        self.boundarySigs = boundarySigs
+        boundary = dict((id(s), i) for i, s in enumerate(boundarySigs))
+        # the signals whose values are copied back after a run
+        synced = [s for s in allsigs.values()
+                  if s._type in (bool, integer_types, intbv)]
+        synced.sort(key=lambda s: order[id(s)])
+        self._synced = synced
+        index = dict((id(s), i) for i, s in enumerate(synced))
+
+        Simulation._no_of_instances += 1
+        self._finished = False
+        self._time = 0
+        self._conns = []
+        self._pids = []
+        for arglist in arglists:
+            own = [(index[k], s) for k, s in _instanceSignals(arglist).items()
+                   if k in index]
+            waiters, cosims, clocks = _makeWaiters(arglist)
+            parent, child = Pipe()
+            sys.stdout.flush()
+            sys.stderr.flush()
+            pid = os.fork()
+            if pid == 0:
+                status = 0
+                try:
+                    for conn in self._conns:
+                        conn.close()
+                    parent.close()
+                    _Worker(child, waiters, clocks, boundary, boundarySigs,
+                            own).run()
+                except BaseException:
+                    traceback.print_exc()
+                    status = 1
+                finally:
+                    sys.stdout.flush()
+                    sys.stderr.flush()
+                    os._exit(status)
+            child.close()
+            self._conns.append(parent)
+            self._pids.append(pid)
+
+    def _command(self, cmd, arg):
+        # send to all workers first, so that they run concurrently
+        for conn in self._conns:
+            conn.send((cmd, arg))
+        replies = [conn.recv() for conn in self._conns]
+        for reply in replies:
+            if reply[0] == 'error':
+                self._finalize()
+                raise SimulationError(_error.Worker, reply[1])
+        for reply in replies:
+            if reply[0] == 'stop':
+                raise StopSimulation(reply[1])
+        outgoing = []
+        pending = False
+        times = []
+        for status, out, p, t in replies:
+            outgoing.extend(out)
+            pending = pending or p
+            if t is not None:
+                times.append(t)
+        return outgoing, pending, times
+
+    def _sync(self):
+        """ Copy the signal values and the time back from the workers """
+        for conn in self._conns:
+            conn.send(('sync', None))
+        synced = self._synced
+        for conn in self._conns:
+            status, values = conn.recv()
+            for i, v in values:
+                s = synced[i]
+                if isinstance(s._val, intbv):
+                    s._val._val = s._next._val = v
+                else:
+                    s._val = s._next = v
+        _simulator._time = self._time
+
+    def _finalize(self):
+        for conn in self._conns:
+            try:
+                conn.send(('quit', None))
+            except (IOError, OSError):
+                pass
+            conn.close()
+        for pid in self._pids:
+            os.waitpid(pid, 0)
+        self._conns = []
+        self._pids = []
+        for s in _signals:
+            s._clear()
+        Simulation._no_of_instances = 0
+        self._finished = True
+
+    def quit(self):
+        if not self._finished:
+            self._finalize()
+
+    def run(self, duration=None, quiet=0):
+        """ Run the simulation for some duration.
+
+        duration -- specified simulation duration (default: forever)
+        quiet -- don't print StopSimulation messages (default: off)
+
+        When the simulation is suspended, now() and the bool, int and
+        intbv signals reflect the state of the workers. Signals of other
+        types keep their values in the parent process.
+
+        """
+        if self._finished:
+            raise StopSimulation(_error.Finished)
+        maxTime = None
+        if duration:
+            maxTime = self._time + duration
+        incoming = []
+        try:
+            while 1:
+                incoming, pending, times = self._command('delta', incoming)
+                if incoming or pending:
+                    continue
+                if not times:
+                    raise StopSimulation("No more events")
+                t = min(times)
+                if maxTime is not None and t > maxTime:
+                    self._time = maxTime
+                    raise _SuspendSimulation(
+                        "Simulated %s timesteps" % duration)
+                self._time = t
+                incoming, pending, times = self._command('advance', t)
+
+        except _SuspendSimulation:
+            self._sync()
+            if not quiet:
+                _printExcInfo()
+            return 1
+
+        except StopSimulation:
+            _simulator._time = self._time
+            if not quiet:
+                _printExcInfo()
+            self._finalize()
+            return 0
+
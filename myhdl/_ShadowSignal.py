@@ -298,7 +298,9 @@ class _TristateSignal(_ShadowSignal):
                     res = None
                     break
             self._next = res
-            _siglist.append(self)
+            if not self._pending:
+                self._pending = True
+                _siglist.append(self)
 
     def toVerilog(self):
         lines = []
@@ -335,4 +337,6 @@ class _TristateDriver(_Signal):
             # restore original value to cater for intbv handler
             self._next = self._sig._orival
             self._setNextVal(val)
-        _siglist.append(self)
+        if not self._pending:
+            self._pending = True
+            _siglist.append(self)
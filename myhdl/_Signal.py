@@ -37,11 +37,10 @@ from myhdl._simulator import _futureEvents
 from myhdl._simulator import _siglist
 from myhdl._simulator import _signals
 from myhdl._intbv import intbv
-from myhdl._bin import bin
 
 # from myhdl._enum import EnumItemType
 
-_schedule = _futureEvents.append
+_schedule = _futureEvents.schedule
 
 
 def _isListOfSigs(obj):
@@ -104,6 +103,8 @@ def Signal(val=None, delay=None):
         if delay < 0:
             raise TypeError("Signal: delay should be >= 0")
         return _DelayedSignal(val, delay)
+    elif isinstance(val, intvec):
+        return _LaneSignal(val)
     else:
         return _Signal(val)
 
@@ -120,11 +121,12 @@ class _Signal(object):
 
     __slots__ = ('_next', '_val', '_min', '_max', '_type', '_init',
                  '_eventWaiters', '_posedgeWaiters', '_negedgeWaiters',
+                 '_eventFanout', '_posedgeFanout', '_negedgeFanout',
                  '_code', '_tracing', '_nrbits', '_checkVal',
-                 '_setNextVal', '_copyVal2Next', '_printVcd',
+                 '_setNextVal', '_copyVal2Next', '_formatVcd',
                  '_driven', '_read', '_name', '_id', '_source', '_used', '_inList',
                  '_waiter', 'toVHDL', 'toVerilog', '_slicesigs',
-                 '_numeric'
+                 '_numeric', '_pending'
                  )
 
     def __init__(self, val=None):
@@ -146,11 +148,11 @@ class _Signal(object):
         self._inList = False
         self._nrbits = 0
         self._numeric = True
-        self._printVcd = self._printVcdStr
+        self._formatVcd = self._formatVcdStr
         if isinstance(val, bool):
             self._type = bool
             self._setNextVal = self._setNextBool
-            self._printVcd = self._printVcdBit
+            self._formatVcd = self._formatVcdBit
             self._nrbits = 1
         elif isinstance(val, integer_types):
             self._type = integer_types
@@ -162,9 +164,9 @@ class _Signal(object):
             self._nrbits = val._nrbits
             self._setNextVal = self._setNextIntbv
             if self._nrbits:
-                self._printVcd = self._printVcdVec
+                self._formatVcd = self._formatVcdVec
             else:
-                self._printVcd = self._printVcdHex
+                self._formatVcd = self._formatVcdHex
         else:
             self._type = type(val)
             if isinstance(val, EnumItemType):
@@ -176,21 +178,31 @@ class _Signal(object):
         self._eventWaiters = _WaiterList()
         self._posedgeWaiters = _PosedgeWaiterList(self)
         self._negedgeWaiters = _NegedgeWaiterList(self)
+        # static sensitivity: waiters that are registered once
+        self._eventFanout = []
+        self._posedgeFanout = []
+        self._negedgeFanout = []
         self._code = ""
         self._slicesigs = []
         self._tracing = 0
+        # set while the signal is in the list of pending updates
+        self._pending = False
         _signals.append(self)
 
     def _clear(self):
         del self._eventWaiters[:]
         del self._posedgeWaiters[:]
         del self._negedgeWaiters[:]
+        del self._eventFanout[:]
+        del self._posedgeFanout[:]
+        del self._negedgeFanout[:]
         self._val = deepcopy(self._init)
         self._next = deepcopy(self._init)
         self._name = self._driven = None
         self._read = False # dont clear self._used
         self._inList = False 
         self._numeric = True
+        self._pending = False
         for s in self._slicesigs:
             s._clear()
 
@@ -199,12 +211,16 @@ class _Signal(object):
         if val != next:
             waiters = self._eventWaiters[:]
             del self._eventWaiters[:]
+            waiters.extend(self._eventFanout)
             if not val and next:
-                waiters.extend(self._posedgeWaiters[:])
+                waiters.extend(self._posedgeWaiters)
                 del self._posedgeWaiters[:]
+                waiters.extend(self._posedgeFanout)
             elif not next and val:
-                waiters.extend(self._negedgeWaiters[:])
+                waiters.extend(self._negedgeWaiters)
                 del self._negedgeWaiters[:]
+                waiters.extend(self._negedgeFanout)
+            sim._nrApplied += 1
             if next is None:
                 self._val = None
             elif isinstance(val, intbv):
@@ -214,7 +230,7 @@ class _Signal(object):
             else:
                 self._val = deepcopy(next)
             if self._tracing:
-                self._printVcd()
+                sim._tracebuf.append(self)
             return waiters
         else:
             return []
@@ -229,7 +245,9 @@ class _Signal(object):
     def next(self):
         #        if self._next is self._val:
         #            self._next = deepcopy(self._val)
-        _siglist.append(self)
+        if not self._pending:
+            self._pending = True
+            _siglist.append(self)
         return self._next
 
     @next.setter
@@ -237,7 +255,9 @@ class _Signal(object):
         if isinstance(val, _Signal):
             val = val._val
         self._setNextVal(val)
-        _siglist.append(self)
+        if not self._pending:
+            self._pending = True
+            _siglist.append(self)
 
     # support for the 'posedge' attribute
     @property
@@ -320,27 +340,27 @@ class _Signal(object):
             raise TypeError("Expected %s, got %s" % (self._type, type(val)))
         self._next = deepcopy(val)
 
-    # vcd print methods
-    def _printVcdStr(self):
-        print("s%s %s" % (str(self._val), self._code), file=sim._tf)
+    # vcd format methods
+    def _formatVcdStr(self):
+        return "s%s %s" % (str(self._val), self._code)
 
-    def _printVcdHex(self):
+    def _formatVcdHex(self):
         if self._val is None:
-            print("sz %s" % self._code, file=sim._tf)
-        else:
-            print("s%s %s" % (hex(self._val), self._code), file=sim._tf)
+            return "sz %s" % self._code
+        return "s%s %s" % (hex(self._val), self._code)
 
-    def _printVcdBit(self):
+    def _formatVcdBit(self):
         if self._val is None:
-            print("z%s" % self._code, file=sim._tf)
-        else:
-            print("%d%s" % (self._val, self._code), file=sim._tf)
+            return "z%s" % self._code
+        return "%d%s" % (self._val, self._code)
 
-    def _printVcdVec(self):
+    def _formatVcdVec(self):
+        n = self._nrbits
         if self._val is None:
-            print("b%s %s" % ('z' * self._nrbits, self._code), file=sim._tf)
-        else:
-            print("b%s %s" % (bin(self._val, self._nrbits), self._code), file=sim._tf)
+            return "b%s %s" % ('z' * n, self._code)
+        # two's complement of the value, as bin(val, n) would
+        return "b%s %s" % (format(int(self._val) & ((1 << n) - 1), '0%db' % n),
+                           self._code)
 
     ### use call interface for shadow signals ###
     def __call__(self, left, right=None):
@@ -604,7 +624,7 @@ class _DelayedSignal(_Signal):
             self._timeStamp = sim._time
         self._nextZ = self._next
         t = sim._time + self._delay
-        _schedule((t, _SignalWrap(self, self._next, self._timeStamp)))
+        _schedule(t, _SignalWrap(self, self._next, self._timeStamp))
         return []
 
     def _apply(self, next, timeStamp):
@@ -612,15 +632,19 @@ class _DelayedSignal(_Signal):
         if timeStamp == self._timeStamp and val != next:
             waiters = self._eventWaiters[:]
             del self._eventWaiters[:]
+            waiters.extend(self._eventFanout)
             if not val and next:
-                waiters.extend(self._posedgeWaiters[:])
+                waiters.extend(self._posedgeWaiters)
                 del self._posedgeWaiters[:]
+                waiters.extend(self._posedgeFanout)
             elif not next and val:
-                waiters.extend(self._negedgeWaiters[:])
+                waiters.extend(self._negedgeWaiters)
                 del self._negedgeWaiters[:]
+                waiters.extend(self._negedgeFanout)
+            sim._nrApplied += 1
             self._val = copy(next)
             if self._tracing:
-                self._printVcd()
+                sim._tracebuf.append(self)
             return waiters
         else:
             return []
@@ -653,3 +677,4 @@ SignalType = _Signal
 from myhdl._ShadowSignal import _SliceSignal
 from myhdl._Waiter import _SignalWaiter
 from myhdl._enum import EnumItemType
+from myhdl._intvec import intvec, _LaneSignal
@@ -22,21 +22,31 @@ from __future__ import absolute_import
 from __future__ import print_function
 
 import os
-from operator import itemgetter
+import sys
+import traceback
+from copy import deepcopy
+from itertools import chain
+from multiprocessing import Pipe
 from types import GeneratorType
 
 from myhdl import StopSimulation, _SuspendSimulation
 from myhdl import _simulator, SimulationError
-from myhdl._Cosimulation import CosimulationPipe
-from myhdl._simulator import _signals, _siglist, _futureEvents
+from myhdl._Cosimulation import CosimulationPipe, _gather
+from myhdl._Clock import Clock
+from myhdl._simulator import _signals, _siglist, _futureEvents, _tracebuf, \
+	_sinks, _traceStep, _traceFlush
+from myhdl._Signal import _Signal, _DelayedSignal, _SignalWrap
 from myhdl._Waiter import _Waiter
+from myhdl._delay import delay
 from myhdl._Waiter import _inferWaiter
-from myhdl._Waiter import _SignalTupleWaiter
 from myhdl._util import _printExcInfo
 from myhdl._instance import _Instantiator
+from myhdl._always import _Always
 from myhdl._block import _Block
+from myhdl._intbv import intbv
+from myhdl._traceSink import TraceSink
 
-schedule = _futureEvents.append
+schedule = _futureEvents.schedule
 
 
 class _error:
@@ -46,6 +56,12 @@ class _error:
 _error.ArgType = "Inappriopriate argument type"
 _error.MultipleCosim = "Only a single cosimulator argument allowed"
 _error.DuplicatedArg = "Duplicated argument"
+_error.Finished = "Simulation has already finished"
+_error.Started = "A checkpoint can only be restored before the simulation runs"
+_error.Uncaptured = "Signal state cannot be captured in a checkpoint"
+_error.Fork = "Branching requires os.fork()"
+_error.BranchCosim = "Cosimulations cannot be branched"
+_error.Branch = "Error in simulation branch"
 
 # flatten Block objects out
 
@@ -72,6 +88,10 @@ class Simulation(object):
 
 	Methods:
 	run -- run a simulation for some duration
+	checkpoint -- take a snapshot of the simulation state
+	restore -- start from a snapshot instead of from time 0
+	branch -- continue the simulation in forked child processes
+	capture -- capture signal values into numpy arrays
 
 	"""
 	_no_of_instances = 0
@@ -84,14 +104,33 @@ class Simulation(object):
 
 		"""
 		_simulator._time = 0
+		_simulator._delta = 0
+		self._args = args
 		arglist = _flatten(*args)
-		self._waiters, self._cosims = _makeWaiters(arglist)
+		sinks = [arg for arg in arglist if isinstance(arg, TraceSink)]
+		if sinks:
+			arglist = [arg for arg in arglist if not isinstance(arg, TraceSink)]
+		self._waiters, self._cosims, clocks = _makeWaiters(arglist)
+		self._clocks = clocks
 		if Simulation._no_of_instances > 0:
 			raise SimulationError(_error.MultipleSim)
 		Simulation._no_of_instances += 1
 		self._finished = False
-		del _futureEvents[:]
+		self._started = False
+		_futureEvents.clear()
+		for s in _siglist:
+			s._pending = False
 		del _siglist[:]
+		del _tracebuf[:]
+		_simulator._nrScheduled = _simulator._nrApplied = 0
+		for clock in clocks:
+			clock._start()
+		if _simulator._tracing:
+			_simulator._tf._start()
+		_sinks[:] = sinks
+		for sink in sinks:
+			sink._start()
+		self.captures = []
 		self.timeunit_suffix = ''
 
 	def _finalize(self):
@@ -101,11 +140,16 @@ class Simulation(object):
 				os.close(cosim._rt)
 				os.close(cosim._wf)
 				cosim._child.wait()
+				cosim._close()
 			self._cosims = [] # In case we finalize twice,
 			# like from a StopSimulation event
+		_traceFlush()
 		if _simulator._tracing:
 			_simulator._tracing = 0
 			_simulator._tf.close()
+		for sink in _sinks:
+			sink._stop()
+		del _sinks[:]
 		# clean up for potential new run with same signals
 		for s in _signals:
 			s._clear()
@@ -115,6 +159,236 @@ class Simulation(object):
 	def quit(self):
 		self._finalize()
 
+	@property
+	def scheduledUpdates(self):
+		""" Number of signal updates scheduled by the kernel """
+		return _simulator._nrScheduled
+
+	@property
+	def appliedUpdates(self):
+		""" Number of scheduled signal updates that changed a value """
+		return _simulator._nrApplied
+
+	def checkpoint(self):
+		""" Return a snapshot of the state of the simulation.
+
+		The snapshot holds the simulation time, the signal values, the
+		intbv variables of always processes, and the pending clock
+		edges, delays and delayed signal updates. Take it between runs,
+		e.g. after sim.run(duration) has returned. The signals are found
+		in the blocks, the processes, the local variables of plain
+		generators and the clocks. A signal that has changed, but that
+		is not found there, is an error.
+
+		"""
+		if self._finished:
+			raise SimulationError(_error.Finished)
+		objs = _collect(self._args)
+		keys = dict((id(obj), key) for key, obj in objs.items())
+		for sig in _signals:
+			if id(sig) not in keys and \
+					(sig._val != sig._init or sig._next != sig._init):
+				raise SimulationError(_error.Uncaptured, repr(sig))
+		signals = {}
+		variables = {}
+		gens = {}
+		for key, obj in objs.items():
+			if isinstance(obj, _Signal):
+				state = [deepcopy(obj._val), deepcopy(obj._next)]
+				if isinstance(obj, _DelayedSignal):
+					state += [deepcopy(obj._nextZ), obj._timeStamp]
+				signals[key] = state
+			elif isinstance(obj, _Instantiator):
+				if isinstance(obj, _Always):
+					variables[key] = dict((n, v._val) for n, v in
+										  _procVars(obj).items())
+				gens[id(obj.gen)] = key
+		events = []
+		for t in sorted(_futureEvents._times):
+			for event in _futureEvents._buckets[t]:
+				if isinstance(event, Clock):
+					if id(event) in keys:
+						events.append((t, keys[id(event)], None))
+				elif isinstance(event, _SignalWrap):
+					if id(event.sig) in keys:
+						events.append((t, keys[id(event.sig)],
+									   (deepcopy(event.next), event.timeStamp)))
+				elif isinstance(event, _Waiter):
+					gen = getattr(event, 'generator', None)
+					if id(gen) in gens:
+						events.append((t, gens[id(gen)], None))
+		return _Checkpoint(_simulator._time, signals, variables, events)
+
+	def restore(self, checkpoint):
+		""" Continue from a snapshot taken with checkpoint().
+
+		The snapshot is matched to this simulation by position in the
+		hierarchy of its arguments and by signal name, so it can be
+		restored into a newly elaborated design with new stimulus.
+		Objects without a counterpart in the snapshot keep their
+		initial state, and @instance processes restart from the
+		beginning at the snapshot time. When such a process was waiting
+		for a delay, its first delay ends at the time that the original
+		delay would have ended.
+
+		"""
+		if self._finished:
+			raise SimulationError(_error.Finished)
+		if self._started:
+			raise SimulationError(_error.Started)
+		objs = _collect(self._args)
+		_simulator._time = checkpoint.time
+		for key, state in checkpoint.signals.items():
+			sig = objs.get(key)
+			if not isinstance(sig, _Signal):
+				continue
+			sig._val = deepcopy(state[0])
+			sig._next = deepcopy(state[1])
+			if isinstance(sig, _DelayedSignal) and len(state) == 4:
+				sig._nextZ = deepcopy(state[2])
+				sig._timeStamp = state[3]
+		for key, values in checkpoint.variables.items():
+			inst = objs.get(key)
+			if not isinstance(inst, _Always):
+				continue
+			regs = _procVars(inst)
+			for n, v in values.items():
+				if n in regs:
+					regs[n]._val = v
+		# restart generator based processes, and resume those that
+		# were waiting for a delay at their scheduled time
+		wakeups = {}
+		for t, key, data in checkpoint.events:
+			if isinstance(objs.get(key), _Instantiator):
+				wakeups[key] = t
+		waiters = self._waiters
+		resumed = {}
+		for key, inst in objs.items():
+			if not isinstance(inst, _Instantiator):
+				continue
+			for i, w in enumerate(waiters):
+				if getattr(w, 'generator', None) is inst.gen:
+					break
+			else:
+				continue
+			inst.gen = inst.genfunc()
+			if key in wakeups and isinstance(inst, _Always):
+				next(inst.gen)
+				resumed[key] = inst._waiter()(inst.gen)
+				del waiters[i]
+			elif key in wakeups:
+				waiters[i] = _ResumeWaiter(inst.gen, wakeups[key])
+			else:
+				waiters[i] = inst.waiter
+		_futureEvents.clear()
+		started = set()
+		for t, key, data in checkpoint.events:
+			obj = objs.get(key)
+			if key in resumed:
+				schedule(t, resumed.pop(key))
+			elif isinstance(obj, Clock) and obj in self._clocks:
+				schedule(t, obj)
+				started.add(id(obj))
+			elif isinstance(obj, _DelayedSignal) and data is not None:
+				schedule(t, _SignalWrap(obj, deepcopy(data[0]), data[1]))
+		for clock in self._clocks:
+			if id(clock) not in started:
+				clock._start()
+
+	def branch(self, n, fn):
+		""" Continue the simulation in n forked child processes.
+
+		n -- the number of branches
+		fn -- called as fn(i) in branch i; it can drive signals and run
+			  the simulation further, and its return value is sent back
+
+		Each child starts from the current in-memory state, including
+		live generators, while the state of the parent is left as is.
+		When tracing, branch i continues a copy of the trace file with
+		_branch<i> added to its name. Return the list of results.
+
+		"""
+		if not hasattr(os, 'fork'):
+			raise SimulationError(_error.Fork)
+		if self._finished:
+			raise SimulationError(_error.Finished)
+		if self._cosims:
+			raise SimulationError(_error.BranchCosim)
+		tracefile = None
+		if _simulator._tracing:
+			tracefile = _simulator._tf
+		_traceFlush()
+		sys.stdout.flush()
+		sys.stderr.flush()
+		conns = []
+		pids = []
+		for i in range(n):
+			parent, child = Pipe()
+			pid = os.fork()
+			if pid == 0:
+				status = 0
+				try:
+					for conn in conns:
+						conn.close()
+					parent.close()
+					if tracefile is not None:
+						tracefile._fork(_branchPath(tracefile.name, i))
+					try:
+						reply = ('ok', fn(i))
+					except BaseException:
+						reply = ('error', traceback.format_exc())
+					_traceFlush()
+					if _simulator._tracing:
+						_simulator._tf.close()
+					child.send(reply)
+				except BaseException:
+					traceback.print_exc()
+					status = 1
+				finally:
+					sys.stdout.flush()
+					sys.stderr.flush()
+					os._exit(status)
+			child.close()
+			conns.append(parent)
+			pids.append(pid)
+		replies = []
+		for conn in conns:
+			try:
+				replies.append(conn.recv())
+			except EOFError:
+				replies.append(('error', "branch exited without a result"))
+			conn.close()
+		for pid in pids:
+			os.waitpid(pid, 0)
+		results = []
+		for i, (status, result) in enumerate(replies):
+			if status == 'error':
+				raise SimulationError(_error.Branch, "branch %d\n%s" % (i, result))
+			results.append(result)
+		return results
+
+	def capture(self, signals, mode='changes', clock=None, path=None):
+		""" Capture the values of signals into numpy arrays.
+
+		signals -- a dict of signals by name, or a list of signals
+		mode -- 'changes' records each value change with its time,
+				'sampled' records all values at each clock edge
+		clock -- the clock signal or edge of a sampled capture
+		path -- if given, a directory to keep the arrays in, as files
+
+		Return the capture object. After run(), capture[name] returns
+		the times and the values of a signal as arrays.
+
+		"""
+		from myhdl._capture import _Capture
+		if self._finished:
+			raise SimulationError(_error.Finished)
+		capture = _Capture(signals, mode, clock, path)
+		_sinks.append(capture)
+		capture._start()
+		self.captures.append(capture)
+		return capture
+
 	def run(self, duration=None, quiet=0):
 		""" Run the simulation for some duration.
 
@@ -127,18 +401,22 @@ class Simulation(object):
 		# From this point it will propagate to the caller, that can catch it.
 		if self._finished:
 			raise StopSimulation("Simulation has already finished")
+		self._started = True
 		waiters = self._waiters
 		maxTime = None
 		if duration:
 			stop = _Waiter(None)
 			stop.hasRun = 1
 			maxTime = _simulator._time + duration
-			schedule((maxTime, stop))
+			schedule(maxTime, stop)
 		cosims = self._cosims
 		t = _simulator._time
 		actives = {}
-		tracing = _simulator._tracing
-		tracefile = _simulator._tf
+		tracing = _simulator._tracing or bool(_sinks)
+		tracefile = None
+		if _simulator._tracing:
+			tracefile = _simulator._tf
+			tracefile.timeunit_suffix = self.timeunit_suffix
 		exc = []
 		_pop = waiters.pop
 		_append = waiters.append
@@ -147,9 +425,12 @@ class Simulation(object):
 		while 1:
 			try:
 
-				for s in _siglist:
-					_extend(s._update())
-				del _siglist[:]
+				if _siglist:
+					_simulator._nrScheduled += len(_siglist)
+					for s in _siglist:
+						s._pending = False
+						_extend(s._update())
+					del _siglist[:]
 
 				while waiters:
 					waiter = _pop()
@@ -157,14 +438,14 @@ class Simulation(object):
 						waiter.next(waiters, actives, exc)
 					except StopIteration:
 						continue
+				_simulator._delta += 1
 
 				if cosims:
 					any_cosim_changes = False
 					for cosim in cosims:
 						any_cosim_changes = \
 							any_cosim_changes or cosim._hasChange
-					for cosim in cosims:
-						cosim._get()
+					_gather(cosims)
 					if _siglist or any_cosim_changes:
 						# It should be safe to _put a cosim with no changes
 						# because _put with the same values should be
@@ -190,23 +471,20 @@ class Simulation(object):
 					if t == maxTime:
 						raise _SuspendSimulation(
 							"Simulated %s timesteps" % duration)
-					_futureEvents.sort(key=itemgetter(0))
-					t = _simulator._time = _futureEvents[0][0]
-					if tracing:
-						print("#%s%s" % (t, self.timeunit_suffix), file=tracefile)
+					if tracing and _tracebuf:
+						_traceStep(t)
+					t, events = _futureEvents.pop()
+					_simulator._time = t
+					if tracefile is not None and t >= tracefile.toggleTime:
+						tracefile._toggle(t)
 					if cosims:
 						for cosim in cosims:
 							cosim._put(t)
-					while _futureEvents:
-						newt, event = _futureEvents[0]
-						if newt == t:
-							if isinstance(event, _Waiter):
-								_append(event)
-							else:
-								_extend(event.apply())
-							del _futureEvents[0]
+					for event in events:
+						if isinstance(event, _Waiter):
+							_append(event)
 						else:
-							break
+							_extend(event.apply())
 				else:
 					raise StopSimulation("No more events")
 
@@ -214,7 +492,7 @@ class Simulation(object):
 				if not quiet:
 					_printExcInfo()
 				if tracing:
-					tracefile.flush()
+					_traceFlush()
 				return 1
 
 			except StopSimulation:
@@ -226,7 +504,7 @@ class Simulation(object):
 
 			except Exception as e:
 				if tracing:
-					tracefile.flush()
+					_traceFlush()
 				# if the exception came from a yield, make sure we can resume
 				if exc and e is exc[0]:
 					pass  # don't finalize
@@ -240,6 +518,7 @@ def _makeWaiters(arglist):
 	waiters = []
 	ids = set()
 	cosims = []
+	clocks = []
 	for arg in arglist:
 		if isinstance(arg, GeneratorType):
 			waiters.append(_inferWaiter(arg))
@@ -247,9 +526,11 @@ def _makeWaiters(arglist):
 			waiters.append(arg.waiter)
 		elif isinstance(arg, CosimulationPipe):
 			cosims.append(arg)
-			waiters.append(_SignalTupleWaiter(arg._waiter()))
+			waiters.append(arg._waiter())
 		elif isinstance(arg, _Waiter):
 			waiters.append(arg)
+		elif isinstance(arg, Clock):
+			clocks.append(arg)
 		elif hasattr(arg, 'ignoreSimulation'):
 			pass
 		elif arg == True:
@@ -263,4 +544,116 @@ def _makeWaiters(arglist):
 	for sig in _signals:
 		if hasattr(sig, '_waiter'):
 			waiters.append(sig._waiter)
-	return waiters, cosims
+	return waiters, cosims, clocks
+
+
+def _branchPath(path, i):
+	""" Return the trace file path for simulation branch i """
+	root, ext = os.path.splitext(path)
+	return "%s_branch%d%s" % (root, i, ext)
+
+
+class _Checkpoint(object):
+
+	""" Snapshot of a simulation, see Simulation.checkpoint() """
+
+	__slots__ = ('time', 'signals', 'variables', 'events')
+
+	def __init__(self, time, signals, variables, events):
+		self.time = time
+		self.signals = signals
+		self.variables = variables
+		self.events = events
+
+
+class _ResumeWaiter(_Waiter):
+
+	""" Waiter of a restarted process that was waiting for a delay.
+
+	The first delay of the process ends at the time that the delay
+	of the original process would have ended.
+
+	"""
+
+	__slots__ = ('wakeup',)
+
+	def __init__(self, generator, wakeup):
+		_Waiter.__init__(self, generator)
+		self.wakeup = wakeup
+
+	def next(self, waiters, actives, exc):
+		if self.wakeup is None:
+			return _Waiter.next(self, waiters, actives, exc)
+		gen = self.generator
+		clause = next(gen)
+		if isinstance(clause, delay):
+			clause = delay(max(self.wakeup - _simulator._time, 0))
+		self.wakeup = None
+		# let the base class handle the clause, then continue with the
+		# generator itself
+		self.generator = chain([clause], gen)
+		try:
+			_Waiter.next(self, waiters, actives, exc)
+		finally:
+			self.generator = gen
+
+
+def _collectSigs(names, path, objs):
+	for n, obj in names.items():
+		if isinstance(obj, _Signal):
+			objs[path + n] = obj
+		elif isinstance(obj, (list, tuple)):
+			for i, s in enumerate(obj):
+				if isinstance(s, _Signal):
+					objs['%s%s[%d]' % (path, n, i)] = s
+
+
+def _collect(arg, path='', objs=None):
+	""" Map the signals, processes and clocks below arg to keys.
+
+	A key is the path of indices in the nested arguments and block
+	subs, followed by the signal name for signals. Block names are
+	not used as they differ between elaborations. The signals of
+	processes and plain generators are found by their names in the
+	process and the generator frame.
+
+	"""
+	if objs is None:
+		objs = {}
+	if isinstance(arg, _Block):
+		for n, s in arg.sigdict.items():
+			objs[path + n] = s
+		for n, m in arg.memdict.items():
+			for i, s in enumerate(m.mem):
+				objs['%s%s[%d]' % (path, n, i)] = s
+		arg = arg.subs
+	if isinstance(arg, (list, tuple)):
+		for i, item in enumerate(arg):
+			_collect(item, '%s%d.' % (path, i), objs)
+	elif isinstance(arg, _Instantiator):
+		objs[path] = arg
+		_collectSigs(arg.sigdict, path, objs)
+		_collectSigs(arg.losdict, path, objs)
+	elif isinstance(arg, Clock):
+		objs[path] = arg
+		objs[path + 'sig'] = arg.sig
+	elif isinstance(arg, GeneratorType) and arg.gi_frame is not None:
+		_collectSigs(arg.gi_frame.f_locals, path, objs)
+	return objs
+
+
+def _procVars(inst):
+	""" Return the intbv variables of an always process by name """
+	regs = {}
+	func = inst.func
+	if func.__closure__:
+		for n, cell in zip(func.__code__.co_freevars, func.__closure__):
+			try:
+				v = cell.cell_contents
+			except ValueError:
+				continue
+			if isinstance(v, intbv):
+				regs[n] = v
+	for n, reg, init in getattr(inst, 'varregs', ()):
+		regs[n] = reg
+	return regs
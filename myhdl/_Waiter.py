@@ -24,18 +24,18 @@ from __future__ import absolute_import
 from types import GeneratorType
 
 import ast
-import inspect
 
 
-from myhdl._util import _dedent
+from myhdl._util import _getAST
 from myhdl._delay import delay
 from myhdl._join import join
 from myhdl._Signal import _Signal, _WaiterList, posedge, negedge
+from myhdl._Signal import _PosedgeWaiterList, _NegedgeWaiterList
 from myhdl import _simulator
 from myhdl._simulator import _futureEvents
 
 
-schedule = _futureEvents.append
+schedule = _futureEvents.schedule
 
 
 class _Waiter(object):
@@ -98,7 +98,7 @@ class _Waiter(object):
                     actives[id(wl)] = wl
             elif isinstance(clause, delay):
                 t = _simulator._time
-                schedule((t + clause._time, clone))
+                schedule(t + clause._time, clone)
             elif isinstance(clause, GeneratorType):
                 waiters.append(_Waiter(clause, clone))
             elif isinstance(clause, _Instantiator):
@@ -125,7 +125,7 @@ class _DelayWaiter(_Waiter):
 
     def next(self, waiters, actives, exc):
         clause = next(self.generator)
-        schedule((_simulator._time + clause._time, self))
+        schedule(_simulator._time + clause._time, self)
 
 
 class _EdgeWaiter(_Waiter):
@@ -193,6 +193,76 @@ class _SignalTupleWaiter(_Waiter):
             actives[id(wl)] = wl
 
 
+def _fanout(trigger):
+    """ Return the static fan-out list of a trigger object """
+    if isinstance(trigger, _Signal):
+        return trigger._eventFanout
+    elif isinstance(trigger, _PosedgeWaiterList):
+        return trigger.sig._posedgeFanout
+    elif isinstance(trigger, _NegedgeWaiterList):
+        return trigger.sig._negedgeFanout
+    raise TypeError("static trigger %s has type %s" %
+                    (repr(trigger), type(trigger)))
+
+
+class _StaticWaiter(_Waiter):
+
+    """ Waiter for a process with a static sensitivity list.
+
+    The process is a plain callable that is invoked directly when the
+    waiter is triggered. Instead of registering itself again on every
+    run, the waiter is added once to the fan-out lists of its triggers,
+    and signal updates return it from there.
+    """
+
+    __slots__ = ('func', 'hasRun', 'triggers', 'registered', 'runFirst')
+
+    def __init__(self, func, triggers, runFirst=False):
+        self.func = func
+        self.hasRun = 0
+        self.triggers = triggers
+        self.registered = 0
+        self.runFirst = runFirst
+
+    def _register(self):
+        self.registered = 1
+        for trigger in self.triggers:
+            _fanout(trigger).append(self)
+        if self.runFirst:
+            self.func()
+
+    def next(self, waiters, actives, exc):
+        if self.registered:
+            self.func()
+        else:
+            self._register()
+
+
+class _StaticTupleWaiter(_StaticWaiter):
+
+    """ Static waiter with several triggers.
+
+    Several triggers may fire in the same delta cycle; the waiter only
+    runs for the first one.
+    """
+
+    __slots__ = ('delta', )
+
+    def __init__(self, func, triggers, runFirst=False):
+        _StaticWaiter.__init__(self, func, triggers, runFirst)
+        self.delta = -1
+
+    def next(self, waiters, actives, exc):
+        delta = _simulator._delta
+        if self.delta == delta:
+            raise StopIteration
+        self.delta = delta
+        if self.registered:
+            self.func()
+        else:
+            self._register()
+
+
 #_kind = enum("SIGNAL_TUPLE", "EDGE_TUPLE", "SIGNAL", "EDGE", "DELAY", "UNDEFINED")
 class _kind(object):
     SIGNAL_TUPLE = 1
@@ -205,9 +275,7 @@ class _kind(object):
 
 def _inferWaiter(gen):
     f = gen.gi_frame
-    s = inspect.getsource(f)
-    s = _dedent(s)
-    root = ast.parse(s)
+    root = _getAST(f.f_code)
     root.symdict = f.f_globals.copy()
     root.symdict.update(f.f_locals)
     # print ast.dump(root)
@@ -33,6 +33,8 @@ negedge -- callable to model a falling edge on a signal in a yield statement
 join -- callable to join clauses in a yield statement
 intbv -- mutable integer class with bit vector facilities
 modbv -- modular bit vector class
+intvec -- vector of integers, one per lane of a lane-parallel simulation
+modvec -- vector of modular bit vectors, one per simulation lane
 downrange -- function that returns a downward range
 bin -- returns a binary string representation.
        The optional width specifies the desired string
@@ -46,6 +48,8 @@ always_seq --
 ResetSignal --
 enum -- function that returns an enumeration type
 traceSignals -- function that enables signal tracing in a VCD file
+WaveFile -- reader of traces in the compressed binary wave format
+TraceSink -- receiver of signal value changes during simulation
 toVerilog -- function that converts a design to Verilog
 
 """
@@ -151,13 +155,16 @@ from ._intbv import intbv
 from ._modbv import modbv
 from ._join import join
 from ._Signal import posedge, negedge, Signal, SignalType
+from ._intvec import intvec, modvec, laneselect
 from ._ShadowSignal import ConcatSignal
 from ._ShadowSignal import TristateSignal
 # from ._bulksignal import BulkSignalBase
 from ._simulator import now
 from ._delay import delay
 from ._Cosimulation import Cosimulation, CosimulationPipe
+from ._Clock import Clock
 from ._Simulation import Simulation
+from ._PartitionedSimulation import PartitionedSimulation
 from ._misc import instances, downrange
 from ._always_comb import always_comb
 from ._always_seq import always_seq, ResetSignal
@@ -167,6 +174,8 @@ from ._block import block
 from ._blackbox import blackbox, synthesis, inference, GeneratorClass
 from ._enum import enum, EnumType, EnumItemType
 from ._traceSignals import traceSignals
+from ._wave import WaveFile
+from ._traceSink import TraceSink
 
 from myhdl import conversion
 from .conversion import toVerilog
@@ -179,6 +188,9 @@ __all__ = ["bin",
            "concat",
            "intbv",
            "modbv",
+           "intvec",
+           "modvec",
+           "laneselect",
            "join",
            "posedge",
            "negedge",
@@ -192,7 +204,9 @@ __all__ = ["bin",
            "StopSimulation",
            "Cosimulation",
            "CosimulationPipe",
+           "Clock",
            "Simulation",
+           "PartitionedSimulation",
            "instances",
            "instance",
            "block",
@@ -208,6 +222,8 @@ __all__ = ["bin",
            "EnumType",
            "EnumItemType",
            "traceSignals",
+           "WaveFile",
+           "TraceSink",
            "toVerilog",
            "toVHDL",
            "conversion",
@@ -31,7 +31,8 @@ from myhdl._delay import delay
 from myhdl._Signal import _Signal
 from myhdl._Signal import _WaiterList
 from myhdl._Waiter import _Waiter, _SignalWaiter, _SignalTupleWaiter, \
-	_DelayWaiter, _EdgeWaiter, _EdgeTupleWaiter
+	_DelayWaiter, _EdgeWaiter, _EdgeTupleWaiter, \
+	_StaticWaiter, _StaticTupleWaiter
 from myhdl._instance import _Instantiator, _getCallInfo
 
 
@@ -110,6 +111,8 @@ class _Always(_Instantiator):
 
 	def __init__(self, func, senslist, callinfo, sigdict=None):
 		self.func = func
+		# the function that the simulator runs, see config_sim(compiled=True)
+		self.simfunc = func
 		self.senslist = tuple(senslist)
 		super(_Always, self).__init__(self.genfunc, callinfo=callinfo)
 		# update sigdict with decorator signal arguments
@@ -120,6 +123,27 @@ class _Always(_Instantiator):
 	def funcobj(self):
 		return self.func
 
+	# run the function once at the start of the simulation
+	_runFirst = False
+
+	@property
+	def waiter(self):
+		# a sensitivity list without delays is static: the waiter
+		# registers once instead of after every run, and calls the
+		# function directly instead of resuming a generator
+		for s in self.senslist:
+			if isinstance(s, delay):
+				return self._waiter()(self.gen)
+		if len(self.senslist) == 1:
+			w = _StaticWaiter
+		else:
+			w = _StaticTupleWaiter
+		return w(self._callfunc(), self.senslist, self._runFirst)
+
+	def _callfunc(self):
+		# the callable to run when the sensitivity list triggers
+		return self.simfunc
+
 	def _waiter(self):
 		# infer appropriate waiter class
 		# first infer base type of arguments
@@ -150,7 +174,7 @@ class _Always(_Instantiator):
 		senslist = self.senslist
 		if len(senslist) == 1:
 			senslist = senslist[0]
-		func = self.func
+		func = self.simfunc
 		while 1:
 			yield senslist
 			func()
@@ -53,6 +53,8 @@ def always_comb(func):
 
 class _AlwaysComb(_Always):
 
+    _runFirst = True
+
     def __init__(self, func, callinfo):
         senslist = []
         super(_AlwaysComb, self).__init__(func, senslist, callinfo=callinfo)
@@ -78,7 +80,7 @@ class _AlwaysComb(_Always):
         senslist = self.senslist
         if len(senslist) == 1:
             senslist = senslist[0]
-        func = self.func
+        func = self.simfunc
         while 1:
             func()
             yield senslist
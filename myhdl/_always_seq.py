@@ -132,26 +132,37 @@ class _AlwaysSeq(_Always):
 			_, reg, init = v
 			reg._val = init
 
-	def genfunc_reset(self):
-		senslist = self.senslist
-		if len(senslist) == 1:
-			senslist = senslist[0]
+	def _callfunc(self):
+		if self.reset is None:
+			return self.simfunc
+		reset = self.reset
+		active = reset.active
 		reset_sigs = self.reset_sigs
 		reset_vars = self.reset_vars
-		func = self.func
-		while 1:
-			yield senslist
-			if self.reset == self.reset.active:
+		func = self.simfunc
+
+		def call():
+			if reset._val == active:
 				reset_sigs()
 				reset_vars()
 			else:
 				func()
+		return call
+
+	def genfunc_reset(self):
+		senslist = self.senslist
+		if len(senslist) == 1:
+			senslist = senslist[0]
+		call = self._callfunc()
+		while 1:
+			yield senslist
+			call()
 
 	def genfunc_no_reset(self):
 		senslist = self.senslist
 		assert len(senslist) == 1
 		senslist = senslist[0]
-		func = self.func
+		func = self.simfunc
 		while 1:
 			yield senslist
 			func()
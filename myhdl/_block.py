@@ -21,6 +21,7 @@
 from __future__ import absolute_import, print_function
 
 import inspect
+import sys
 
 #from functools import wraps
 import functools
@@ -29,6 +30,7 @@ import myhdl
 from myhdl._compat import PY2
 from myhdl import BlockError, BlockInstanceError, CosimulationPipe
 from myhdl._instance import _Instantiator
+from myhdl._Clock import Clock
 from myhdl._util import _flatten
 from myhdl._extractHierarchy import (_makeMemInfo,
 									 _UserVerilogCode, _UserVhdlCode,
@@ -52,6 +54,16 @@ class _CallInfo(object):
 		self.localdict = localdict
 
 
+def _isBlockContext(frame):
+	"""Return whether a frame runs in a method of a _Block.
+
+	The locals of the frame are only looked up if it has a 'self'.
+	"""
+	if frame is None or 'self' not in frame.f_code.co_varnames:
+		return False
+	return isinstance(frame.f_locals.get('self'), _Block)
+
+
 def _getCallInfo():
 	"""Get info on the caller of a BlockInstance.
 
@@ -66,30 +78,24 @@ def _getCallInfo():
 
 	"""
 
-	stack = inspect.stack()
+	# sys._getframe avoids building the records of the whole stack,
+	# which reads the source context of every frame
+	frame = sys._getframe(3)
+	name = frame.f_code.co_name
 	# caller may be undefined if instantiation from a Python module
-	callerrec = None
-	funcrec = stack[3]
-	name = funcrec[3]
-	if len(stack) > 4:
-		callerrec = stack[4]
+	caller = frame.f_back
 	# special case for list comprehension's extra scope in PY3
 	if name == '<listcomp>':
-		if not PY2:
-			funcrec = stack[4]
-			if len(stack) > 5:
-				callerrec = stack[5]
+		if not PY2 and caller is not None:
+			frame = caller
+			name = frame.f_code.co_name
+			caller = frame.f_back
 
-	name = funcrec[3]
-	frame = funcrec[0]
+	f_locals = frame.f_locals
 	symdict = dict(frame.f_globals)
-	symdict.update(frame.f_locals)
-	localdict = dict(frame.f_locals)
-	modctxt = False
-	if callerrec is not None:
-		f_locals = callerrec[0].f_locals
-		if 'self' in f_locals:
-			modctxt = isinstance(f_locals['self'], _Block)
+	symdict.update(f_locals)
+	localdict = dict(f_locals)
+	modctxt = _isBlockContext(caller)
 	return _CallInfo(name, modctxt, symdict, localdict)
 
 
@@ -235,11 +241,11 @@ class _Block(object):
 		if hasattr(deco, 'vhdl_instance'):
 			self.vhdl_code = _UserVhdlInstance(deco.vhdl_instance, self.symdict, func.__name__,
 											   func, srcfile, srcline)
-		self._config_sim = {'trace': False}
+		self._config_sim = {'trace': False, 'compiled': False}
 
 	def _verifySubs(self):
 		for inst in self.subs:
-			if not isinstance(inst, (_Block, _Instantiator, CosimulationPipe)):
+			if not isinstance(inst, (_Block, _Instantiator, CosimulationPipe, Clock)):
 				raise BlockError(_error.ArgType % (self.name,))
 			if isinstance(inst, (_Block, _Instantiator)):
 				if not inst.modctxt:
@@ -294,7 +300,7 @@ class _Block(object):
 		for inst in self.subs:
 			# the symdict of a block instance is defined by
 			# the call context of its instantiations
-			if isinstance(inst, CosimulationPipe):
+			if isinstance(inst, (CosimulationPipe, Clock)):
 				continue  # ignore
 			if self.symdict is None:
 				self.symdict = inst.callinfo.symdict
@@ -342,19 +348,42 @@ class _Block(object):
 		""" Clear a number of 'global' attributes.
 		This is a workaround function for cleaning up before converts.
 		"""
+		from myhdl.conversion._profile import _profiler
 		# workaround: elaborate again for the side effect on signal attibutes
-		self.func(*self.args, **self.kwargs)
+		with _profiler.timed('elaborate'):
+			self.func(*self.args, **self.kwargs)
+		self._resetCalls()
+
+	def _resetCalls(self):
 		# reset number of calls in all blocks
 		for b in myhdl._simulator._blocks:
 			b.calls = 0
 
-	def verify_convert(self, auxfiles = ""):
-		self._clear()
-		return myhdl.conversion.verify(self, extra_files = auxfiles)
-
-	def analyze_convert(self):
-		self._clear()
-		return myhdl.conversion.analyze(self)
+	def verify_convert(self, auxfiles = "", profile=False):
+		def verify():
+			self._clear()
+			return myhdl.conversion.verify(self, extra_files = auxfiles)
+		return self._profiled(profile, None, None, '', verify)
+
+	def analyze_convert(self, profile=False):
+		def analyze():
+			self._clear()
+			return myhdl.conversion.analyze(self)
+		return self._profiled(profile, None, None, '', analyze)
+
+	def _profiled(self, profile, hdl, name, directory, call, *args, **kwargs):
+		# call, and report a profile of the conversion if requested
+		if not profile:
+			return call(*args, **kwargs)
+		from myhdl.conversion._profile import _profiler, _writeReport
+		_profiler.start(name or self.func.__name__, hdl)
+		try:
+			result = call(*args, **kwargs)
+		except BaseException:
+			_profiler.stop()
+			raise
+		_writeReport(_profiler.stop(), directory)
+		return result
 
 	def convert(self, hdl='Verilog', context = None, **kwargs):
 		"""Converts this BlockInstance to another HDL
@@ -370,9 +399,29 @@ class _Block(object):
 			testbench (Optional[bool]): Verilog only. Specifies whether a
 				testbench should be created. Defaults to True.
 			timescale(Optional[str]): Verilog only. Defaults to '1ns/10ps'
+			cache (Optional[str]): Verilog and VHDL only. Directory of a
+				conversion cache. When the design and the options are the
+				same as in a cached conversion, its output files are
+				reused instead of converting again.
+			hierarchical (Optional[bool]): Verilog and VHDL only. Whether
+				subblocks are converted to modules of their own, one per
+				distinct block, instead of flattening the design. Defaults
+				to False.
+			jobs (Optional[int]): Verilog and VHDL only. Number of worker
+				processes that render the generators of a module. The
+				output is the same as with 1 job. Defaults to 1.
+			profile (Optional[bool]): Whether to report the time, the
+				number of calls and the peak allocations of the passes of
+				the conversion, and of the blocks. The report is written to
+				<name>_profile.json in the destination folder, and printed
+				as a table. The report includes the elaboration, and the
+				passes of the worker processes are accounted to their
+				blocks. A conversion that is found in the cache only
+				reports the cache passes. Defaults to False.
 		"""
 
-		self._clear()
+		cache = kwargs.pop('cache', None)
+		profile = kwargs.pop('profile', False)
 
 		if hdl.lower() == 'vhdl':
 			converter = myhdl.conversion._toVHDL.toVHDL
@@ -397,12 +446,63 @@ class _Block(object):
 			conv_attrs['timescale'] = kwargs.pop('timescale', '1ns/10ps')
 			conv_attrs['trace'] = kwargs.pop('trace', False)
 		conv_attrs.update(kwargs)
+		return self._profiled(profile, hdl, conv_attrs.get('name'),
+							  conv_attrs['directory'], self._convert,
+							  cache, hdl, converter, conv_attrs)
+
+	def _convert(self, cache, hdl, converter, conv_attrs):
+		if cache is not None and hdl.lower() in ('verilog', 'vhdl'):
+			return self._convertCached(cache, hdl.lower(), converter, conv_attrs)
+		self._clear()
 		for k, v in conv_attrs.items():
 			setattr(converter, k, v)
 		return converter(self)
 
-	def config_sim(self, trace=False, **kwargs) :
+	def _convertCached(self, path, hdl, converter, conv_attrs):
+		from myhdl.conversion._cache import (_ConversionCache, _options,
+											 _outputFiles)
+		from myhdl.conversion._profile import _profiler
+		cache = _ConversionCache(path)
+		options = _options(converter, conv_attrs)
+		with _profiler.timed('cacheKey'):
+			key = cache.key(self, hdl, options)
+		directory = options['directory']
+		with _profiler.timed('cacheLoad'):
+			loaded = cache.load(key, directory)
+		if loaded is not None:
+			# no need to elaborate again, as nothing is converted
+			self._resetCalls()
+			if hdl == 'verilog':
+				self._inferInterface()
+				portmap = {}
+				for n, s in self.argdict.items():
+					# names of interface signals are set by _inferInterface
+					s._name = None
+					if hasattr(s, 'driver'):
+						portmap[n] = s.driver()
+					else:
+						portmap[n] = s
+				converter.portmap = portmap
+			return self
+		self._clear()
+		for k, v in conv_attrs.items():
+			setattr(converter, k, v)
+		# the modules of a hierarchical conversion are cached separately
+		converter.cache = cache
+		top = converter(self)
+		with _profiler.timed('cacheStore'):
+			cache.store(key, directory, _outputFiles(self, hdl, options))
+		return top
+
+	def config_sim(self, trace=False, compiled=False, **kwargs) :
 		self._config_sim['trace'] = trace
+		self._config_sim['compiled'] = compiled
+		if compiled:
+			from myhdl.conversion._toPython import _compileGens
+			_compileGens(self)
+		else:
+			from myhdl.conversion._toPython import _uncompileGens
+			_uncompileGens(self)
 		if trace:
 			for k, v in kwargs.items() :
 				setattr(myhdl.traceSignals, k, v)
@@ -0,0 +1,253 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  Copyright (C) 2003-2008 Jan Decaluwe
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+""" Module with columnar capture of signal values into numpy arrays """
+from __future__ import absolute_import
+
+import os
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from myhdl import _simulator
+from myhdl._intbv import intbv
+from myhdl._Signal import _Signal, _WaiterList
+from myhdl._simulator import _TRACE_SINK
+from myhdl._Waiter import _fanout
+from myhdl._wave import _kind
+
+
+class _error:
+    pass
+
+
+_error.NoNumpy = "capture requires numpy"
+_error.Mode = "capture mode should be 'changes' or 'sampled'"
+_error.Clock = "a sampled capture requires a clock signal or edge"
+_error.ArgType = "capture signals should be a dict or a list of signals"
+_error.Object = "values of this type cannot be stored in a file"
+
+
+class _Store(object):
+
+    """ Growable array, kept in chunks in memory or in a file """
+
+    def __init__(self, dtype, shape, chunk, path):
+        self.dtype = dtype
+        self.shape = shape
+        self._chunk = chunk
+        self._buf = np.empty((chunk,) + shape, dtype)
+        self._n = 0
+        self._chunks = []
+        self._count = 0
+        self._path = path
+        self._f = None
+        if path is not None:
+            self._f = open(path, 'wb')
+
+    def append(self, v):
+        self._buf[self._n] = v
+        self._n += 1
+        if self._n == self._chunk:
+            self._spill()
+
+    def _spill(self):
+        if self._f is not None:
+            self._f.write(self._buf[:self._n].tobytes())
+        elif self._n:
+            self._chunks.append(self._buf[:self._n])
+            self._buf = np.empty((self._chunk,) + self.shape, self.dtype)
+        self._count += self._n
+        self._n = 0
+
+    def flush(self):
+        if self._f is not None and not self._f.closed:
+            self._spill()
+            self._f.flush()
+
+    def close(self):
+        if self._f is not None:
+            self.flush()
+            self._f.close()
+
+    def array(self):
+        if self._path is not None:
+            self.flush()
+            if not self._count:
+                return np.empty((0,) + self.shape, self.dtype)
+            return np.memmap(self._path, self.dtype, 'r',
+                             shape=(self._count,) + self.shape)
+        return np.concatenate(self._chunks + [self._buf[:self._n]])
+
+
+class _Column(object):
+
+    """ Values of a signal, packed according to its type """
+
+    def __init__(self, sig, chunk, path):
+        self.sig = sig
+        v = sig._val
+        kind = _kind(sig)
+        self.words = 0
+        if isinstance(v, bool) and kind == 'i':
+            dtype = np.bool_
+        elif kind == 'i':
+            dtype = np.int64
+        elif kind == 'w' and isinstance(v, intbv) and sig._nrbits:
+            # wide vectors as little endian 64 bit words
+            dtype = np.uint64
+            self.words = (sig._nrbits + 63) // 64
+        else:
+            dtype = object
+            if path is not None:
+                raise TypeError(_error.Object, repr(sig))
+        shape = (self.words,) if self.words else ()
+        self.store = _Store(np.dtype(dtype), shape, chunk, path)
+
+    def append(self):
+        v = self.sig._val
+        if isinstance(v, intbv):
+            v = v._val
+        if self.words:
+            v = [(v >> (64 * i)) & 0xFFFFFFFFFFFFFFFF
+                 for i in range(self.words)]
+        self.store.append(v)
+
+
+class _Sampler(object):
+
+    """ Fanout entry of the clock edge of a sampled capture """
+
+    __slots__ = ('capture',)
+
+    def __init__(self, capture):
+        self.capture = capture
+
+    def next(self, waiters, actives, exc):
+        self.capture._sample()
+
+
+class _Capture(object):
+
+    """ Columnar capture of signal values, see Simulation.capture() """
+
+    def __init__(self, signals, mode='changes', clock=None, path=None,
+                 chunk=65536):
+        if np is None:
+            raise ImportError(_error.NoNumpy)
+        if mode not in ('changes', 'sampled'):
+            raise ValueError(_error.Mode)
+        if isinstance(signals, dict):
+            names = sorted(signals)
+            sigs = [signals[n] for n in names]
+        else:
+            sigs = list(signals)
+            names = [str(i) for i in range(len(sigs))]
+        for s in sigs:
+            if not isinstance(s, _Signal):
+                raise TypeError(_error.ArgType)
+        if mode == 'sampled':
+            if isinstance(clock, _Signal):
+                clock = clock.posedge
+            if not isinstance(clock, _WaiterList):
+                raise TypeError(_error.Clock)
+        if path is not None and not os.path.isdir(path):
+            os.makedirs(path)
+
+        def file(name):
+            if path is None:
+                return None
+            return os.path.join(path, name)
+
+        self.names = names
+        self.mode = mode
+        self.clock = clock
+        self._sigs = sigs
+        self._columns = [_Column(s, chunk, file("%d.values" % i))
+                         for i, s in enumerate(sigs)]
+        if mode == 'changes':
+            self._times = [_Store(np.dtype(np.int64), (), chunk,
+                                  file("%d.times" % i))
+                           for i in range(len(sigs))]
+            self._index = dict((id(s), i) for i, s in enumerate(sigs))
+        else:
+            self._time = _Store(np.dtype(np.int64), (), chunk, file("times"))
+
+    @property
+    def times(self):
+        """ The sample times of a sampled capture """
+        return self._time.array()
+
+    def __getitem__(self, name):
+        """ Return the times and the values of a signal as arrays """
+        i = self.names.index(name)
+        values = self._columns[i].store.array()
+        if self.mode == 'changes':
+            return self._times[i].array(), values
+        return self._time.array(), values
+
+    def _start(self):
+        # called at the start of a simulation
+        if self.mode == 'changes':
+            for s in self._sigs:
+                s._tracing |= _TRACE_SINK
+            self._step(_simulator._time, self._sigs)
+        else:
+            self._sampler = _Sampler(self)
+            _fanout(self.clock).append(self._sampler)
+
+    def _step(self, t, changes):
+        if self.mode != 'changes':
+            return
+        index = self._index
+        columns = self._columns
+        times = self._times
+        for s in changes:
+            i = index.get(id(s))
+            if i is None:
+                continue
+            times[i].append(t)
+            columns[i].append()
+
+    def _sample(self):
+        self._time.append(_simulator._time)
+        for c in self._columns:
+            c.append()
+
+    def _stores(self):
+        stores = [c.store for c in self._columns]
+        if self.mode == 'changes':
+            return stores + self._times
+        return stores + [self._time]
+
+    def _flush(self):
+        for store in self._stores():
+            store.flush()
+
+    def _stop(self):
+        # called at the end of a simulation
+        if self.mode == 'changes':
+            for s in self._sigs:
+                s._tracing &= ~_TRACE_SINK
+        else:
+            _fanout(self.clock).remove(self._sampler)
+        for store in self._stores():
+            store.close()
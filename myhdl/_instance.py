@@ -21,7 +21,7 @@
 from __future__ import absolute_import
 
 
-import inspect
+import sys
 from types import FunctionType
 
 from myhdl import InstanceError
@@ -57,16 +57,11 @@ def _getCallInfo():
     3: the caller of the block function, e.g. the BlockInstance.
     """
     from myhdl import _block
-    funcrec = inspect.stack()[2]
-    name = funcrec[3]
-    frame = funcrec[0]
+    frame = sys._getframe(2)
+    name = frame.f_code.co_name
     symdict = dict(frame.f_globals)
     symdict.update(frame.f_locals)
-    modctxt = False
-    callerrec = inspect.stack()[3]
-    f_locals = callerrec[0].f_locals
-    if 'self' in f_locals:
-        modctxt = isinstance(f_locals['self'], _block._Block)
+    modctxt = _block._isBlockContext(frame.f_back)
     return _CallInfo(name, modctxt, symdict)
 
 
@@ -0,0 +1,564 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  Copyright (C) 2003-2008 Jan Decaluwe
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+""" Module with the intvec and modvec classes for lane-parallel simulation
+
+An intvec holds one integer value per simulation lane, in a NumPy
+array. A signal with an intvec value runs the same design for all
+lanes at once: arithmetic is done lane-wise, and a process that waits
+on the signal fires when the sensitivity triggers in any lane.
+
+"""
+from __future__ import absolute_import, print_function
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from myhdl import _simulator as sim
+from myhdl._compat import integer_types, long, builtins
+from myhdl._bin import bin
+from myhdl._intbv import intbv
+from myhdl._Signal import _Signal
+
+
+class _error:
+    pass
+_error.NoNumpy = "intvec requires the numpy package"
+_error.ArgType = "intvec constructor arg should be int, sequence of ints or intvec"
+_error.Truth = ("intvec truth value is ambiguous, "
+                "use laneselect() to make lane-wise choices")
+_error.Lanes = "Number of lanes mismatch: expected %s, got %s"
+
+
+# lanes hold machine words when all bit operations stay within 64 bits
+_WORDBITS = 62
+
+
+def _v(x):
+    """ Return the plain value of an intvec, intbv or Signal operand """
+    if isinstance(x, _Signal):
+        x = x._val
+    if isinstance(x, (intvec, intbv)):
+        return x._val
+    return x
+
+
+def _dtype(min, max):
+    if -2**_WORDBITS <= min and max <= 2**_WORDBITS:
+        return np.int64
+    return object
+
+
+def _bits(x):
+    """ Return the bit length of the largest magnitude of machine ints in x
+
+    Object arrays hold Python ints, which don't overflow: they count as 0.
+    """
+    a = np.asarray(x)
+    if a.dtype.kind not in 'biu' or not a.size:
+        return 0
+    return builtins.max(abs(int(a.min())), abs(int(a.max()))).bit_length()
+
+
+def _maxval(x):
+    a = np.asarray(x)
+    if not a.size:
+        return 0
+    return builtins.max(int(a.max()), 0)
+
+
+def _promote(x, y, nrbits):
+    """ Return the operands as object arrays if a result needs nrbits > 63
+
+    Operations on int64 lanes wrap around silently; Python ints don't.
+    """
+    if nrbits > 63:
+        return np.asarray(x).astype(object), np.asarray(y).astype(object)
+    return x, y
+
+
+def _add(x, y):
+    return _promote(x, y, builtins.max(_bits(x), _bits(y)) + 1)
+
+
+def _mul(x, y):
+    return _promote(x, y, _bits(x) + _bits(y))
+
+
+def _shift(x, y):
+    return _promote(x, y, _bits(x) + _maxval(y))
+
+
+def _pow(x, y):
+    return _promote(x, y, _bits(x) * _maxval(y))
+
+
+def laneselect(cond, a, b):
+    """ Return a lane-wise choice between a and b.
+
+    cond -- lane mask; a is selected in the lanes where cond is true
+    a, b -- intvec, Signal, array or int values
+
+    """
+    return np.where(_v(cond), _v(a), _v(b))
+
+
+class intvec(object):
+
+    """ Vector of integer values, one per simulation lane.
+
+    intvec mirrors intbv: it has optional min and max bounds, supports
+    "declaration by slicing", and indexing and arithmetic operators.
+    The result of an operator is a NumPy array with a value per lane.
+
+    """
+
+    __slots__ = ('_val', '_min', '_max', '_nrbits')
+
+    # let NumPy defer to the reflected operators of intvec
+    __array_ufunc__ = None
+
+    def __init__(self, val=0, min=None, max=None, lanes=None, _nrbits=0):
+        if np is None:
+            raise ImportError(_error.NoNumpy)
+        if _nrbits:
+            self._min = 0
+            self._max = 2**_nrbits
+        else:
+            self._min = min
+            self._max = max
+            if max is not None and min is not None:
+                if min >= 0:
+                    _nrbits = len(bin(max - 1))
+                elif max <= 1:
+                    _nrbits = len(bin(min))
+                else:
+                    # make sure there is a leading zero bit in positive numbers
+                    _nrbits = builtins.max(len(bin(max - 1)) + 1, len(bin(min)))
+        if isinstance(val, intvec):
+            self._min = val._min
+            self._max = val._max
+            _nrbits = val._nrbits
+            val = val._val
+        elif isinstance(val, intbv):
+            val = val._val
+        a = np.array(val, dtype=object)
+        if a.ndim == 0:
+            a = np.full(lanes or 1, a.item(), dtype=object)
+        elif a.ndim != 1 or not all(isinstance(v, integer_types) for v in a):
+            raise TypeError(_error.ArgType)
+        elif lanes is not None and len(a) != lanes:
+            raise ValueError(_error.Lanes % (lanes, len(a)))
+        self._nrbits = _nrbits
+        self._val = a
+        self._handleBounds()
+        min, max = self._min, self._max
+        if min is None or max is None:
+            # unbounded lanes are sized by their initial values
+            min, max = a.min(), a.max() + 1
+        self._val = self._val.astype(_dtype(min, max))
+
+    # support for the 'min' and 'max' attribute
+    @property
+    def max(self):
+        return self._max
+
+    @property
+    def min(self):
+        return self._min
+
+    # support for the 'lanes' attribute
+    @property
+    def lanes(self):
+        return len(self._val)
+
+    def lane(self, i):
+        """ Return the value of lane i as an int """
+        return int(self._val[i])
+
+    def _handleBounds(self):
+        if self._max is not None:
+            if (self._val >= self._max).any():
+                raise ValueError("intvec value %s >= maximum %s" %
+                                 (self._val.max(), self._max))
+        if self._min is not None:
+            if (self._val < self._min).any():
+                raise ValueError("intvec value %s < minimum %s" %
+                                 (self._val.min(), self._min))
+
+    def _setVal(self, val):
+        # set a new value with the dtype of the current one
+        dtype = self._val.dtype
+        val = np.asarray(val)
+        if val.dtype.kind not in 'biuO':
+            raise TypeError("Expected int values, got %s" % val.dtype)
+        if val.shape != self._val.shape:
+            if val.ndim:
+                raise ValueError(_error.Lanes % (len(self._val), len(val)))
+            val = np.broadcast_to(val, self._val.shape)
+        self._val = val
+        self._handleBounds()
+        self._val = self._val.astype(dtype)
+
+    # hash
+    def __hash__(self):
+        raise TypeError("intvec objects are unhashable")
+
+    # copy methods
+    def __copy__(self):
+        c = type(self).__new__(type(self))
+        c._val = self._val.copy()
+        c._min = self._min
+        c._max = self._max
+        c._nrbits = self._nrbits
+        return c
+
+    def __deepcopy__(self, visit):
+        return self.__copy__()
+
+    # iterator method
+    def __iter__(self):
+        if not self._nrbits:
+            raise TypeError("Cannot iterate over unsized intvec")
+        return iter([self[i] for i in range(self._nrbits - 1, -1, -1)])
+
+    # logical testing
+    def __bool__(self):
+        raise TypeError(_error.Truth)
+
+    __nonzero__ = __bool__
+
+    # length
+    def __len__(self):
+        return self._nrbits
+
+    # indexing and slicing methods
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            i, j = key.start, key.stop
+            if j is None:  # default
+                j = 0
+            j = int(j)
+            if j < 0:
+                raise ValueError("intvec[i:j] requires j >= 0\n"
+                                 "            j == %s" % j)
+            if i is None:  # default
+                return type(self)(self._val >> j)
+            i = int(i)
+            if i <= j:
+                raise ValueError("intvec[i:j] requires i > j\n"
+                                 "            i, j == %s, %s" % (i, j))
+            val = self._val
+            if i > _WORDBITS:
+                val = val.astype(object)
+            res = type(self)((val & (long(1) << i) - 1) >> j, _nrbits=i - j)
+            return res
+        else:
+            i = int(key)
+            res = ((self._val >> i) & 0x1).astype(bool)
+            return res
+
+    def __setitem__(self, key, val):
+        val = _v(val)
+        cur = self._val
+        val = np.asarray(val).astype(cur.dtype)
+        if isinstance(key, slice):
+            i, j = key.start, key.stop
+            if j is None:  # default
+                j = 0
+            j = int(j)
+            if j < 0:
+                raise ValueError("intvec[i:j] = v requires j >= 0\n"
+                                 "            j == %s" % j)
+            if i is None:  # default
+                self._setVal(val * (long(1) << j) + cur % (long(1) << j))
+                return
+            i = int(i)
+            if i <= j:
+                raise ValueError("intvec[i:j] = v requires i > j\n"
+                                 "            i, j == %s, %s" % (i, j))
+            lim = (long(1) << (i - j))
+            if (np.asarray(val >= lim) | np.asarray(val < -lim)).any():
+                raise ValueError("intvec[i:j] = v abs(v) too large\n"
+                                 "            i, j == %s, %s" % (i, j))
+            mask = (lim - 1) << j
+            self._setVal((cur & ~mask) | ((val << j) & mask))
+        else:
+            i = int(key)
+            if (np.asarray(val != 0) & np.asarray(val != 1)).any():
+                raise ValueError("intvec[i] = v requires v in (0, 1)\n"
+                                 "            i == %s " % i)
+            self._setVal((cur & ~(long(1) << i)) | (val << i))
+
+    # integer-like methods
+
+    def __add__(self, other):
+        x, y = _add(self._val, _v(other))
+        return x + y
+
+    def __radd__(self, other):
+        y, x = _add(_v(other), self._val)
+        return y + x
+
+    def __sub__(self, other):
+        x, y = _add(self._val, _v(other))
+        return x - y
+
+    def __rsub__(self, other):
+        y, x = _add(_v(other), self._val)
+        return y - x
+
+    def __mul__(self, other):
+        x, y = _mul(self._val, _v(other))
+        return x * y
+
+    def __rmul__(self, other):
+        y, x = _mul(_v(other), self._val)
+        return y * x
+
+    def __floordiv__(self, other):
+        return self._val // _v(other)
+
+    def __rfloordiv__(self, other):
+        return _v(other) // self._val
+
+    def __mod__(self, other):
+        return self._val % _v(other)
+
+    def __rmod__(self, other):
+        return _v(other) % self._val
+
+    def __pow__(self, other):
+        x, y = _pow(self._val, _v(other))
+        return x ** y
+
+    def __rpow__(self, other):
+        y, x = _pow(_v(other), self._val)
+        return y ** x
+
+    def __lshift__(self, other):
+        x, y = _shift(self._val, _v(other))
+        return x << y
+
+    def __rlshift__(self, other):
+        y, x = _shift(_v(other), self._val)
+        return y << x
+
+    def __rshift__(self, other):
+        return self._val >> _v(other)
+
+    def __rrshift__(self, other):
+        return _v(other) >> self._val
+
+    def __and__(self, other):
+        return self._val & _v(other)
+
+    def __rand__(self, other):
+        return _v(other) & self._val
+
+    def __or__(self, other):
+        return self._val | _v(other)
+
+    def __ror__(self, other):
+        return _v(other) | self._val
+
+    def __xor__(self, other):
+        return self._val ^ _v(other)
+
+    def __rxor__(self, other):
+        return _v(other) ^ self._val
+
+    def __iadd__(self, other):
+        self._setVal(self.__add__(other))
+        return self
+
+    def __isub__(self, other):
+        self._setVal(self.__sub__(other))
+        return self
+
+    def __imul__(self, other):
+        self._setVal(self.__mul__(other))
+        return self
+
+    def __ifloordiv__(self, other):
+        self._setVal(self._val // _v(other))
+        return self
+
+    def __imod__(self, other):
+        self._setVal(self._val % _v(other))
+        return self
+
+    def __ilshift__(self, other):
+        self._setVal(self.__lshift__(other))
+        return self
+
+    def __irshift__(self, other):
+        self._setVal(self._val >> _v(other))
+        return self
+
+    def __iand__(self, other):
+        self._setVal(self._val & _v(other))
+        return self
+
+    def __ior__(self, other):
+        self._setVal(self._val | _v(other))
+        return self
+
+    def __ixor__(self, other):
+        self._setVal(self._val ^ _v(other))
+        return self
+
+    def __neg__(self):
+        return -self._val
+
+    def __pos__(self):
+        return self._val.copy()
+
+    def __abs__(self):
+        return abs(self._val)
+
+    def __invert__(self):
+        if self._nrbits and self._min >= 0:
+            return ~self._val & (long(1) << self._nrbits) - 1
+        else:
+            return ~self._val
+
+    # comparisons
+    def __eq__(self, other):
+        return self._val == _v(other)
+
+    def __ne__(self, other):
+        return self._val != _v(other)
+
+    def __lt__(self, other):
+        return self._val < _v(other)
+
+    def __le__(self, other):
+        return self._val <= _v(other)
+
+    def __gt__(self, other):
+        return self._val > _v(other)
+
+    def __ge__(self, other):
+        return self._val >= _v(other)
+
+    # representation
+    def __str__(self):
+        return str(self._val.tolist())
+
+    def __repr__(self):
+        return "%s(%r)" % (type(self).__name__, self._val.tolist())
+
+
+class modvec(intvec):
+
+    """ Vector of modular bit vector values, one per simulation lane """
+
+    __slots__ = []
+
+    def _handleBounds(self):
+        lo, hi, val = self._min, self._max, self._val
+        if lo is not None:
+            if ((val < lo) | (val >= hi)).any():
+                self._val = (val - lo) % (hi - lo) + lo
+
+
+class _LaneSignal(_Signal):
+
+    """ Signal with an intvec value.
+
+    Lane masks of the most recent value change:
+    changed -- lanes in which the value changed
+    rose -- lanes with a rising edge
+    fell -- lanes with a falling edge
+
+    """
+
+    __slots__ = ('_changed', '_rose', '_fell')
+
+    __array_ufunc__ = None
+
+    def __init__(self, val):
+        _Signal.__init__(self, val)
+        self._min = val._min
+        self._max = val._max
+        self._setNextVal = self._setNextIntvec
+        self._formatVcd = self._formatVcdLane
+        self._clearMasks()
+
+    def _clearMasks(self):
+        self._changed = self._rose = self._fell = \
+            np.zeros(self._init.lanes, dtype=bool)
+
+    def _clear(self):
+        _Signal._clear(self)
+        self._clearMasks()
+
+    def _update(self):
+        val, next = self._val._val, self._next._val
+        changed = val != next
+        if changed.any():
+            waiters = self._eventWaiters[:]
+            del self._eventWaiters[:]
+            waiters.extend(self._eventFanout)
+            rose = changed & (val == 0)
+            fell = changed & (next == 0)
+            if rose.any():
+                waiters.extend(self._posedgeWaiters)
+                del self._posedgeWaiters[:]
+                waiters.extend(self._posedgeFanout)
+            if fell.any():
+                waiters.extend(self._negedgeWaiters)
+                del self._negedgeWaiters[:]
+                waiters.extend(self._negedgeFanout)
+            sim._nrApplied += 1
+            self._val._val = next.copy()
+            self._changed, self._rose, self._fell = changed, rose, fell
+            if self._tracing:
+                sim._tracebuf.append(self)
+            return waiters
+        else:
+            return []
+
+    # lane masks
+    @property
+    def changed(self):
+        return self._changed
+
+    @property
+    def rose(self):
+        return self._rose
+
+    @property
+    def fell(self):
+        return self._fell
+
+    def _setNextIntvec(self, val):
+        self._next._setVal(_v(val))
+
+    # a VCD file can only show a single lane
+    def _formatVcdLane(self):
+        v = self._val.lane(0)
+        if self._nrbits:
+            return "b%s %s" % (bin(v, self._nrbits), self._code)
+        return "s%s %s" % (hex(v), self._code)
+
@@ -27,14 +27,15 @@ downrange -- function that returns a downward range
 from __future__ import absolute_import
 
 
-import inspect
+import sys
 
 from myhdl._Cosimulation import CosimulationPipe
+from myhdl._Clock import Clock
 from myhdl._instance import _Instantiator
 
 def _isGenSeq(obj):
     from myhdl._block import _Block
-    if isinstance(obj, (CosimulationPipe, _Instantiator, _Block)):
+    if isinstance(obj, (CosimulationPipe, Clock, _Instantiator, _Block)):
         return True
     if not isinstance(obj, (list, tuple, set)):
         return False
@@ -47,8 +48,7 @@ def _isGenSeq(obj):
 
 
 def instances():
-    f = inspect.currentframe()
-    d = inspect.getouterframes(f)[1][0].f_locals
+    d = sys._getframe(1).f_locals
     l = []
     for v in d.values():
         if _isGenSeq(v):
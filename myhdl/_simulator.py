@@ -23,15 +23,98 @@ This module provides the following objects:
 now -- function that returns the current simulation time
 
 """
+from heapq import heappush, heappop
+
+
+class _FutureEvents(object):
+
+    """ Queue of future events, ordered on time.
+
+    Distinct times are kept in a heap, and the events for each time in
+    a bucket list. Events scheduled for the same time are therefore
+    returned in the order in which they were scheduled.
+
+    """
+
+    __slots__ = ('_times', '_buckets')
+
+    def __init__(self):
+        self._times = []
+        self._buckets = {}
+
+    def schedule(self, t, event):
+        """ Schedule an event at time t """
+        bucket = self._buckets.get(t)
+        if bucket is None:
+            self._buckets[t] = [event]
+            heappush(self._times, t)
+        else:
+            bucket.append(event)
+
+    def nextTime(self):
+        """ Return the earliest scheduled time """
+        return self._times[0]
+
+    def pop(self):
+        """ Remove and return the earliest time and its events """
+        t = heappop(self._times)
+        return t, self._buckets.pop(t)
+
+    def clear(self):
+        del self._times[:]
+        self._buckets.clear()
+
+    def __len__(self):
+        return sum(len(b) for b in self._buckets.values())
+
+    def __bool__(self):
+        return bool(self._times)
+
+    __nonzero__ = __bool__
 
 
 _signals = []
 _blocks = []
 _siglist = []
-_futureEvents = []
+_futureEvents = _FutureEvents()
 _time = 0
+_delta = 0
+_nrScheduled = 0
+_nrApplied = 0
 _tracing = 0
 _tf = None
+# trace sinks of the current simulation
+_sinks = []
+# traced signals that changed in the current time step
+_tracebuf = []
+
+# bits of the _tracing attribute of a signal
+_TRACE_FILE = 1
+_TRACE_SINK = 2
+
+
+def _traceStep(t):
+    """ Pass the traced signals that changed in time step t on
+
+    A signal that changed in several delta cycles is passed once, so the
+    trace file and the sinks see its final value.
+    """
+    changes = list(dict((id(s), s) for s in _tracebuf).values())
+    del _tracebuf[:]
+    if _tracing:
+        _tf.step(t, changes)
+    for sink in _sinks:
+        sink._step(t, changes)
+
+
+def _traceFlush():
+    """ Write out everything that was traced up to now """
+    if _tracebuf:
+        _traceStep(_time)
+    if _tracing:
+        _tf.flush()
+    for sink in _sinks:
+        sink._flush()
 
 
 def now():
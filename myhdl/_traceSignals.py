@@ -29,8 +29,10 @@ import os
 path = os.path
 import shutil
 import warnings
+from fnmatch import fnmatchcase
 
 from myhdl import _simulator, __version__, EnumItemType
+from myhdl._simulator import _TRACE_FILE
 from myhdl._extractHierarchy import _HierExtr
 from myhdl import TraceSignalsError
 from myhdl._ShadowSignal import _TristateSignal, _TristateDriver
@@ -49,6 +51,7 @@ class _error:
 _error.TopLevelName = "result of traceSignals call should be assigned to a top level name"
 _error.ArgType = "traceSignals first argument should be a classic function"
 _error.MultipleTraces = "Cannot trace multiple instances simultaneously"
+_error.Format = "Unknown trace format"
 
 
 class _TraceSignalsClass(object):
@@ -58,7 +61,14 @@ class _TraceSignalsClass(object):
                 "filename",
                 "timescale",
                 "tracelists",
-                "tracebackup"
+                "tracebackup",
+                "format",
+                "include",
+                "exclude",
+                "depth",
+                "maxmem",
+                "windows",
+                "trigger"
                 )
 
     def __init__(self):
@@ -68,6 +78,13 @@ class _TraceSignalsClass(object):
         self.timescale = "1ns"
         self.tracelists = True
         self.tracebackup = True
+        self.format = 'vcd'
+        self.include = None
+        self.exclude = None
+        self.depth = None
+        self.maxmem = None
+        self.windows = None
+        self.trigger = None
 
     def __call__(self, dut, *args, **kwargs):
         global _tracing, vcdpath
@@ -122,18 +139,24 @@ class _TraceSignalsClass(object):
             else:
                 filename = str(self.filename)
 
-            vcdpath = os.path.join(directory, filename + ".vcd")
+            if self.format not in _writers:
+                raise TraceSignalsError(_error.Format, repr(self.format))
+            writer = _writers[self.format]
+            ext = writer.ext
+            vcdpath = os.path.join(directory, filename + ext)
 
             if path.exists(vcdpath):
                 if self.tracebackup :
-                    backup = vcdpath[:-4] + '.' + str(path.getmtime(vcdpath)) + '.vcd'
+                    backup = vcdpath[:-len(ext)] + '.' + str(path.getmtime(vcdpath)) + ext
                     shutil.copyfile(vcdpath, backup)
                 os.remove(vcdpath)
-            vcdfile = open(vcdpath, 'w')
+            tracefile = writer(vcdpath)
             _simulator._tracing = 1
-            _simulator._tf = vcdfile
-            _writeVcdHeader(vcdfile, self.timescale)
-            _writeVcdSigs(vcdfile, h.hierarchy, self.tracelists)
+            _simulator._tf = tracefile
+            scopes = _traceScopes(h.hierarchy, self.tracelists, self.include,
+                                  self.exclude, self.depth, self.maxmem)
+            tracefile.begin(self.timescale, scopes)
+            tracefile._configure(self.windows, self.trigger)
         finally:
             _tracing = 0
 
@@ -142,6 +165,8 @@ class _TraceSignalsClass(object):
 
 traceSignals = _TraceSignalsClass()
 
+_INF = float('inf')
+
 _codechars = ""
 for i in range(33, 127):
     _codechars += chr(i)
@@ -187,12 +212,40 @@ def _getSval(s):
     return sval
 
 
-def _writeVcdSigs(f, hierarchy, tracelists):
+def _traceScopes(hierarchy, tracelists, include=None, exclude=None,
+                 depth=None, maxmem=None):
+    """ Mark the signals in a hierarchy as traced.
+
+    Return the list of scopes and variables to declare, as a list of
+    ('scope', name), ('var', name, sig) and ('upscope',) entries.
+    Signals are only traced if their hierarchical name matches a glob
+    pattern in include, and none in exclude. Instances below depth and
+    memories with more than maxmem elements are skipped.
+    """
     curlevel = 0
     namegen = _genNameCode()
-    siglist = []
+    scopes = []
+    path = []
+
+    def add(n, s, name):
+        fullname = '.'.join(path + [n])
+        if include is not None and \
+                not any(fnmatchcase(fullname, p) for p in include):
+            return
+        if exclude is not None and \
+                any(fnmatchcase(fullname, p) for p in exclude):
+            return
+        if _getSval(s) is None:
+            raise ValueError("%s of module %s has no initial value" % (n, name))
+        if not s._tracing & _TRACE_FILE:
+            s._tracing |= _TRACE_FILE
+            s._code = next(namegen)
+        scopes.append(('var', n, s))
+
     for inst in hierarchy:
         level = inst.level
+        if depth is not None and level > depth:
+            continue
         name = inst.name
         sigdict = inst.sigdict
         memdict = inst.memdict
@@ -201,64 +254,209 @@ def _writeVcdSigs(f, hierarchy, tracelists):
         assert(delta >= -1)
         if delta >= 0:
             for i in range(delta + 1):
-                print("$upscope $end", file=f)
-        print("$scope module %s $end" % name, file=f)
+                scopes.append(('upscope',))
+                path.pop()
+        scopes.append(('scope', name))
+        path.append(name)
         for n, s in sigdict.items():
-            sval = _getSval(s)
-            if sval is None:
-                raise ValueError("%s of module %s has no initial value" % (n, name))
-            if not s._tracing:
-                s._tracing = 1
-                s._code = next(namegen)
-                siglist.append(s)
-            w = s._nrbits
-            # use real for enum strings
-            if w:
-                if not isinstance(sval, EnumItemType):
-                    if w == 1:
-                        print("$var reg 1 %s %s $end" % (s._code, n), file=f)
-                    else:
-                        print("$var reg %s %s %s $end" % (w, s._code, n), file=f)
-                else:
-                    # 18-04-2014 jb
-                    # it is an enum, and as Impulse doesn't know the awkward 'real' representation yet, so let's 'degrade' it to a binary type
-                    # 30-04-2014 jb
-                    # Impulse now has a 'string'type
-                    print("$var string %s %s %s $end" % (w, s._code, n), file=f)
-# print "30-04-2014 jb: Representing enum as string"  # leave a trace
-            else:
-                print("$var real 1 %s %s $end" % (s._code, n), file=f)
+            add(n, s, name)
         # Memory dump by Frederik Teichert, http://teichert-ing.de, date: 2011.03.28
         # The Value Change Dump standard doesn't support multidimensional arrays so
         # all memories are flattened and renamed.
         if tracelists:
             for n in memdict.keys():
-                print("$scope module {} $end" .format(n), file=f)
-                memindex = 0
-                for s in memdict[n].mem:
-                    sval = _getSval(s)
-                    if sval is None:
-                        raise ValueError("%s of module %s has no initial value" % (n, name))
-                    if not s._tracing:
-                        s._tracing = 1
-                        s._code = next(namegen)
-                        siglist.append(s)
-                    w = s._nrbits
-                    # use real for enum strings
-                    if w and not isinstance(sval, EnumItemType):
-                        if w == 1:
-                            print("$var reg 1 %s %s(%i) $end" % (s._code, n, memindex), file=f)
-                        else:
-                            print("$var reg %s %s %s(%i) $end" % (w, s._code, n, memindex), file=f)
-                    else:
-                        print("$var real 1 %s %s(%i) $end" % (s._code, n, memindex), file=f)
-                    memindex += 1
-                print("$upscope $end", file=f)
+                mem = memdict[n].mem
+                if maxmem is not None and len(mem) > maxmem:
+                    continue
+                scopes.append(('scope', n))
+                path.append(n)
+                for memindex, s in enumerate(mem):
+                    add("%s(%i)" % (n, memindex), s, name)
+                scopes.append(('upscope',))
+                path.pop()
     for i in range(curlevel):
-        print("$upscope $end", file=f)
+        scopes.append(('upscope',))
+    return scopes
+
+
+def _tracedSigs(scopes):
+    """ Return the traced signals of a scope list, without duplicates """
+    sigs = []
+    seen = set()
+    for entry in scopes:
+        if entry[0] == 'var' and id(entry[2]) not in seen:
+            seen.add(id(entry[2]))
+            sigs.append(entry[2])
+    return sigs
+
+
+def _writeVcdSigs(f, scopes):
+    for entry in scopes:
+        if entry[0] == 'scope':
+            print("$scope module %s $end" % entry[1], file=f)
+            continue
+        if entry[0] == 'upscope':
+            print("$upscope $end", file=f)
+            continue
+        n, s = entry[1:]
+        sval = _getSval(s)
+        w = s._nrbits
+        # use real for enum strings
+        if w:
+            if not isinstance(sval, EnumItemType):
+                if w == 1:
+                    print("$var reg 1 %s %s $end" % (s._code, n), file=f)
+                else:
+                    print("$var reg %s %s %s $end" % (w, s._code, n), file=f)
+            else:
+                # 18-04-2014 jb
+                # it is an enum, and as Impulse doesn't know the awkward 'real' representation yet, so let's 'degrade' it to a binary type
+                # 30-04-2014 jb
+                # Impulse now has a 'string'type
+                print("$var string %s %s %s $end" % (w, s._code, n), file=f)
+        else:
+            print("$var real 1 %s %s $end" % (s._code, n), file=f)
     print(file=f)
     print("$enddefinitions $end", file=f)
     print("$dumpvars", file=f)
-    for s in siglist:
-        s._printVcd()  # initial value
+    for s in _tracedSigs(scopes):
+        print(s._formatVcd(), file=f)  # initial value
     print("$end", file=f)
+
+
+class _TraceWriter(object):
+
+    """ Base class of trace file writers.
+
+    The simulator collects the traced signals that change in
+    _simulator._tracebuf, and passes them to step() in bulk, once per
+    time step. The list can also hold signals that are only traced by
+    a sink, see TraceSink.
+
+    """
+
+    ext = ''
+    mode = 'w'
+
+    def __init__(self, path):
+        self.name = path
+        self.timeunit_suffix = ''
+        self._f = open(path, self.mode)
+        self._sigs = []
+
+    def begin(self, timescale, scopes):
+        """ Write the header, the declarations and the initial values """
+        raise NotImplementedError
+
+    def _configure(self, windows, trigger):
+        """ Only trace in the [start, end) time windows, and while the
+        trigger signal is asserted """
+        self._windows = sorted(windows) if windows else None
+        self._trigger = trigger
+        self._active = True
+        self.toggleTime = _INF
+
+    def _start(self):
+        # called at the start of a simulation
+        self._triggered = True
+        if self._trigger is not None:
+            self._triggered = bool(self._trigger._val)
+            self._trigger._eventFanout.append(_TraceTrigger(self))
+        self._toggle(_simulator._time)
+
+    def _toggle(self, t):
+        # called by the simulator when time reaches toggleTime
+        inWindow = True
+        nextTime = _INF
+        if self._windows:
+            inWindow = False
+            for start, end in self._windows:
+                if t < start:
+                    nextTime = min(nextTime, start)
+                elif t < end:
+                    inWindow = True
+                    nextTime = min(nextTime, end)
+        self._inWindow = inWindow
+        self.toggleTime = nextTime
+        self._setActive()
+
+    def _setActive(self):
+        active = self._inWindow and self._triggered
+        if active != self._active:
+            self._active = active
+            for s in self._sigs:
+                if active:
+                    s._tracing |= _TRACE_FILE
+                else:
+                    s._tracing &= ~_TRACE_FILE
+            if active:
+                # restart with the current values
+                _simulator._tracebuf.extend(self._sigs)
+
+    def step(self, t, changes):
+        """ Write the changes of time step t """
+        raise NotImplementedError
+
+    def write(self, s):
+        self._f.write(s)
+
+    def flush(self):
+        self._f.flush()
+
+    def close(self):
+        if self._f.closed:
+            return
+        self.flush()
+        self._f.close()
+        for s in self._sigs:
+            s._tracing &= ~_TRACE_FILE
+
+    def _fork(self, path):
+        # continue in a copy of the trace, e.g. in a simulation branch.
+        # The buffers were flushed before, so closing the inherited file
+        # object does not write anything to the original trace.
+        self._f.close()
+        shutil.copyfile(self.name, path)
+        self.name = path
+        self._f = open(path, self.mode.replace('w', 'a'))
+
+
+class _TraceTrigger(object):
+
+    """ Fanout entry of the trigger signal of a trace """
+
+    __slots__ = ('writer',)
+
+    def __init__(self, writer):
+        self.writer = writer
+
+    def next(self, waiters, actives, exc):
+        writer = self.writer
+        writer._triggered = bool(writer._trigger._val)
+        writer._setActive()
+
+
+class _VcdWriter(_TraceWriter):
+
+    """ Writer of text VCD files """
+
+    ext = '.vcd'
+
+    def begin(self, timescale, scopes):
+        self._sigs = _tracedSigs(scopes)
+        _writeVcdHeader(self, timescale)
+        _writeVcdSigs(self, scopes)
+
+    def step(self, t, changes):
+        lines = ["#%s%s" % (t, self.timeunit_suffix)]
+        lines.extend([s._formatVcd() for s in changes
+                      if s._tracing & _TRACE_FILE])
+        lines.append('')
+        self._f.write('\n'.join(lines))
+
+
+# avoid circular imports
+from myhdl._wave import _WaveWriter
+
+_writers = {'vcd': _VcdWriter,
+            'wave': _WaveWriter}
@@ -0,0 +1,145 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  Copyright (C) 2003-2008 Jan Decaluwe
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+""" Module with the TraceSink class """
+from __future__ import absolute_import
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from myhdl import _simulator
+from myhdl._intbv import intbv
+from myhdl._Signal import _Signal
+from myhdl._simulator import _TRACE_SINK
+
+
+class _error:
+    pass
+
+
+_error.ArgType = "TraceSink signals should be a dict or a list of signals"
+_error.NoNumpy = "TraceSink(numpy=True) requires numpy"
+
+
+class TraceSink(object):
+
+    """ Receiver of the value changes of signals during a simulation.
+
+    A TraceSink is passed to Simulation along with the instances. The
+    value changes of its signals are collected without formatting them,
+    and passed to the callback in batches. Each change is a record
+    (time, code, value), where code is the index of the signal in
+    names. The initial values are recorded when the simulation starts.
+
+    Attributes:
+    names -- the names of the signals, indexed by code
+
+    """
+
+    def __init__(self, signals, callback, batch=4096, numpy=False):
+        """ Construct a trace sink.
+
+        signals -- a dict of signals by name, or a list of signals
+        callback -- called with a list of (time, code, value) tuples,
+                    or with a numpy structured array if numpy is set
+        batch -- pass the records on when at least this many have been
+                 collected at the end of a time step; 0 to pass them on
+                 every time step
+        numpy -- pass the records as an array with fields time, code
+                 and value, instead of as a list of tuples
+
+        """
+        if isinstance(signals, dict):
+            names = sorted(signals)
+            sigs = [signals[n] for n in names]
+        else:
+            sigs = list(signals)
+            names = [str(i) for i in range(len(sigs))]
+        for s in sigs:
+            if not isinstance(s, _Signal):
+                raise TypeError(_error.ArgType)
+        if numpy:
+            if np is None:
+                raise ImportError(_error.NoNumpy)
+            from myhdl._wave import _kind
+            vtype = np.int64
+            if [s for s in sigs if _kind(s) != 'i']:
+                vtype = object
+            self._dtype = np.dtype([('time', np.int64), ('code', np.int32),
+                                    ('value', vtype)])
+        self.names = names
+        self.callback = callback
+        self.batch = batch
+        self.numpy = numpy
+        self._sigs = sigs
+        self._codes = dict((id(s), i) for i, s in enumerate(sigs))
+        self._clearBuffer()
+
+    def _clearBuffer(self):
+        self._times = []
+        self._recCodes = []
+        self._values = []
+
+    def _start(self):
+        # called at the start of a simulation
+        self._clearBuffer()
+        for s in self._sigs:
+            s._tracing |= _TRACE_SINK
+        self._step(_simulator._time, self._sigs)
+
+    def _step(self, t, changes):
+        codes = self._codes
+        times = self._times
+        recCodes = self._recCodes
+        values = self._values
+        for s in changes:
+            c = codes.get(id(s))
+            if c is None:
+                continue
+            v = s._val
+            if isinstance(v, intbv):
+                v = v._val
+            times.append(t)
+            recCodes.append(c)
+            values.append(v)
+        if len(times) >= self.batch:
+            self._flush()
+
+    def _flush(self):
+        times = self._times
+        if not times:
+            return
+        codes, values = self._recCodes, self._values
+        self._clearBuffer()
+        if self.numpy:
+            records = np.empty(len(times), dtype=self._dtype)
+            records['time'] = times
+            records['code'] = codes
+            records['value'] = values
+        else:
+            records = list(zip(times, codes, values))
+        self.callback(records)
+
+    def _stop(self):
+        # called at the end of a simulation
+        self._flush()
+        for s in self._sigs:
+            s._tracing &= ~_TRACE_SINK
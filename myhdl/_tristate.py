@@ -64,7 +64,10 @@ class _TristateDriver(_Signal):
             self._next = None
         else:
             self._setNextVal(val)
-        _siglist.append(self._bus)
+        bus = self._bus
+        if not bus._pending:
+            bus._pending = True
+            _siglist.append(bus)
 
 
 class _DelayedTristate(_DelayedSignal, _Tristate):
@@ -25,9 +25,15 @@ from __future__ import print_function
 
 import __future__
 import ast
-import sys
+import hashlib
 import inspect
+import linecache
+import os
+import pickle
+import sys
+import warnings
 
+from collections import OrderedDict
 from tokenize import generate_tokens, untokenize, INDENT
 
 from myhdl._compat import integer_types, StringIO
@@ -74,29 +80,129 @@ def _dedent(s):
     return untokenize(result)
 
 
-def _makeAST(f):
+# parsed trees by code object, see _getAST, in the order of their use
+_astCache = OrderedDict()
+# maximum number of trees in _astCache
+_ASTCACHESIZE = 1024
+# directory to keep the parsed trees across runs, if any
+_astCacheDir = os.environ.get('MYHDL_AST_CACHE')
+
+
+def _mtime(filename):
+    try:
+        return os.stat(filename).st_mtime
+    except OSError:
+        return None
+
+
+def _parse(code):
+    """Parse the source of a code object into a pickled tree."""
     # Need to look at the flags used to compile the original function f and
     # pass these same flags to the compile() function. This ensures that
     # syntax-changing __future__ imports like print_function work correctly.
-    orig_f_co_flags = f.__code__.co_flags
+    orig_f_co_flags = code.co_flags
     # co_flags can contain various internal flags that we can't pass to
     # compile(), so strip them out here
     valid_flags = 0
     for future_feature in __future__.all_feature_names:
         feature = getattr(__future__, future_feature)
         valid_flags |= feature.compiler_flag
-    s = inspect.getsource(f)
-    s = _dedent(s)
+    lines, lineno = inspect.getsourcelines(code)
+    s = _dedent(''.join(lines))
     # use compile instead of ast.parse so that additional flags can be passed
     flags = ast.PyCF_ONLY_AST | (orig_f_co_flags & valid_flags)
     tree = compile(s, filename='<unknown>', mode='exec',
         flags=flags, dont_inherit=True)
     # tree = ast.parse(s)
-    tree.sourcefile = inspect.getsourcefile(f)
-    tree.lineoffset = inspect.getsourcelines(f)[1] - 1
+    return pickle.dumps(tree, pickle.HIGHEST_PROTOCOL), lineno - 1
+
+
+def _private(st):
+    """Check that a file or directory can only be written by the user.
+
+    Loading a pickle can run code, so the disk cache is only used when
+    nobody else can write to it.
+    """
+    if not hasattr(os, 'getuid'):
+        return True
+    return st.st_uid == os.getuid() and not st.st_mode & 0o022
+
+
+def _loadAST(code, mtime):
+    """Get a pickled tree from the disk cache, or parse and store it."""
+    try:
+        if not os.path.isdir(_astCacheDir):
+            os.makedirs(_astCacheDir, 0o700)
+        private = _private(os.stat(_astCacheDir))
+    except OSError:
+        private = False
+    if not private:
+        warnings.warn("MYHDL_AST_CACHE: %s is not a directory that only the "
+                      "user can write to, it is not used" % _astCacheDir,
+                      RuntimeWarning)
+        return _parse(code)
+    key = '%s:%d:%s:%r:%s' % (code.co_filename, code.co_firstlineno,
+                              code.co_name, mtime, sys.version)
+    path = os.path.join(_astCacheDir,
+                        hashlib.sha1(key.encode('utf-8')).hexdigest())
+    try:
+        with open(path, 'rb') as f:
+            if _private(os.fstat(f.fileno())):
+                return pickle.load(f)
+    except (IOError, OSError, EOFError, ValueError, pickle.UnpicklingError):
+        pass
+    entry = _parse(code)
+    try:
+        tmp = '%s.%d' % (path, os.getpid())
+        # private, whatever the umask
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(entry, f, pickle.HIGHEST_PROTOCOL)
+        os.rename(tmp, path)
+    except (IOError, OSError):
+        pass
+    return entry
+
+
+def _getAST(code):
+    """Return the parsed source of a code object.
+
+    The source is only read and parsed once per code object, as long as
+    its file is not modified, and a new copy of the tree is returned for
+    each call, so that the caller is free to change it. The trees of the
+    most recently used code objects are kept. When the MYHDL_AST_CACHE
+    environment variable names a directory, the trees are also kept
+    there across runs.
+
+    """
+    filename = code.co_filename
+    mtime = _mtime(filename)
+    # code objects compare equal regardless of their file
+    key = (filename, code.co_firstlineno, code)
+    entry = _astCache.pop(key, None)
+    if entry is None or entry[0] != mtime:
+        if entry is not None:
+            linecache.checkcache(filename)
+        if _astCacheDir and mtime is not None:
+            data, lineoffset = _loadAST(code, mtime)
+        else:
+            data, lineoffset = _parse(code)
+        sourcefile = inspect.getsourcefile(code)
+        entry = (mtime, data, sourcefile, lineoffset)
+        while len(_astCache) >= _ASTCACHESIZE:
+            _astCache.popitem(last=False)
+    _astCache[key] = entry
+    mtime, data, sourcefile, lineoffset = entry
+    tree = pickle.loads(data)
+    tree.sourcefile = sourcefile
+    tree.lineoffset = lineoffset
     return tree
 
 
+def _makeAST(f):
+    return _getAST(f.__code__)
+
+
 def _genfunc(gen):
     from myhdl._always_comb import _AlwaysComb
     from myhdl._always_seq import _AlwaysSeq
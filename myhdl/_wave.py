@@ -0,0 +1,299 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  Copyright (C) 2003-2008 Jan Decaluwe
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+""" Module with the compressed binary waveform format.
+
+A wave file starts with a magic string and a compressed JSON header
+that declares the traced signals. The value changes follow in blocks
+that are compressed separately, so that a reader can skip the blocks
+outside a time window. When the trace is closed, an index with the
+time range and file offset of each block is appended, followed by a
+fixed size trailer that points to it. The value changes of a time step
+are packed in bulk: first the indices and values of the signals that
+fit in 64 bits, then the indices and text of the other signals.
+
+"""
+from __future__ import absolute_import
+
+import json
+import struct
+import sys
+import time
+import zlib
+from array import array
+
+from myhdl import __version__
+from myhdl._simulator import _TRACE_FILE
+from myhdl._compat import integer_types
+from myhdl._intbv import intbv
+from myhdl._ShadowSignal import _TristateSignal, _TristateDriver
+from myhdl._traceSignals import _TraceWriter, _tracedSigs
+
+
+class _error:
+    pass
+
+
+_error.Magic = "Not a wave file"
+
+_MAGIC = b'MYHDLWV1'
+_INDEX = b'MYHDLIDX'
+_SIZE = struct.Struct('<I')
+_BLOCK = struct.Struct('<qqII')
+_STEP = struct.Struct('<qII')
+_TRAILER = struct.Struct('<Q8s')
+# uncompressed size at which a block is written
+_BLOCKSIZE = 1 << 20
+
+_swap = sys.byteorder == 'big'
+
+
+def _pack(typecode, values):
+    a = array(typecode, values)
+    if _swap:
+        a.byteswap()
+    return a.tobytes()
+
+
+def _unpack(typecode, data, pos, n):
+    a = array(typecode)
+    a.frombytes(data[pos:pos + n * a.itemsize])
+    if _swap:
+        a.byteswap()
+    return a, pos + n * a.itemsize
+
+
+def _kind(s):
+    """ Return how the values of a signal are stored
+
+    'i' -- an integer that fits in 64 bits
+    'w' -- a wide integer or None, as text
+    's' -- any other value, as text
+    """
+    if isinstance(s, (_TristateSignal, _TristateDriver)):
+        return 'w'
+    v = s._val
+    if isinstance(v, bool):
+        return 'i'
+    if isinstance(v, intbv):
+        if v._min is not None and v._max is not None and \
+                -2**63 <= v._min and v._max <= 2**63:
+            return 'i'
+        return 'w'
+    if isinstance(v, integer_types):
+        return 'w'
+    return 's'
+
+
+class _WaveWriter(_TraceWriter):
+
+    """ Writer of compressed binary wave files """
+
+    ext = '.wave'
+    mode = 'wb'
+
+    def begin(self, timescale, scopes):
+        self._sigs = sigs = _tracedSigs(scopes)
+        self._info = info = {}
+        names = [[] for s in sigs]
+        for i, s in enumerate(sigs):
+            info[id(s)] = (i, _kind(s))
+        path = []
+        for entry in scopes:
+            if entry[0] == 'scope':
+                path.append(entry[1])
+            elif entry[0] == 'upscope':
+                path.pop()
+            else:
+                n, s = entry[1:]
+                names[info[id(s)][0]].append('.'.join(path + [n]))
+        header = {'version': __version__,
+                  'date': time.asctime(),
+                  'timescale': timescale,
+                  'signals': [{'names': names[i],
+                               'kind': info[id(s)][1],
+                               'width': s._nrbits}
+                              for i, s in enumerate(sigs)]}
+        data = zlib.compress(json.dumps(header).encode('utf-8'))
+        self._f.write(_MAGIC + _SIZE.pack(len(data)) + data)
+        self._index = []
+        self._steps = []
+        self._size = 0
+        self._tstart = self._tend = None
+        # initial values, the simulation starts at time 0
+        self.step(0, list(sigs))
+
+    def step(self, t, changes):
+        info = self._info
+        idx, vals, sidx, svals = [], [], [], []
+        for s in changes:
+            if not s._tracing & _TRACE_FILE:
+                continue
+            i, kind = info[id(s)]
+            v = s._val
+            if kind == 'i':
+                idx.append(i)
+                vals.append(int(v))
+            else:
+                sidx.append(i)
+                if kind == 's':
+                    svals.append(str(v).encode('utf-8'))
+                elif v is None:
+                    svals.append(b'z')
+                else:
+                    svals.append(str(int(v)).encode('ascii'))
+        data = b''.join([_STEP.pack(t, len(idx), len(sidx)),
+                         _pack('I', idx), _pack('q', vals),
+                         _pack('I', sidx), _pack('I', [len(v) for v in svals])]
+                        + svals)
+        self._steps.append(data)
+        self._size += len(data)
+        if self._tstart is None:
+            self._tstart = t
+        self._tend = t
+        if self._size >= _BLOCKSIZE:
+            self._writeBlock()
+
+    def _writeBlock(self):
+        if not self._steps:
+            return
+        data = zlib.compress(b''.join(self._steps))
+        self._index.append((self._tstart, self._tend, self._f.tell()))
+        self._f.write(_BLOCK.pack(self._tstart, self._tend, len(self._steps),
+                                  len(data)))
+        self._f.write(data)
+        self._steps = []
+        self._size = 0
+        self._tstart = self._tend = None
+
+    def flush(self):
+        self._writeBlock()
+        self._f.flush()
+
+    def close(self):
+        if self._f.closed:
+            return
+        self.flush()
+        offset = self._f.tell()
+        data = zlib.compress(json.dumps(self._index).encode('utf-8'))
+        self._f.write(_SIZE.pack(len(data)) + data)
+        self._f.write(_TRAILER.pack(offset, _INDEX))
+        _TraceWriter.close(self)
+
+
+class WaveFile(object):
+
+    """ Reader of trace files written with traceSignals.format = 'wave'
+
+    Attributes:
+    timescale -- the timescale of the trace
+    signals -- the hierarchical names of the traced signals
+
+    Methods:
+    changes -- iterate over the value changes
+
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            if f.read(len(_MAGIC)) != _MAGIC:
+                raise ValueError(_error.Magic, path)
+            n, = _SIZE.unpack(f.read(_SIZE.size))
+            header = json.loads(zlib.decompress(f.read(n)).decode('utf-8'))
+            start = f.tell()
+            f.seek(0, 2)
+            end = f.tell()
+            index = None
+            if end - start >= _TRAILER.size:
+                f.seek(end - _TRAILER.size)
+                offset, magic = _TRAILER.unpack(f.read(_TRAILER.size))
+                if magic == _INDEX:
+                    f.seek(offset)
+                    n, = _SIZE.unpack(f.read(_SIZE.size))
+                    index = json.loads(zlib.decompress(f.read(n)).decode('utf-8'))
+            if index is None:
+                # not closed: find the blocks by walking over them
+                index = []
+                pos = start
+                while pos + _BLOCK.size <= end:
+                    f.seek(pos)
+                    tstart, tend, nsteps, n = _BLOCK.unpack(f.read(_BLOCK.size))
+                    if pos + _BLOCK.size + n > end:
+                        break
+                    index.append((tstart, tend, pos))
+                    pos += _BLOCK.size + n
+        self.version = header['version']
+        self.date = header['date']
+        self.timescale = header['timescale']
+        self._sigs = header['signals']
+        self._index = index
+        self._byname = {}
+        for i, s in enumerate(self._sigs):
+            for n in s['names']:
+                self._byname[n] = i
+
+    @property
+    def signals(self):
+        return sorted(self._byname)
+
+    def changes(self, names=None, start=None, end=None):
+        """ Iterate over the value changes as (time, name, value) tuples.
+
+        names -- only report these signals (default: all)
+        start, end -- only report the changes at times in [start, end)
+
+        """
+        sigs = self._sigs
+        if names is None:
+            want = dict((i, s['names'][0]) for i, s in enumerate(sigs))
+        else:
+            want = dict((self._byname[n], n) for n in names)
+        kinds = [s['kind'] for s in sigs]
+        with open(self.path, 'rb') as f:
+            for tstart, tend, offset in self._index:
+                if start is not None and tend < start:
+                    continue
+                if end is not None and tstart >= end:
+                    break
+                f.seek(offset)
+                tstart, tend, nsteps, n = _BLOCK.unpack(f.read(_BLOCK.size))
+                data = zlib.decompress(f.read(n))
+                pos = 0
+                for k in range(nsteps):
+                    t, ni, ns = _STEP.unpack_from(data, pos)
+                    pos += _STEP.size
+                    idx, pos = _unpack('I', data, pos, ni)
+                    vals, pos = _unpack('q', data, pos, ni)
+                    sidx, pos = _unpack('I', data, pos, ns)
+                    lens, pos = _unpack('I', data, pos, ns)
+                    if (start is not None and t < start) or \
+                            (end is not None and t >= end):
+                        pos += sum(lens)
+                        continue
+                    for i, v in zip(idx, vals):
+                        if i in want:
+                            yield t, want[i], v
+                    for i, m in zip(sidx, lens):
+                        if i in want:
+                            v = data[pos:pos + m].decode('utf-8')
+                            if kinds[i] == 'w':
+                                v = None if v == 'z' else int(v)
+                            yield t, want[i], v
+                        pos += m
@@ -39,6 +39,7 @@ from myhdl._blackbox import SynthesisObject
 from myhdl._always_comb import _AlwaysComb
 from myhdl._always_seq import _AlwaysSeq
 from myhdl._always import _Always
+from myhdl.conversion._profile import _profiler
 from myhdl.conversion._misc import (_error, _access, _kind,
                                     _ConversionMixin, _Label, _genUniqueSuffix,
                                     _get_argnames)
@@ -142,51 +143,55 @@ def _analyzeSigs(hierarchy, hdl='Verilog'):
 def _analyzeGens(top, absnames):
     genlist = []
     for g in top:
-        if isinstance(g, _UserCode):
-            tree = g
-        elif isinstance(g, (_AlwaysComb, _AlwaysSeq, _Always)):
-            f = g.func
-            tree = g.ast
-            tree.symdict = f.__globals__.copy()
-            tree.callstack = []
-            # handle free variables
-            tree.nonlocaldict = {}
-            if f.__code__.co_freevars:
-                for n, c in zip(f.__code__.co_freevars, f.__closure__):
-                    obj = c.cell_contents
-                    tree.symdict[n] = obj
-                    # currently, only intbv as automatic nonlocals (until Python 3.0)
-                    if isinstance(obj, intbv):
-                        tree.nonlocaldict[n] = obj
-            tree.name = absnames.get(id(g), str(_Label("BLOCK"))).upper()
-            v = _AttrRefTransformer(tree)
-            v.visit(tree)
-            v = _FirstPassVisitor(tree)
-            v.visit(tree)
-            if isinstance(g, _AlwaysComb):
-                v = _AnalyzeAlwaysCombVisitor(tree, g.senslist)
-            elif isinstance(g, _AlwaysSeq):
-                v = _AnalyzeAlwaysSeqVisitor(tree, g.senslist, g.reset, g.sigregs, g.varregs)
-            else:
-                v = _AnalyzeAlwaysDecoVisitor(tree, g.senslist)
-            v.visit(tree)
-        elif isinstance(g, SynthesisObject):
-            continue
-        else:  # @instance
-            f = g.gen.gi_frame
-            tree = g.ast
-            tree.symdict = f.f_globals.copy()
-            tree.symdict.update(f.f_locals)
-            tree.nonlocaldict = {}
-            tree.callstack = []
-            tree.name = absnames.get(id(g), str(_Label("BLOCK"))).upper()
-            v = _AttrRefTransformer(tree)
-            v.visit(tree)
-            v = _FirstPassVisitor(tree)
-            v.visit(tree)
-            v = _AnalyzeBlockVisitor(tree)
-            v.visit(tree)
-        genlist.append(tree)
+        with _profiler.timed('analyzeGens', g):
+            if isinstance(g, _UserCode):
+                tree = g
+            elif isinstance(g, (_AlwaysComb, _AlwaysSeq, _Always)):
+                f = g.func
+                with _profiler.timed('makeAST'):
+                    tree = g.ast
+                tree.symdict = f.__globals__.copy()
+                tree.callstack = []
+                # handle free variables
+                tree.nonlocaldict = {}
+                if f.__code__.co_freevars:
+                    for n, c in zip(f.__code__.co_freevars, f.__closure__):
+                        obj = c.cell_contents
+                        tree.symdict[n] = obj
+                        # currently, only intbv as automatic nonlocals (until Python 3.0)
+                        if isinstance(obj, intbv):
+                            tree.nonlocaldict[n] = obj
+                tree.name = absnames.get(id(g), str(_Label("BLOCK"))).upper()
+                v = _AttrRefTransformer(tree)
+                v.visit(tree)
+                v = _FirstPassVisitor(tree)
+                v.visit(tree)
+                if isinstance(g, _AlwaysComb):
+                    v = _AnalyzeAlwaysCombVisitor(tree, g.senslist)
+                elif isinstance(g, _AlwaysSeq):
+                    v = _AnalyzeAlwaysSeqVisitor(tree, g.senslist, g.reset, g.sigregs, g.varregs)
+                else:
+                    v = _AnalyzeAlwaysDecoVisitor(tree, g.senslist)
+                v.visit(tree)
+            elif isinstance(g, SynthesisObject):
+                continue
+            else:  # @instance
+                f = g.gen.gi_frame
+                with _profiler.timed('makeAST'):
+                    tree = g.ast
+                tree.symdict = f.f_globals.copy()
+                tree.symdict.update(f.f_locals)
+                tree.nonlocaldict = {}
+                tree.callstack = []
+                tree.name = absnames.get(id(g), str(_Label("BLOCK"))).upper()
+                v = _AttrRefTransformer(tree)
+                v.visit(tree)
+                v = _FirstPassVisitor(tree)
+                v.visit(tree)
+                v = _AnalyzeBlockVisitor(tree)
+                v.visit(tree)
+            _profiler.alias(tree, g)
+            genlist.append(tree)
     return genlist
 
 
@@ -993,7 +998,10 @@ class _AnalyzeVisitor(ast.NodeVisitor, _ConversionMixin):
     def accessIndex(self, node):
         self.visit(node.value)
         self.access = _access.INPUT
-        self.visit(node.slice.value)
+        index = node.slice
+        if isinstance(index, getattr(ast, 'Index', ())):  # before Python 3.9
+            index = index.value
+        self.visit(index)
         if isinstance(node.value.obj, _Ram):
             if isinstance(node.ctx, ast.Store):
                 self.raiseError(node, _error.ListElementAssign)
@@ -1006,7 +1014,7 @@ class _AnalyzeVisitor(ast.NodeVisitor, _ConversionMixin):
         elif isinstance(node.value.obj, intbv):
             node.obj = bool()
         # Special case: We may have a named slice
-        elif isinstance(node.slice.value.obj, slice):
+        elif isinstance(index.obj, slice):
             node.obj = self.getObj(node.value)
         else:
             node.obj = bool()  # XXX default
@@ -1277,6 +1285,10 @@ def expandinterface(v, name, obj):
 
 def _analyzeTopFunc(func, *args, **kwargs):
     tree = _makeAST(func)
+    return _analyzeTopTree(func, tree, *args, **kwargs)
+
+
+def _analyzeTopTree(func, tree, *args, **kwargs):
     v = _AnalyzeTopFuncVisitor(func, tree, *args, **kwargs)
     v.visit(tree)
 
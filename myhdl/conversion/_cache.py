@@ -0,0 +1,428 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  Copyright (C) 2003-2016 Jan Decaluwe
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+
+""" Module with the on-disk cache of conversion results.
+
+A conversion is identified by a key that hashes the converted design
+together with the conversion options. The design part of the key is
+built per block, from the source of the block function, its resolved
+parameters and port signature, the processes it instantiates and the
+keys of its subblocks. Signals are identified by the order in which
+they are first seen, so that the key captures how they are connected
+rather than their identity in a particular run.
+
+When a conversion with the same key was done before, the cached output
+files are copied to the destination instead of converting again. In a
+hierarchical conversion, the output of each module is also cached under
+a key of its own, so that a change in one module only converts that
+module and the modules that contain it.
+
+"""
+from __future__ import absolute_import
+
+import hashlib
+import inspect
+import json
+import marshal
+import os
+import shutil
+import tempfile
+from types import CodeType, FunctionType, ModuleType
+
+import myhdl
+from myhdl._Signal import _Signal
+from myhdl._intbv import intbv
+from myhdl._enum import EnumType, EnumItemType
+from myhdl._block import _Block, block
+from myhdl._instance import _Instantiator
+from myhdl._compat import integer_types, string_types, class_types
+
+# signal attributes that describe how shadow, tristate and reset
+# signals are derived
+_sigattrs = ('_sig', '_left', '_right', '_args', '_drivers',
+             'active', 'isasync')
+
+
+# the types of the objects that user code can refer to
+_usertypes = (_Signal, intbv, list, tuple, bool) + integer_types + string_types
+
+# the types of the module and class attributes that code can refer to
+_attrtypes = _usertypes + (float, dict, type(None), EnumType, EnumItemType,
+                           FunctionType, ModuleType, block) + class_types
+
+
+# keys of the source of code objects
+_codeKeys = {}
+
+
+def _isLibrary(module):
+    """Return True for a myhdl module, identified by the myhdl version."""
+    return (module == 'myhdl' or module.startswith('myhdl.')) and \
+        not module.startswith('myhdl.test')
+
+
+def _codeNames(code, names):
+    """Collect the global names used by a code object and its nested code."""
+    names.update(code.co_names)
+    for c in code.co_consts:
+        if isinstance(c, CodeType):
+            _codeNames(c, names)
+    return names
+
+
+class _Keyer(object):
+
+    """Compute the keys of blocks.
+
+    The objects that are seen are numbered in order, so that keys
+    computed by the same keyer share the numbering. Optionally, names
+    maps block ids to the names to use instead of the instance names,
+    and modules maps the ids of blocks that are converted to modules of
+    their own to their key and port signals. Keyers that share a funcs
+    dict reuse the keys of functions that only refer to functions that
+    were not seen before.
+    """
+
+    def __init__(self, names=None, modules=None, funcs=None):
+        self.names = names or {}
+        self.modules = modules or {}
+        self.funcs = {} if funcs is None else funcs
+        self._ids = {}
+        # keep the numbered objects alive, so that their ids stay unique
+        self._keep = []
+        # ids of the modules and classes whose attributes are being keyed
+        self._open = set()
+        # number of times that objects were seen again
+        self._hits = 0
+
+    def _seen(self, obj):
+        i = self._ids.get(id(obj))
+        if i is None:
+            self._ids[id(obj)] = len(self._keep)
+            self._keep.append(obj)
+        else:
+            self._hits += 1
+        return i
+
+    def code(self, code):
+        """Return the key of the source of a code object."""
+        k = _codeKeys.get(code)
+        if k is None:
+            try:
+                src = inspect.getsource(code).encode('utf-8')
+            except (IOError, TypeError):
+                src = marshal.dumps(code)
+            k = _codeKeys[code] = hashlib.sha1(src).hexdigest()
+        return k
+
+    def func(self, f):
+        """Return the key of a function and the globals it uses."""
+        if _isLibrary(getattr(f, '__module__', None) or ''):
+            # library code is identified by the myhdl version
+            return 'func %s.%s' % (f.__module__, f.__name__)
+        i = self._seen(f)
+        if i is not None:
+            return 'func %d' % i
+        start = len(self._keep) - 1
+        known = self.funcs.get(f)
+        if known is not None:
+            key, objs = known
+            if not any(id(obj) in self._ids for obj in objs):
+                # number the same objects as when the key was computed
+                for obj in objs:
+                    self._seen(obj)
+                return key
+        hits = self._hits
+        code = f.__code__
+        names = _codeNames(code, set())
+        parts = ['func', self.code(code), self.value(f.__defaults__)]
+        if f.__closure__:
+            parts.extend(self.value(c.cell_contents, names)
+                         for c in f.__closure__)
+        for n in sorted(names):
+            if n in f.__globals__:
+                parts.append('%s=%s' % (n, self.value(f.__globals__[n],
+                                                      names)))
+        key = '(%s)' % ' '.join(parts)
+        objs = self._keep[start + 1:]
+        if self._hits == hits and \
+                all(isinstance(obj, FunctionType) for obj in objs):
+            self.funcs[f] = (key, objs)
+        return key
+
+    def signal(self, s):
+        i = self._seen(s)
+        if i is not None:
+            return 'sig %d' % i
+        parts = ['sig', type(s).__name__, type(s._init).__name__,
+                 repr(s._init), repr(s._nrbits), repr(s.min), repr(s.max)]
+        if type(s) is not _Signal:
+            for attr in _sigattrs:
+                if hasattr(s, attr):
+                    parts.append('%s=%s' % (attr,
+                                            self.value(getattr(s, attr))))
+        return '(%s)' % ' '.join(parts)
+
+    def namespace(self, head, obj, names):
+        """Return the key of a module or a class.
+
+        The attributes that the referring code may use, as given by the
+        names in that code, are part of the key.
+        """
+        if id(obj) in self._open:
+            return head
+        self._open.add(id(obj))
+        parts = [head]
+        for n in sorted(names):
+            if n.startswith('__'):
+                continue
+            try:
+                v = getattr(obj, n)
+            except Exception:
+                continue
+            if isinstance(v, _attrtypes):
+                parts.append('%s=%s' % (n, self.value(v, names)))
+        self._open.discard(id(obj))
+        return '(%s)' % ' '.join(parts)
+
+    def value(self, obj, names=()):
+        """Return the key of a parameter or a referenced object.
+
+        For a module or a class, names are the names in the referring
+        code, to select the attributes that are part of the key.
+        """
+        if obj is None or isinstance(obj, (bool, float) + integer_types +
+                                     string_types):
+            return '%s:%r' % (type(obj).__name__, obj)
+        if isinstance(obj, _Signal):
+            return self.signal(obj)
+        if isinstance(obj, intbv):
+            return '%s:%r[%r:%r]' % (type(obj).__name__, obj._val,
+                                     obj.min, obj.max)
+        if isinstance(obj, EnumItemType):
+            return '%s.%s' % (self.value(obj._type), obj._name)
+        if isinstance(obj, EnumType):
+            i = self._seen(obj)
+            if i is not None:
+                return 'enum %d' % i
+            return '(enum %r %r)' % (obj._names, obj._encoding)
+        if isinstance(obj, _Block):
+            return self.block(obj)
+        if isinstance(obj, block):
+            return 'block %s' % self.func(obj.func)
+        if isinstance(obj, FunctionType):
+            return self.func(obj)
+        if isinstance(obj, ModuleType):
+            head = 'module %s' % obj.__name__
+            if _isLibrary(obj.__name__):
+                return head
+            return self.namespace(head, obj, names)
+        if isinstance(obj, class_types):
+            head = 'class %s.%s' % (obj.__module__, obj.__name__)
+            if _isLibrary(obj.__module__):
+                return head
+            return self.namespace(head, obj, names)
+        i = self._seen(obj)
+        if i is not None:
+            return 'obj %d' % i
+        if isinstance(obj, (list, tuple)):
+            items = [self.value(v) for v in obj]
+        elif isinstance(obj, dict):
+            items = ['%r=%s' % (k, self.value(obj[k])) for k in sorted(obj)]
+        elif hasattr(obj, '__dict__'):
+            # an interface object
+            items = ['%s=%s' % (k, self.value(v))
+                     for k, v in sorted(vars(obj).items())]
+        else:
+            items = [repr(obj)]
+        return '(%s %s)' % (type(obj).__name__, ' '.join(items))
+
+    def process(self, inst):
+        """Return the key of a process, with the objects it refers to."""
+        parts = ['process', type(inst).__name__, self.func(inst.funcobj)]
+        for attr in ('senslist', 'reset'):
+            if hasattr(inst, attr):
+                parts.append(self.value(getattr(inst, attr)))
+        names = _codeNames(inst.funcobj.__code__, set())
+        names.update(inst.funcobj.__code__.co_freevars)
+        names.update(inst.sigdict)
+        names.update(inst.losdict)
+        for n in sorted(names):
+            if n in inst.symdict:
+                parts.append('%s=%s' % (n, self.value(inst.symdict[n],
+                                                      names)))
+        return '(%s)' % ' '.join(parts)
+
+    def block(self, blk, top=False):
+        """Return the key of a block instance and its subblocks.
+
+        The key hashes the source of the block function, its resolved
+        parameters and port signature, the processes it instantiates
+        and the keys of its subblocks. The instance name of a top block
+        is left out, as it is replaced by the name of the converted
+        module.
+        """
+        i = self._seen(blk)
+        if i is not None:
+            return 'block %d' % i
+        name = None if top else self.names.get(id(blk), blk.name)
+        parts = ['block', repr(name), self.func(blk.func)]
+        parts.extend(self.value(a) for a in blk.args)
+        parts.extend('%s=%s' % (k, self.value(blk.kwargs[k]))
+                     for k in sorted(blk.kwargs))
+        for code in (blk.verilog_code, blk.vhdl_code):
+            if code is not None:
+                parts.append('%s %s' % (type(code).__name__,
+                                        self.value(code.code)))
+                parts.extend('%s=%s' % (n, self.value(v)) for n, v in
+                             sorted(blk.symdict.items())
+                             if isinstance(v, _usertypes))
+        for sub in blk.subs:
+            if id(sub) in self.modules:
+                parts.append(self.instance(sub))
+            elif isinstance(sub, _Block):
+                parts.append(self.block(sub))
+            elif isinstance(sub, _Instantiator):
+                parts.append(self.process(sub))
+            else:
+                parts.append(type(sub).__name__)
+        s = '(%s)' % ' '.join(parts)
+        return hashlib.sha1(s.encode('utf-8')).hexdigest()
+
+    def instance(self, blk):
+        """Return the key of an instance of a module.
+
+        The key of the module is combined with the signals connected to
+        its ports.
+        """
+        key, ports = self.modules[id(blk)]
+        parts = ['instance', repr(self.names.get(id(blk), blk.name)), key]
+        parts.extend(self.value(s) for s in ports)
+        return '(%s)' % ' '.join(parts)
+
+
+def _options(converter, attrs):
+    """Return the options of a converter, updated with attrs."""
+    options = {}
+    for k in type(converter).__slots__:
+        if k not in ('portmap', 'cache'):
+            options[k] = getattr(converter, k, None)
+    options.update(attrs)
+    # the output doesn't depend on the number of jobs
+    options.pop('jobs', None)
+    return options
+
+
+def _outputFiles(top, hdl, options):
+    """Return the names of the files written by a conversion of top."""
+    name = options['name']
+    if name is None:
+        name = top.func.__name__
+    if hdl == 'verilog':
+        files = [name + '.v']
+        if top.argnames and not options['no_testbench']:
+            files.append('tb_' + name + '.v')
+    else:
+        from myhdl.conversion._toVHDL import _shortversion
+        files = [name + '.vhd']
+        if not options['no_myhdl_package']:
+            files.append('pck_myhdl_%s.vhd' % _shortversion)
+    return files
+
+
+class _ConversionCache(object):
+
+    """On-disk cache of conversion results, one directory per key."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def key(self, top, hdl, options):
+        parts = ['myhdl %s' % myhdl.__version__, hdl,
+                 _Keyer().block(top, top=True)]
+        parts.extend('%s=%r' % (k, options[k]) for k in sorted(options))
+        return hashlib.sha1('\n'.join(parts).encode('utf-8')).hexdigest()
+
+    def moduleKey(self, hdl, options, key, name, subnames):
+        """Return the key of a module of a hierarchical conversion.
+
+        The key of the module block is combined with the conversion
+        options and the names of the module and of the modules that it
+        instantiates.
+        """
+        parts = ['myhdl %s' % myhdl.__version__, hdl, key, name]
+        parts.extend(subnames)
+        parts.extend('%s=%r' % (k, options[k]) for k in sorted(options)
+                     if k not in ('name', 'directory'))
+        return hashlib.sha1('\n'.join(parts).encode('utf-8')).hexdigest()
+
+    def loadModule(self, key):
+        """Return the output, name and ports of a cached module, or None."""
+        entry = os.path.join(self.path, 'modules', key)
+        if not os.path.isdir(entry):
+            return None
+        with open(os.path.join(entry, 'module')) as f:
+            text = f.read()
+        with open(os.path.join(entry, 'ports')) as f:
+            info = json.load(f)
+        return text, info['name'], [tuple(p) for p in info['ports']]
+
+    def storeModule(self, key, text, name, ports):
+        """Store the output, name and ports of a module under a key."""
+        path = os.path.join(self.path, 'modules')
+        if not os.path.isdir(path):
+            os.makedirs(path)
+        tmp = tempfile.mkdtemp(dir=path)
+        with open(os.path.join(tmp, 'module'), 'w') as f:
+            f.write(text)
+        with open(os.path.join(tmp, 'ports'), 'w') as f:
+            json.dump({'name': name, 'ports': ports}, f)
+        try:
+            os.rename(tmp, os.path.join(path, key))
+        except OSError:
+            # stored concurrently
+            shutil.rmtree(tmp)
+
+    def load(self, key, directory):
+        """Copy the cached files of a key to directory.
+
+        Return the names of the files, or None if the key is not cached.
+        """
+        entry = os.path.join(self.path, key)
+        if not os.path.isdir(entry):
+            return None
+        files = sorted(os.listdir(entry))
+        for fn in files:
+            shutil.copyfile(os.path.join(entry, fn),
+                            os.path.join(directory, fn))
+        return files
+
+    def store(self, key, directory, files):
+        """Store copies of the files in directory under a key."""
+        if not os.path.isdir(self.path):
+            os.makedirs(self.path)
+        tmp = tempfile.mkdtemp(dir=self.path)
+        for fn in files:
+            shutil.copyfile(os.path.join(directory, fn), os.path.join(tmp, fn))
+        try:
+            os.rename(tmp, os.path.join(self.path, key))
+        except OSError:
+            # stored concurrently
+            shutil.rmtree(tmp)
@@ -32,6 +32,8 @@ from myhdl._compat import PY2
 class _error(object):
     FirstArgType = "first argument should be a classic function"
     ArgType = "leaf cell type error"
+    ClockNotConvertible = "Clock is not convertible, use a generator " \
+        "that inverts the clock signal after a delay"
     NotSupported = "Not supported"
     TopLevelName = "Result of toVerilog call should be assigned to a top level name"
     SigMultipleDriven = "Signal has multiple drivers"
@@ -161,11 +163,20 @@ class _ConversionMixin(object):
             self.visit(n)
 
 
-def _LabelGenerator():
-    i = 1
-    while 1:
-        yield "MYHDL%s" % i
-        i += 1
+class _LabelGenerator(object):
+
+    def __init__(self):
+        self.i = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        self.i += 1
+        return "MYHDL%s" % self.i
+
+    next = __next__
+
 
 _genLabel = _LabelGenerator()
 
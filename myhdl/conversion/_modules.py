@@ -0,0 +1,422 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  Copyright (C) 2003-2016 Jan Decaluwe
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+
+""" Module with the planning of hierarchical conversion output.
+
+In a hierarchical conversion, a subblock is converted to a module of its
+own when it is only connected to the rest of the design through its
+ports. Module instances with the same key (see _cache.py) share a single
+module, which is converted once and instantiated everywhere. The other
+subblocks are flattened into the module that contains them, as in a
+regular conversion.
+
+A module is converted with the regular converter, after its module
+subblocks have been replaced by user code that instantiates them. This
+is done by temporarily changing the attributes of the subblocks, so
+that the hierarchy extraction and the analysis don't look inside them.
+
+"""
+from __future__ import absolute_import
+
+from myhdl import ConversionError
+from myhdl._Signal import _Signal
+from myhdl._ShadowSignal import (_ShadowSignal, _TristateSignal,
+                                 _TristateDriver)
+from myhdl._enum import EnumItemType
+from myhdl._block import _Block
+from myhdl._instance import _Instantiator
+from myhdl._getHierarchy import _getHierarchy
+from myhdl._extractHierarchy import _UserVerilogCode, _UserVhdlCode
+from myhdl._util import _makeAST
+from myhdl.conversion._analyze import _analyzeTopTree
+from myhdl.conversion._cache import _Keyer
+
+
+class _VerilogModuleInstance(_UserVerilogCode):
+
+    """Verilog instantiation of a module subblock."""
+
+    __slots__ = ['label', 'module', 'conns']
+
+    def __init__(self, label, module, conns):
+        self.label = label
+        self.module = module
+        self.conns = conns
+
+    def __str__(self):
+        s = "\n%s %s (" % (self.module.hdlname, self.label)
+        sep = ''
+        for portname, sig in self.conns:
+            s += "%s\n    .%s(%s)" % (sep, portname, sig._name)
+            sep = ','
+        s += "\n);\n\n"
+        return s
+
+
+class _VhdlModuleInstance(_UserVhdlCode):
+
+    """VHDL instantiation of a module subblock."""
+
+    __slots__ = ['label', 'module', 'conns']
+
+    def __init__(self, label, module, conns):
+        self.label = label
+        self.module = module
+        self.conns = conns
+
+    def __str__(self):
+        from myhdl.conversion._toVHDL import toVHDL
+        s = "%s: entity %s.%s(%s)\n" % (self.label, toVHDL.library,
+                                        self.module.hdlname,
+                                        toVHDL.architecture)
+        if self.conns:
+            s += "    port map ("
+            sep = ''
+            for portname, sig in self.conns:
+                s += "%s\n        %s=>%s" % (sep, portname, sig._name)
+                sep = ','
+            s += "\n    )"
+        s += ";\n\n"
+        return s
+
+
+class _Module(object):
+
+    """A module of a hierarchical conversion."""
+
+    def __init__(self, block, name, key):
+        self.block = block
+        self.name = name
+        self.key = key
+        # name in the output, set when the module is converted
+        self.hdlname = None
+        # (port name, driven, read) tuples, set when the module is converted
+        self.ports = None
+
+
+def _sigs(obj, sigs, depth=0):
+    """Collect the signals in a block argument."""
+    if isinstance(obj, _Signal):
+        sigs.append(obj)
+    elif isinstance(obj, (list, tuple)):
+        for item in obj:
+            _sigs(item, sigs, depth)
+    elif depth < 5 and hasattr(obj, '__dict__') and \
+            not isinstance(obj, (_Block, type)):
+        # an interface object
+        for item in vars(obj).values():
+            _sigs(item, sigs, depth + 1)
+    return sigs
+
+
+def _sources(sigs):
+    """Add the signals from which shadow signals are derived."""
+    todo = list(sigs)
+    while todo:
+        s = todo.pop()
+        if isinstance(s, _ShadowSignal):
+            for attr in ('_sig', '_args'):
+                src = getattr(s, attr, None)
+                if src is not None:
+                    new = _sigs(src, [])
+                    sigs.extend(new)
+                    todo.extend(new)
+    return sigs
+
+
+class _ModulePlan(object):
+
+    """Plan of the modules of a hierarchical conversion of top.
+
+    With a conversion cache, the output of the modules is looked up and
+    stored in the cache, under a key that depends on the conversion
+    options.
+    """
+
+    def __init__(self, top, name, hdl, cache=None, options=None):
+        self.top = top
+        self.name = name
+        self.hdl = hdl
+        self.cache = cache
+        self.options = options
+        self.code = hdl.lower() + '_code'
+        if hdl == 'VHDL':
+            self.Instance = _VhdlModuleInstance
+        else:
+            self.Instance = _VerilogModuleInstance
+        # the blocks in depth first order
+        self.blocks = blocks = []
+        self.parent = {}
+        self.labels = {}
+        self.span = {}
+        self._walk(top, None)
+        # keep the original attributes of the blocks to restore them
+        self._saved = [(b, b.name, b.subs, b.sigdict, b.memdict,
+                        getattr(b, self.code)) for b in blocks]
+        self.ports = {}
+        self._trees = {}
+        candidates = [b for b in blocks[1:] if self._eligible(b)]
+        self.ismodule = self._contained(candidates)
+        self.keys = {}
+        modinfo = {}
+        funcs = {}
+        for b in reversed(blocks):
+            if id(b) in self.ismodule or b is top:
+                keyer = _Keyer(self.labels, modinfo, funcs)
+                self.keys[id(b)] = key = keyer.block(b, top=True)
+                modinfo[id(b)] = (key, [s for n, s in self.ports.get(id(b), ())])
+        # assign the modules, and order them so that modules come after
+        # the modules they instantiate
+        self.modules = []
+        self._bykey = {}
+        self._names = set([name])
+        self.topmodule = self._plan(top)
+        self.modules.pop()
+
+    def _walk(self, b, parent):
+        counts = {}
+        self.parent[id(b)] = parent
+        self.blocks.append(b)
+        index = len(self.blocks) - 1
+        for sub in b.subs:
+            if isinstance(sub, _Block):
+                n = sub.func.__name__
+                k = counts.get(n, 0)
+                counts[n] = k + 1
+                self.labels[id(sub)] = "%s_%d" % (n, k)
+                self._walk(sub, b)
+        # index range of the subtree
+        self.span[id(b)] = (index, len(self.blocks) - 1)
+
+    def _eligible(self, b):
+        """Check the conditions on a block itself to be a module."""
+        if getattr(b, self.code) is not None:
+            return False
+        # the analysis of the interface doesn't modify the tree
+        tree = self._trees.get(b.func.__code__)
+        if tree is None:
+            tree = self._trees[b.func.__code__] = _makeAST(b.func)
+        try:
+            intf = _analyzeTopTree(b.func, tree, *b.args, **b.kwargs)
+        except ConversionError:
+            return False
+        ports = [(n, intf.argdict[n]) for n in intf.argnames]
+        for n, s in ports:
+            # names of interface signals are set by the analysis
+            s._name = None
+        seen = set()
+        for n, s in ports:
+            if id(s) in seen:
+                return False
+            seen.add(id(s))
+            if isinstance(s, (_TristateSignal, _TristateDriver)):
+                return False
+            if self.hdl == 'VHDL' and isinstance(s._val, EnumItemType):
+                # enum port types are declared in a package of the top
+                return False
+        self.ports[id(b)] = ports
+        return True
+
+    def _contained(self, candidates):
+        """Return the candidates that are only connected through ports.
+
+        The signals that a block uses are located by the position of the
+        block in depth first order. A signal that is used both inside
+        and outside of a block must be one of its ports.
+        """
+        positions = {}
+        sigs = {}
+        members = set()
+
+        def use(objs, pos):
+            for s in _sources(_sigs(objs, [])):
+                sigs[id(s)] = s
+                positions.setdefault(id(s), set()).add(pos)
+
+        use(list(self.top.args) + list(self.top.kwargs.values()), -1)
+        for pos, b in enumerate(self.blocks):
+            code = getattr(b, self.code)
+            if code is not None:
+                use(list(b.sigdict.values()), pos)
+                use(list(b.memdict.values()), pos)
+                for m in b.memdict.values():
+                    members.update(id(s) for s in _sigs(m, []))
+            for sub in b.subs:
+                if isinstance(sub, _Block):
+                    use(list(sub.args) + list(sub.kwargs.values()), pos)
+                elif isinstance(sub, _Instantiator) and code is None:
+                    use(list(sub.sigdict.values()), pos)
+                    use(list(sub.losdict.values()), pos)
+                    for m in sub.losdict.values():
+                        members.update(id(s) for s in _sigs(m, []))
+
+        # the marks that elaboration sets, to restore them after a module
+        # is converted
+        self._marks = dict((i, (s._read, s._driven)) for i, s in sigs.items())
+        ok = dict((id(b), b) for b in candidates)
+        for b in candidates:
+            for n, s in self.ports[id(b)]:
+                if id(s) in members:
+                    del ok[id(b)]
+                    break
+        for i, ps in positions.items():
+            lo, hi = min(ps), max(ps)
+            for p in ps:
+                if p < 0:
+                    continue
+                b = self.blocks[p]
+                while b is not None:
+                    first, last = self.span[id(b)]
+                    if first <= lo and hi <= last:
+                        break
+                    if id(b) in ok and \
+                            not any(s is sigs[i] for n, s in self.ports[id(b)]):
+                        del ok[id(b)]
+                    b = self.parent[id(b)]
+        return ok
+
+    def _region(self, b, path=()):
+        """Yield the subblocks in the module of b, with their label paths.
+
+        The module subblocks are yielded, but not the blocks inside them.
+        """
+        for sub in b.subs:
+            if not isinstance(sub, _Block):
+                continue
+            label = path + (self.labels[id(sub)],)
+            yield sub, label
+            if id(sub) not in self.ismodule:
+                for item in self._region(sub, label):
+                    yield item
+
+    def _plan(self, b):
+        key = self.keys[id(b)]
+        m = _Module(b, None, key)
+        self._bykey[key] = m
+        if b is self.top:
+            m.name = None
+        else:
+            # prefix with the top name, to stay clear of reserved words
+            # and of the modules of other conversions
+            name = base = "%s_%s" % (self.name, b.func.__name__.lstrip('_'))
+            k = 0
+            while name in self._names:
+                k += 1
+                name = "%s_%d" % (base, k)
+            self._names.add(name)
+            m.name = name
+        for sub, label in self._region(b):
+            if id(sub) in self.ismodule and \
+                    self.keys[id(sub)] not in self._bykey:
+                self._plan(sub)
+        self.modules.append(m)
+        return m
+
+    def hierarchy(self, m, name=None):
+        """Prepare the conversion of module m, and return its hierarchy.
+
+        The module subblocks of m are replaced by instances, and the
+        signals that connect to them are marked as driven or read,
+        according to the directions of their ports. A signal connected
+        to an output that the module reads back is marked as both.
+        """
+        b = m.block
+        for sub, label in self._region(b):
+            sub.name = self.labels[id(sub)]
+            if id(sub) not in self.ismodule:
+                continue
+            submod = self._bykey[self.keys[id(sub)]]
+            ports = self.ports[id(sub)]
+            conns = []
+            for (n, s), (portname, driven, read) in zip(ports, submod.ports):
+                conns.append((portname, s))
+                s._markUsed()
+                if driven:
+                    s._driven = 'wire'
+                    if read:
+                        # an output that the module reads back is an
+                        # inout port, which in VHDL can only be connected
+                        # to a signal or an inout port of the container
+                        s._markRead()
+                else:
+                    s._markRead()
+                    if isinstance(s, _ShadowSignal):
+                        s._driven = 'wire'
+            sub.subs = []
+            sub.sigdict = dict(ports)
+            sub.memdict = {}
+            setattr(sub, self.code,
+                    self.Instance('_'.join(label), submod, conns))
+        return _getHierarchy(name or m.name, b)
+
+    def record(self, m, intf):
+        """Record the port directions of a converted module."""
+        m.hdlname = intf.name
+        m.ports = [(n, intf.argdict[n]._driven, intf.argdict[n]._read)
+                   for n in intf.argnames]
+
+    def _cacheKey(self, m):
+        subnames = [self._bykey[self.keys[id(sub)]].hdlname
+                    for sub, label in self._region(m.block)
+                    if id(sub) in self.ismodule]
+        return self.cache.moduleKey(self.hdl, self.options, m.key, m.name,
+                                    subnames)
+
+    def load(self, m):
+        """Return the cached output of module m, or None.
+
+        On a hit, the name and port directions of m are recorded from
+        the cache, as if it were converted.
+        """
+        if self.cache is None:
+            return None
+        entry = self.cache.loadModule(self._cacheKey(m))
+        if entry is None:
+            return None
+        text, m.hdlname, m.ports = entry
+        return text
+
+    def store(self, m, text):
+        """Store the output of a converted module in the cache."""
+        if self.cache is not None:
+            self.cache.storeModule(self._cacheKey(m), text, m.hdlname,
+                                   m.ports)
+
+    def cleanup(self, intf, siglist, memlist):
+        """Clean up the signals of a converted module."""
+        sigs = list(siglist)
+        for mem in memlist:
+            mem.name = None
+            sigs.extend(mem.mem)
+        # interface signals are not in the signal list
+        sigs.extend(intf.argdict.values())
+        for s in sigs:
+            s._clear()
+            if id(s) in self._marks:
+                s._read, s._driven = self._marks[id(s)]
+
+    def restore(self):
+        """Restore the attributes of all blocks."""
+        for b, name, subs, sigdict, memdict, code in self._saved:
+            b.name = name
+            b.subs = subs
+            b.sigdict = sigdict
+            b.memdict = memdict
+            setattr(b, self.code, code)
@@ -0,0 +1,214 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  Copyright (C) 2003-2016 Jan Decaluwe
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+
+""" Module with the rendering of generators.
+
+The code of the generators is written to spill files, that keep at most
+a chunk of their contents in memory, and write the rest to a temporary
+file. The converters then copy the function code and the block code to
+the output file, in that order. As a result, the memory use doesn't grow
+with the size of the design.
+
+The analyzed generators can be rendered in forked worker processes, that
+inherit the trees and signals of the conversion. A worker renders a
+contiguous range of generators, and returns the code as text, which is
+written to the spill files in the order of the generators.
+
+The labels that are created while rendering are numbered by a global
+counter. A worker numbers them relative to the start of its range, with
+placeholders that are replaced by the numbers of a serial rendering. As
+a result, the output is the same as the output of a serial rendering.
+
+When the conversion is profiled, a worker also returns the sections of
+the blocks of its range, that are merged in the profile.
+
+"""
+from __future__ import absolute_import
+
+import multiprocessing
+import os
+import re
+import shutil
+import tempfile
+import warnings
+
+from myhdl._compat import StringIO
+from myhdl.conversion import _misc
+from myhdl.conversion._profile import _profiler
+
+# size of the chunks that spill files write to disk
+_SPILLSIZE = 1 << 16
+# minimum number of generators per range
+_MINCHUNK = 8
+# number of ranges per worker, to balance the load
+_CHUNKS = 4
+
+# the generators and render function of the rendering in progress, that
+# forked workers inherit
+_work = None
+
+_placeholder = re.compile("MYHDL\0(\\d+)\0")
+
+
+class _RelativeLabelGenerator(_misc._LabelGenerator):
+
+    def __next__(self):
+        self.i += 1
+        return "MYHDL\0%s\0" % self.i
+
+    next = __next__
+
+
+def _pool(jobs):
+    """Return a pool of forked workers, or None if fork is not available."""
+    if not hasattr(multiprocessing, 'get_context'):
+        # Python 2 forks on posix systems
+        if os.name != 'posix':
+            return None
+        return multiprocessing.Pool(jobs)
+    if 'fork' not in multiprocessing.get_all_start_methods():
+        return None
+    return multiprocessing.get_context('fork').Pool(jobs)
+
+
+class _SpillFile(object):
+
+    """File for code that is copied to the output later.
+
+    The code is kept in memory until a chunk is complete, which is then
+    written to a temporary file. Unlike a SpooledTemporaryFile, the many
+    small writes of the visitors don't query the position of the file.
+    """
+
+    def __init__(self):
+        self.buf = StringIO()
+        self.size = 0
+        self.file = None
+
+    def write(self, s):
+        self.buf.write(s)
+        self.size += len(s)
+        if self.size >= _SPILLSIZE:
+            if self.file is None:
+                self.file = tempfile.TemporaryFile(mode='w+')
+            self.file.write(self.buf.getvalue())
+            self.buf = StringIO()
+            self.size = 0
+
+    def copy(self, f):
+        """Copy the code to file f."""
+        if self.file is not None:
+            self.file.seek(0)
+            shutil.copyfileobj(self.file, f)
+        f.write(self.buf.getvalue())
+
+    def clear(self):
+        self.close()
+        self.__init__()
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+def _renderRange(bounds):
+    render, genlist = _work
+    lo, hi = bounds
+    labels = _misc._genLabel = _RelativeLabelGenerator()
+    blockBuf = StringIO()
+    funcBuf = StringIO()
+    # drop the sections that are inherited, or left by a previous range
+    _profiler.take()
+    with warnings.catch_warnings(record=True) as caught:
+        try:
+            render(genlist[lo:hi], blockBuf, funcBuf)
+        except Exception:
+            return None
+    caught = [(str(w.message), w.category, w.filename, w.lineno)
+              for w in caught]
+    return (funcBuf.getvalue(), blockBuf.getvalue(), labels.i, caught,
+            _profiler.take())
+
+
+def _renderGens(render, genlist, blockFile, funcFile, jobs=1):
+    """Render genlist to blockFile and funcFile.
+
+    render(genlist, blockBuf, funcBuf) renders generators serially. With
+    more than 1 job, ranges of generators are rendered in parallel.
+    """
+    global _work
+    n = len(genlist)
+    jobs = min(jobs or 1, n // _MINCHUNK)
+    if jobs < 2:
+        render(genlist, blockFile, funcFile)
+        return
+    size = -(-n // (jobs * _CHUNKS))
+    size = max(size, _MINCHUNK)
+    ranges = [(lo, min(lo + size, n)) for lo in range(0, n, size)]
+    # workers are forked when the pool is created
+    _work = (render, genlist)
+    try:
+        pool = _pool(jobs)
+        if pool is None:
+            render(genlist, blockFile, funcFile)
+            return
+        labels = _misc._genLabel
+        start = labels.i
+        failed = False
+        # the warnings of the workers, once per category and message
+        warned = []
+        seen = set()
+        try:
+            # the code is written as it comes, so that only the ranges in
+            # progress are in memory
+            for result in pool.imap(_renderRange, ranges):
+                if result is None:
+                    failed = True
+                    break
+                funcCode, blockCode, count, caught, blocks = result
+                _profiler.merge(blocks)
+                base = labels.i
+
+                def number(m):
+                    return "MYHDL%d" % (base + int(m.group(1)))
+
+                funcFile.write(_placeholder.sub(number, funcCode))
+                blockFile.write(_placeholder.sub(number, blockCode))
+                labels.i += count
+                for w in caught:
+                    if w[:2] not in seen:
+                        seen.add(w[:2])
+                        warned.append(w)
+        finally:
+            pool.terminate()
+            pool.join()
+    finally:
+        _work = None
+    if failed:
+        # render again serially, to raise the error as usual
+        labels.i = start
+        blockFile.clear()
+        funcFile.clear()
+        render(genlist, blockFile, funcFile)
+        return
+    for message, category, filename, lineno in warned:
+        # at the location of the original warning
+        warnings.warn_explicit(message, category, filename, lineno)
@@ -0,0 +1,296 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  Copyright (C) 2003-2016 Jan Decaluwe
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+
+""" Module with the profiling of conversions.
+
+The passes of the converters are timed in sections:
+
+    with _profiler.timed('analyzeSigs'):
+        ...
+
+A section for an object, such as a generator, is also accounted to the
+block that contains the object. The converters register the blocks of
+their objects with the name() and hierarchy() methods. A section that is
+nested in a section of the same pass is only accounted to its block.
+
+Peak allocations are measured with tracemalloc, when available. The peak
+of a section is the maximum of the memory allocated since the start of
+the section, so that it includes the peaks of nested sections.
+
+When the profiler is not active, sections are a shared object that does
+nothing, so that the converters can leave them in place.
+
+Forked worker processes inherit the profiler. The block sections of a
+worker are returned with take(), and accounted in the parent process
+with merge().
+
+"""
+from __future__ import absolute_import
+from __future__ import print_function
+
+import json
+import os
+import time
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+from myhdl._compat import StringIO
+
+# number of blocks in the table, the report file has all of them
+_TABLEBLOCKS = 20
+
+
+class _Stats(object):
+
+    __slots__ = ['time', 'calls', 'peak', 'order']
+
+    def __init__(self, order=0):
+        self.time = 0.0
+        self.calls = 0
+        self.peak = None
+        # to report the passes in the order in which they come
+        self.order = order
+
+    def add(self, t, peak, calls=1):
+        self.time += t
+        self.calls += calls
+        if peak is not None and (self.peak is None or peak > self.peak):
+            self.peak = peak
+
+    def report(self, name):
+        return dict(name=name, time=self.time, calls=self.calls,
+                    peak=self.peak)
+
+
+class _NullSection(object):
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_nullSection = _NullSection()
+
+
+class _Section(object):
+
+    def __init__(self, profiler, name, stats):
+        self.profiler = profiler
+        self.name = name
+        self.stats = stats
+
+    def __enter__(self):
+        self.profiler._push(self.name)
+        self.start = time.time()
+        return self
+
+    def __exit__(self, *exc):
+        t = time.time() - self.start
+        peak = self.profiler._pop(self.name)
+        for stats in self.stats:
+            stats.add(t, peak)
+        return False
+
+
+class _Profiler(object):
+
+    """Profiler of a conversion."""
+
+    def __init__(self):
+        self.active = False
+
+    def start(self, name, hdl=None):
+        self.active = True
+        # not self.name, which would hide the name() method
+        self.design = name
+        self.hdl = hdl
+        self.passes = {}
+        self.blocks = {}
+        self.names = {}
+        # memory at the start and peak so far of the open sections
+        self._stack = []
+        # number of open sections per pass
+        self._open = {}
+        self._tracing = tracemalloc is not None and \
+            hasattr(tracemalloc, 'reset_peak')
+        self._started = self._tracing and not tracemalloc.is_tracing()
+        if self._started:
+            tracemalloc.start()
+        self._top = _Section(self, None, [_Stats()])
+        self._top.__enter__()
+
+    def stop(self):
+        """Stop profiling, and return the report."""
+        self._top.__exit__()
+        if self._started:
+            tracemalloc.stop()
+        self.active = False
+        total = self._top.stats[0]
+        report = dict(name=self.design, hdl=self.hdl, time=total.time,
+                      peak=total.peak)
+        report['passes'] = [s.report(n) for n, s in _ordered(self.passes)]
+        blocks = []
+        for n, passes in self.blocks.items():
+            total = _Stats()
+            for s in passes.values():
+                total.add(s.time, s.peak, s.calls)
+            b = total.report(n)
+            b['passes'] = [s.report(p) for p, s in _ordered(passes)]
+            blocks.append(b)
+        blocks.sort(key=lambda b: -b['time'])
+        report['blocks'] = blocks
+        self.passes = self.blocks = self.names = None
+        return report
+
+    def name(self, obj, name):
+        """Account the sections of obj to the block with the given name."""
+        if self.active:
+            self.names[id(obj)] = name
+
+    def alias(self, obj, other):
+        """Account the sections of obj to the block of other."""
+        if self.active and id(other) in self.names:
+            self.names[id(obj)] = self.names[id(other)]
+
+    def hierarchy(self, h):
+        """Register the blocks of the generators in hierarchy h."""
+        if not self.active:
+            return
+        for inst in h.hierarchy:
+            name = h.absnames.get(id(inst.obj), inst.name)
+            for n, sub in inst.subs:
+                self.names.setdefault(id(sub), name)
+
+    def take(self):
+        """Return the block sections so far, and clear them."""
+        if not self.active:
+            return None
+        blocks = dict((n, [(p, s.time, s.calls, s.peak)
+                           for p, s in _ordered(passes)])
+                      for n, passes in self.blocks.items())
+        self.blocks = {}
+        return blocks
+
+    def merge(self, blocks):
+        """Account the block sections returned by take()."""
+        if not self.active or not blocks:
+            return
+        for n, passes in blocks.items():
+            table = self.blocks.setdefault(n, {})
+            for p, t, calls, peak in passes:
+                if p not in table:
+                    table[p] = _Stats(len(table))
+                table[p].add(t, peak, calls)
+
+    def timed(self, name, obj=None):
+        """Return a section of pass name, for obj if given."""
+        if not self.active:
+            return _nullSection
+        tables = []
+        if not self._open.get(name):
+            tables.append(self.passes)
+        if obj is not None and id(obj) in self.names:
+            tables.append(self.blocks.setdefault(self.names[id(obj)], {}))
+        stats = []
+        for table in tables:
+            if name not in table:
+                table[name] = _Stats(len(table))
+            stats.append(table[name])
+        return _Section(self, name, stats)
+
+    def _push(self, name):
+        self._open[name] = self._open.get(name, 0) + 1
+        if not self._tracing:
+            return
+        current, peak = tracemalloc.get_traced_memory()
+        if self._stack:
+            self._stack[-1][1] = max(self._stack[-1][1], peak)
+        tracemalloc.reset_peak()
+        self._stack.append([current, current])
+
+    def _pop(self, name):
+        self._open[name] -= 1
+        if not self._tracing:
+            return None
+        current, peak = tracemalloc.get_traced_memory()
+        start, high = self._stack.pop()
+        high = max(high, peak)
+        if self._stack:
+            self._stack[-1][1] = max(self._stack[-1][1], high)
+        return high - start
+
+
+def _ordered(table):
+    return sorted(table.items(), key=lambda item: item[1].order)
+
+
+_profiler = _Profiler()
+
+
+def _formatTable(report):
+    """Return the report as a human readable table."""
+    f = StringIO()
+    print("Conversion profile of %s (%s): %.3f s%s" %
+          (report['name'], report['hdl'], report['time'],
+           _peak(report['peak'], ", peak %s")), file=f)
+    for title, rows in (('pass', report['passes']),
+                        ('block', report['blocks'][:_TABLEBLOCKS])):
+        if not rows:
+            continue
+        print(file=f)
+        width = max([len(title)] + [len(r['name']) for r in rows])
+        print("%-*s %10s %8s %12s" % (width, title, 'time [s]', 'calls',
+                                      'peak'), file=f)
+        for r in rows:
+            print("%-*s %10.3f %8d %12s" % (width, r['name'], r['time'],
+                                            r['calls'], _peak(r['peak'])),
+                  file=f)
+    hidden = len(report['blocks']) - _TABLEBLOCKS
+    if hidden > 0:
+        print("(%d more blocks)" % hidden, file=f)
+    return f.getvalue()
+
+
+def _peak(peak, fmt="%s"):
+    if peak is None:
+        return ''
+    for unit in ('B', 'kB', 'MB'):
+        if peak < 1024:
+            break
+        peak /= 1024.0
+    else:
+        unit = 'GB'
+    if unit == 'B':
+        return fmt % ("%d B" % peak)
+    return fmt % ("%.1f %s" % (peak, unit))
+
+
+def _writeReport(report, directory=''):
+    """Write the report to a JSON file, and print it as a table."""
+    path = os.path.join(directory or '', report['name'] + '_profile.json')
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(_formatTable(report), end='')
+    print("Profile written to %s" % path)
+    return path
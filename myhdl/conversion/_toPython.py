@@ -0,0 +1,468 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  Copyright (C) 2003-2012 Jan Decaluwe
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+#
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+""" myhdl compiled simulation module.
+
+The bodies of @always, @always_comb and @always_seq processes are
+analyzed as for conversion. The annotated syntax tree is then turned
+into specialized Python code: signal reads become reads of the raw
+integer value, and next value assignments store the value directly
+after a precomputed bound check. Processes that the analyzer does not
+accept keep their interpreted body.
+
+"""
+from __future__ import absolute_import
+
+import ast
+import warnings
+from types import FunctionType
+
+from myhdl import ConversionError
+from myhdl._compat import integer_types
+from myhdl._intbv import intbv
+from myhdl._Signal import _Signal
+from myhdl._ShadowSignal import _TristateSignal, _TristateDriver
+from myhdl._simulator import _siglist
+from myhdl._always import _Always
+from myhdl._block import _Block
+from myhdl._extractHierarchy import _isMem, _getMemInfo
+from myhdl.conversion import _misc
+from myhdl.conversion._analyze import _analyzeGens
+
+
+class _error:
+    pass
+_error.NotCompiled = "Process keeps its interpreted body"
+_error.HasPrint = "print statements are not compiled"
+
+_SIGLIST = '_myhdl_siglist'
+_NEXTVAL = '_myhdl_nv'
+
+_arithOps = (ast.Add, ast.Sub, ast.Mult, ast.FloorDiv, ast.Mod)
+_bitOps = (ast.LShift, ast.RShift, ast.BitAnd, ast.BitOr, ast.BitXor)
+
+# next value assignment per signal type; the slow path through
+# _setNextVal handles bound errors and modbv wrap-around
+_setNextTemplates = {
+    intbv: """
+%(nv)s = VALUE
+if %(min)s <= %(nv)s < %(max)s:
+    %(sig)s._next._val = %(nv)s
+else:
+    %(sig)s._setNextVal(%(nv)s)
+""",
+    'unbounded': """
+%(sig)s._next._val = VALUE
+""",
+    bool: """
+%(nv)s = VALUE
+if %(nv)s in (0, 1):
+    %(sig)s._next = %(nv)s
+else:
+    %(sig)s._setNextVal(%(nv)s)
+""",
+    integer_types: """
+%(sig)s._next = VALUE
+""",
+}
+
+_scheduleTemplate = """
+if not %(sig)s._pending:
+    %(sig)s._pending = True
+    %(siglist)s.append(%(sig)s)
+"""
+
+
+def _parseExpr(s):
+    return ast.parse(s, mode='eval').body
+
+
+def _isRawSignal(obj):
+    """ Return True if the value of a signal can be read as a plain int """
+    if not isinstance(obj, _Signal):
+        return False
+    if isinstance(obj, (_TristateSignal, _TristateDriver)):
+        return False
+    return obj._type in (bool, integer_types, intbv) and obj._init is not None
+
+
+def _isConst(node):
+    return isinstance(node, ast.Constant) and isinstance(node.value, integer_types)
+
+
+class _ValueSubstituter(ast.NodeTransformer):
+
+    def __init__(self, value):
+        self.value = value
+
+    def visit_Name(self, node):
+        if node.id == 'VALUE':
+            return self.value
+        return node
+
+
+class _CompileVisitor(ast.NodeTransformer):
+
+    """ Rewrite an analyzed process body for compiled simulation.
+
+    A signal is only read as a raw int in a context where that gives
+    the same result as the signal itself, such as an arithmetic operand
+    or a condition. Elsewhere, e.g. as a function argument or as the
+    object of an attribute such as next, it is left alone, so that
+    width-dependent operations still see an intbv.
+    """
+
+    def __init__(self, tree):
+        self.tree = tree
+        self.raw = False
+        self.helpers = {_SIGLIST: _siglist}
+
+    def visitRaw(self, node, raw):
+        saved = self.raw
+        self.raw = raw
+        node = self.visit(node)
+        self.raw = saved
+        return node
+
+    def isRaw(self, node):
+        """ Return True if an expression evaluates to a plain int or bool """
+        if getattr(node, 'raw', False) or _isConst(node):
+            return True
+        if isinstance(node, ast.Name):
+            obj = getattr(node, 'obj', None)
+            return isinstance(obj, integer_types) and not isinstance(obj, intbv)
+        return False
+
+    def isNumeric(self, node):
+        if self.isRaw(node):
+            return True
+        return isinstance(getattr(node, 'obj', None), (intbv, _Signal))
+
+    def rawRead(self, node, sig):
+        if sig._type is intbv:
+            expr = _parseExpr("%s._val._val" % node.id)
+        else:
+            expr = _parseExpr("%s._val" % node.id)
+        expr.raw = True
+        expr.sig = sig
+        expr.nrbits = sig._nrbits
+        return ast.copy_location(expr, node)
+
+    def visit_Name(self, node):
+        if node.id in self.tree.objlist:
+            # a name that the analyzer made up for an attribute reference
+            self.helpers[node.id] = self.tree.symdict[node.id]
+        if self.raw and isinstance(node.ctx, ast.Load) and \
+           _isRawSignal(getattr(node, 'obj', None)):
+            return self.rawRead(node, node.obj)
+        return node
+
+    def visit_BinOp(self, node):
+        if isinstance(node.op, _arithOps):
+            # intbv and Signal arithmetic returns a plain int anyway
+            node.left = self.visitRaw(node.left, True)
+            node.right = self.visitRaw(node.right, True)
+            node.raw = self.isNumeric(node.left) and self.isNumeric(node.right)
+        elif isinstance(node.op, _bitOps):
+            # intbv bit operations return an intbv
+            node.left = self.visit(node.left)
+            node.right = self.visit(node.right)
+            node.raw = self.isRaw(node.left) and self.isRaw(node.right)
+        else:
+            node.left = self.visitRaw(node.left, False)
+            node.right = self.visitRaw(node.right, False)
+        return node
+
+    def visit_UnaryOp(self, node):
+        if isinstance(node.op, ast.Invert):
+            node.operand = self.visit(node.operand)
+            operand = node.operand
+            if getattr(operand, 'raw', False) and getattr(operand, 'nrbits', 0):
+                sig = getattr(operand, 'sig', None)
+                if sig is None or (sig._type is intbv and sig.min >= 0):
+                    # like intbv.__invert__ for a sized unsigned value
+                    mask = (1 << operand.nrbits) - 1
+                    expr = ast.BinOp(left=operand, op=ast.BitXor(),
+                                     right=_parseExpr(str(mask)))
+                    expr = ast.copy_location(expr, node)
+                    expr.raw = True
+                    return expr
+            node.raw = self.isRaw(operand)
+        else:
+            node.operand = self.visitRaw(node.operand, True)
+            node.raw = self.isNumeric(node.operand)
+        return node
+
+    def visit_Compare(self, node):
+        node.left = self.visitRaw(node.left, True)
+        node.comparators = [self.visitRaw(n, True) for n in node.comparators]
+        node.raw = True
+        return node
+
+    def visit_BoolOp(self, node):
+        node.values = [self.visit(n) for n in node.values]
+        node.raw = all(self.isRaw(n) for n in node.values)
+        return node
+
+    def visit_IfExp(self, node):
+        node.test = self.visitRaw(node.test, True)
+        node.body = self.visit(node.body)
+        node.orelse = self.visit(node.orelse)
+        node.raw = self.isRaw(node.body) and self.isRaw(node.orelse)
+        return node
+
+    def visit_If(self, node):
+        node.test = self.visitRaw(node.test, True)
+        node.body = self.visitList(node.body)
+        node.orelse = self.visitList(node.orelse)
+        return node
+
+    def visit_While(self, node):
+        node.test = self.visitRaw(node.test, True)
+        node.body = self.visitList(node.body)
+        node.orelse = self.visitList(node.orelse)
+        return node
+
+    def visit_Attribute(self, node):
+        # attributes such as next or max belong to the signal itself
+        node.value = self.visitRaw(node.value, False)
+        return node
+
+    def visit_Call(self, node):
+        node.func = self.visitRaw(node.func, False)
+        node.args = [self.visitRaw(n, False) for n in node.args]
+        for kw in node.keywords:
+            kw.value = self.visitRaw(kw.value, False)
+        func = node.func
+        if isinstance(func, ast.Name) and func.id in ('int', 'bool', 'len'):
+            node.raw = True
+        return node
+
+    def visitList(self, nodes):
+        saved = self.raw
+        self.raw = False
+        result = []
+        for n in nodes:
+            n = self.visit(n)
+            if isinstance(n, list):
+                result.extend(n)
+            else:
+                result.append(n)
+        self.raw = saved
+        return result
+
+    def visit_Subscript(self, node):
+        value = node.value
+        sl = node.slice
+        if isinstance(sl, getattr(ast, 'Index', ())):  # before Python 3.9
+            sl = sl.value
+        if isinstance(node.ctx, ast.Load) and self.raw and \
+           isinstance(value, ast.Name) and _isRawSignal(getattr(value, 'obj', None)) and \
+           value.obj._type is intbv:
+            read = self.rawRead(value, value.obj)
+            if isinstance(sl, ast.Slice):
+                if sl.step is None and sl.lower is not None and _isConst(sl.lower) and \
+                   (sl.upper is None or _isConst(sl.upper)):
+                    i = sl.lower.value
+                    j = sl.upper.value if sl.upper is not None else 0
+                    if i > j >= 0:
+                        mask = (1 << i) - 1
+                        expr = ast.BinOp(left=read, op=ast.BitAnd(),
+                                         right=_parseExpr(str(mask)))
+                        if j:
+                            expr = ast.BinOp(left=expr, op=ast.RShift(),
+                                             right=_parseExpr(str(j)))
+                        expr = ast.copy_location(expr, node)
+                        expr.raw = True
+                        expr.nrbits = i - j
+                        return expr
+            else:
+                index = self.visitRaw(sl, True)
+                # compare to get a bool, as intbv indexing does
+                if _isConst(index):
+                    expr = ast.Compare(
+                        left=ast.BinOp(left=read, op=ast.BitAnd(),
+                                       right=_parseExpr(str(1 << index.value))),
+                        ops=[ast.NotEq()], comparators=[_parseExpr('0')])
+                else:
+                    expr = ast.Compare(
+                        left=ast.BinOp(left=ast.BinOp(left=read, op=ast.RShift(), right=index),
+                                       op=ast.BitAnd(), right=_parseExpr('1')),
+                        ops=[ast.Eq()], comparators=[_parseExpr('1')])
+                expr = ast.copy_location(expr, node)
+                expr.raw = True
+                return expr
+        node.value = self.visitRaw(node.value, False)
+        node.slice = self.visitRaw(node.slice, True)
+        return node
+
+    def visit_AugAssign(self, node):
+        node.target = self.visitRaw(node.target, False)
+        node.value = self.visitRaw(node.value, isinstance(node.op, _arithOps))
+        return node
+
+    def visit_Assign(self, node):
+        target = node.targets[0]
+        if len(node.targets) == 1 and isinstance(target, ast.Attribute) and \
+           target.attr == 'next' and isinstance(target.value, ast.Name) and \
+           _isRawSignal(getattr(target.value, 'obj', None)):
+            sig = target.value.obj
+            name = self.visit(target.value).id
+            value = self.visitRaw(node.value, True)
+            if not self.isRaw(value):
+                node.value = value
+                return node
+            if sig._type is intbv:
+                if sig.min is None or sig.max is None:
+                    template = _setNextTemplates['unbounded']
+                else:
+                    template = _setNextTemplates[intbv]
+            else:
+                template = _setNextTemplates[sig._type]
+            src = template % dict(nv=_NEXTVAL, sig=name, min=sig.min, max=sig.max)
+            src += _scheduleTemplate % dict(sig=name, siglist=_SIGLIST)
+            stmts = ast.parse(src).body
+            stmts[0] = _ValueSubstituter(value).visit(stmts[0])
+            keep = set(id(n) for n in ast.walk(value))
+            for stmt in stmts:
+                for n in ast.walk(stmt):
+                    if id(n) not in keep and 'lineno' in n._attributes:
+                        ast.copy_location(n, node)
+            return stmts
+        node.targets = [self.visitRaw(t, False) for t in node.targets]
+        node.value = self.visitRaw(node.value, False)
+        return node
+
+
+def _analyze(g):
+    """ Analyze a process as for conversion, without side effects
+
+    The analyzer marks the signals and memories that a process reads
+    and drives, and numbers its labels. This is undone afterwards, so
+    that a later conversion of the design is not affected.
+    """
+    objs = []
+    todo = list(g.sigdict.values())
+    for los in g.losdict.values():
+        todo.extend(los)
+        if _isMem(los):
+            objs.append(_getMemInfo(los))
+    seen = set()
+    while todo:
+        s = todo.pop()
+        if not isinstance(s, _Signal) or id(s) in seen:
+            continue
+        seen.add(id(s))
+        objs.append(s)
+        todo.append(getattr(s, '_sig', None))
+        todo.extend(getattr(s, '_sigargs', ()))
+    attrs = ('_driven', '_read', '_source')
+    saved = [(obj, [(a, getattr(obj, a)) for a in attrs if hasattr(obj, a)])
+             for obj in objs]
+    labels = _misc._genLabel
+    _misc._genLabel = _misc._LabelGenerator()
+    try:
+        for obj in objs:
+            obj._driven = None
+        return _analyzeGens([g], {})[0]
+    finally:
+        _misc._genLabel = labels
+        for obj, values in saved:
+            for a, v in values:
+                setattr(obj, a, v)
+
+
+def _compileFunc(g):
+    """ Return a compiled version of the function of an _Always instance """
+    func = g.func
+    tree = _analyze(g)
+    if tree.hasPrint:
+        # the analyzer rewrites the arguments of print calls
+        _warnNotCompiled(g, _error.HasPrint)
+        return func
+    fdef = tree.body[0]
+    fdef.decorator_list = []
+    v = _CompileVisitor(tree)
+    fdef.body = v.visitList(fdef.body)
+    if not fdef.body:
+        fdef.body = [ast.Pass()]
+    # wrap the function in a factory, so that its free variables and
+    # the helpers become closure variables
+    freevars = func.__code__.co_freevars
+    helpers = sorted(v.helpers)
+    factory = ast.parse("def _myhdl_factory(%s):\n    return %s" %
+                        (', '.join(helpers), fdef.name)).body[0]
+    body = [fdef]
+    if freevars:
+        body.insert(0, ast.parse("%s = None" % ' = '.join(freevars)).body[0])
+    factory.body[:0] = body
+    module = ast.Module(body=[factory], type_ignores=[])
+    ast.fix_missing_locations(module)
+    ast.increment_lineno(module, tree.lineoffset)
+    code = compile(module, tree.sourcefile, 'exec', dont_inherit=True)
+    namespace = {}
+    exec(code, func.__globals__, namespace)
+    inner = namespace['_myhdl_factory'](*[v.helpers[n] for n in helpers])
+    cells = dict(zip(freevars, func.__closure__ or ()))
+    closure = tuple(cells.get(n, c) for n, c in
+                    zip(inner.__code__.co_freevars, inner.__closure__ or ()))
+    return FunctionType(inner.__code__, func.__globals__, func.__name__,
+                        func.__defaults__, closure or None)
+
+
+def _warnNotCompiled(g, reason):
+    code = g.func.__code__
+    warnings.warn_explicit("%s: %s: %s" % (_error.NotCompiled, g.name, reason),
+                           RuntimeWarning, code.co_filename,
+                           code.co_firstlineno)
+
+
+def _compileGens(top):
+    """ Compile the processes in a design for simulation
+
+    Return the list of instances that were compiled.
+    """
+    compiled = []
+    todo = [top]
+    while todo:
+        inst = todo.pop()
+        if isinstance(inst, _Block):
+            todo.extend(inst.subs)
+        elif isinstance(inst, _Always):
+            try:
+                simfunc = _compileFunc(inst)
+            except ConversionError as e:
+                # not supported by the analyzer: keep the interpreted body
+                _warnNotCompiled(inst, e)
+                continue
+            if simfunc is not inst.func:
+                inst.simfunc = simfunc
+                compiled.append(inst)
+    return compiled
+
+
+def _uncompileGens(top):
+    """ Restore the interpreted bodies of the processes in a design """
+    todo = [top]
+    while todo:
+        inst = todo.pop()
+        if isinstance(inst, _Block):
+            todo.extend(inst.subs)
+        elif isinstance(inst, _Always):
+            inst.simfunc = inst.func
@@ -57,7 +57,12 @@ from myhdl._util import _flatten
 from myhdl._compat import integer_types, class_types, StringIO
 from myhdl._ShadowSignal import _TristateSignal, _TristateDriver
 from myhdl._block import _Block
+from myhdl._Clock import Clock
 from myhdl._getHierarchy import _getHierarchy
+from myhdl.conversion._modules import _ModulePlan
+from myhdl.conversion._cache import _options
+from myhdl.conversion._parallel import _renderGens, _SpillFile
+from myhdl.conversion._profile import _profiler
 from myhdl.conversion._misc import (_error, _kind, _context,
                                     _ConversionMixin, _Label, _genUniqueSuffix, _isConstant)
 from myhdl.conversion._analyze import (_analyzeSigs, _analyzeGens, _analyzeTopFunc,
@@ -76,6 +81,8 @@ _enumPortTypeSet = set()
 
 def _checkArgs(arglist):
     for arg in arglist:
+        if isinstance(arg, Clock):
+            raise ToVHDLError(_error.ClockNotConvertible)
         if not isinstance(arg, (GeneratorType, _Instantiator, _UserVhdlCode)):
             raise ToVHDLError(_error.ArgType, arg)
 
@@ -121,7 +128,10 @@ class _ToVHDLConvertor(object):
                  "use_clauses",
                  "architecture",
                  "std_logic_ports",
-                 "initial_values"
+                 "initial_values",
+                 "hierarchical",
+                 "cache",
+                 "jobs"
                  )
 
     def __init__(self):
@@ -136,6 +146,9 @@ class _ToVHDLConvertor(object):
         self.architecture = "MyHDL"
         self.std_logic_ports = False
         self.initial_values = False
+        self.hierarchical = False
+        self.cache = None
+        self.jobs = 1
 
     def __call__(self, func, *args, **kwargs):
         global _converting
@@ -164,14 +177,16 @@ class _ToVHDLConvertor(object):
 
         if isinstance(func, _Block):
             try:
-                h = _getHierarchy(name, func)
+                with _profiler.timed('getHierarchy'):
+                    h = _getHierarchy(name, func)
             finally:
                 _converting = 0
         else:
             warnings.warn(
                 "\n    toVHDL(): Deprecated usage: See http://dev.myhdl.org/meps/mep-114.html", stacklevel=2)
             try:
-                h = _HierExtr(name, func, *args, **kwargs)
+                with _profiler.timed('getHierarchy'):
+                    h = _HierExtr(name, func, *args, **kwargs)
             finally:
                 _converting = 0
 
@@ -180,9 +195,6 @@ class _ToVHDLConvertor(object):
         else:
             directory = self.directory
 
-        compDecls = self.component_declarations
-        useClauses = self.use_clauses
-
         vpath = os.path.join(directory, name + ".vhd")
         vfile = open(vpath, 'w')
         ppath = os.path.join(directory, "pck_myhdl_%s.vhd" % _shortversion)
@@ -194,26 +206,79 @@ class _ToVHDLConvertor(object):
         if not self.no_myhdl_package:
             pfile = open(ppath, 'w')
 
+        if pfile:
+            with _profiler.timed('writePackage'):
+                _writeFileHeader(pfile, ppath)
+                print(_package, file=pfile)
+                pfile.close()
+
+        _writeFileHeader(vfile, vpath)
+        if self.hierarchical and isinstance(func, _Block):
+            with _profiler.timed('planModules'):
+                plan = _ModulePlan(func, name, 'VHDL', self.cache,
+                                   _options(self, {}))
+            try:
+                for m in plan.modules:
+                    text = plan.load(m)
+                    if text is None:
+                        mfile = StringIO()
+                        mh = plan.hierarchy(m)
+                        intf, siglist, memlist = self._convertModule(
+                            mh, m.block, m.name, mfile, top=False)
+                        plan.record(m, intf)
+                        plan.cleanup(intf, siglist, memlist)
+                        text = mfile.getvalue()
+                        plan.store(m, text)
+                    vfile.write(text)
+                    print(file=vfile)
+                h = plan.hierarchy(plan.topmodule, name)
+                intf, siglist, memlist = self._convertModule(h, func, name,
+                                                             vfile)
+            finally:
+                plan.restore()
+        else:
+            intf, siglist, memlist = self._convertModule(h, func, name, vfile,
+                                                         args=args,
+                                                         kwargs=kwargs)
+
+        with _profiler.timed('writeFile'):
+            vfile.close()
+        # tbfile.close()
+
+        ### clean-up properly ###
+        self._cleanup(siglist, memlist)
+
+        return h.top
+
+    def _convertModule(self, h, func, name, vfile, args=(), kwargs={},
+                       top=True):
+        """Convert a hierarchy to an entity, and return its interface."""
         ### initialize properly ###
         _genUniqueSuffix.reset()
         _enumTypeSet.clear()
         _slice_constDict.clear()
         _enumPortTypeSet.clear()
+        del _usedNames[:]
+        _profiler.hierarchy(h)
 
         arglist = _flatten(h.top)
         _checkArgs(arglist)
-        genlist = _analyzeGens(arglist, h.absnames)
-        siglist, memlist = _analyzeSigs(h.hierarchy, hdl='VHDL')
+        with _profiler.timed('analyzeGens'):
+            genlist = _analyzeGens(arglist, h.absnames)
+        with _profiler.timed('analyzeSigs'):
+            siglist, memlist = _analyzeSigs(h.hierarchy, hdl='VHDL')
         # print h.top
-        _annotateTypes(genlist)
+        with _profiler.timed('annotateTypes'):
+            _annotateTypes(genlist)
 
         # infer interface
-        if isinstance(func, _Block):
-            # infer interface after signals have been analyzed
-            func._inferInterface()
-            intf = func
-        else:
-            intf = _analyzeTopFunc(func, *args, **kwargs)
+        with _profiler.timed('inferInterface'):
+            if isinstance(func, _Block):
+                # infer interface after signals have been analyzed
+                func._inferInterface()
+                intf = func
+            else:
+                intf = _analyzeTopFunc(func, *args, **kwargs)
         intf.name = name
         # sanity checks on interface
         for portname in intf.argnames:
@@ -236,34 +301,27 @@ class _ToVHDLConvertor(object):
         needPck = len(_enumPortTypeSet) > 0
         lib = self.library
         arch = self.architecture
-        stdLogicPorts = self.std_logic_ports
+        # only the ports of the top entity are converted
+        stdLogicPorts = self.std_logic_ports and top
+        compDecls = self.component_declarations
+        useClauses = self.use_clauses
 
         self._convert_filter(h, intf, siglist, memlist, genlist)
 
-        if pfile:
-            _writeFileHeader(pfile, ppath)
-            print(_package, file=pfile)
-            pfile.close()
-
-        _writeFileHeader(vfile, vpath)
-        if needPck:
-            _writeCustomPackage(vfile, intf)
-        _writeModuleHeader(vfile, intf, needPck, lib, arch, useClauses, doc, stdLogicPorts)
-        _writeFuncDecls(vfile)
-        _writeConstants(vfile)
-        _writeTypeDefs(vfile)
-        _writeSigDecls(vfile, intf, siglist, memlist)
-        _writeCompDecls(vfile, compDecls)
-        _convertGens(genlist, siglist, memlist, vfile)
+        with _profiler.timed('writeSigDecls'):
+            if needPck:
+                _writeCustomPackage(vfile, intf)
+            _writeModuleHeader(vfile, intf, needPck, lib, arch, useClauses, doc, stdLogicPorts)
+            _writeFuncDecls(vfile)
+            _writeConstants(vfile)
+            _writeTypeDefs(vfile)
+            _writeSigDecls(vfile, intf, siglist, memlist)
+            _writeCompDecls(vfile, compDecls)
+        with _profiler.timed('convertGens'):
+            _convertGens(genlist, siglist, memlist, vfile, self.jobs)
         _writeModuleFooter(vfile, arch)
 
-        vfile.close()
-        # tbfile.close()
-
-        ### clean-up properly ###
-        self._cleanup(siglist, memlist)
-
-        return h.top
+        return intf, siglist, memlist
 
     def _cleanup(self, siglist, memlist):
         # clean up signals
@@ -282,6 +340,9 @@ class _ToVHDLConvertor(object):
         self.no_myhdl_package = False
         self.architecture = "MyHDL"
         self.std_logic_ports = False
+        self.hierarchical = False
+        self.cache = None
+        self.jobs = 1
 
     def _convert_filter(self, h, intf, siglist, memlist, genlist):
         # intended to be a entry point for other uses:
@@ -604,9 +665,7 @@ def _getTypeString(s):
         return 'unsigned'
 
 
-def _convertGens(genlist, siglist, memlist, vfile):
-    blockBuf = StringIO()
-    funcBuf = StringIO()
+def _renderTrees(genlist, blockBuf, funcBuf):
     for tree in genlist:
         if isinstance(tree, _UserVhdlCode):
             blockBuf.write(str(tree))
@@ -623,52 +682,62 @@ def _convertGens(genlist, siglist, memlist, vfile):
             Visitor = _ConvertAlwaysSeqVisitor
         else:  # ALWAYS_COMB
             Visitor = _ConvertAlwaysCombVisitor
-        v = Visitor(tree, blockBuf, funcBuf)
-        v.visit(tree)
-    vfile.write(funcBuf.getvalue())
-    funcBuf.close()
-    print("begin", file=vfile)
-    print(file=vfile)
-    for st in portConversions:
-        print(st, file=vfile)
-    print(file=vfile)
-    for s in constwires:
-        if s._type is bool:
-            c = int(s._val)
-            pre, suf = "'", "'"
-        elif s._type is intbv:
-            c = int(s._val)
-            w = len(s)
-            assert w != 0
-            if s._min < 0:
-                if w <= 31:
-                    pre, suf = "to_signed(", ", %s)" % w
+        with _profiler.timed('convertGens', tree):
+            v = Visitor(tree, blockBuf, funcBuf)
+            v.visit(tree)
+
+
+def _convertGens(genlist, siglist, memlist, vfile, jobs=1):
+    # the code is spilled to files, and copied to the output in order
+    blockFile = _SpillFile()
+    funcFile = _SpillFile()
+    try:
+        _renderGens(_renderTrees, genlist, blockFile, funcFile, jobs)
+        funcFile.copy(vfile)
+        print("begin", file=vfile)
+        print(file=vfile)
+        for st in portConversions:
+            print(st, file=vfile)
+        print(file=vfile)
+        for s in constwires:
+            if s._type is bool:
+                c = int(s._val)
+                pre, suf = "'", "'"
+            elif s._type is intbv:
+                c = int(s._val)
+                w = len(s)
+                assert w != 0
+                if s._min < 0:
+                    if w <= 31:
+                        pre, suf = "to_signed(", ", %s)" % w
+                    else:
+                        pre, suf = "signed'(", ")"
+                        c = '"%s"' % tobin(c, w)
                 else:
-                    pre, suf = "signed'(", ")"
-                    c = '"%s"' % tobin(c, w)
+                    if w <= 31:
+                        pre, suf = "to_unsigned(", ", %s)" % w
+                    else:
+                        pre, suf = "unsigned'(", ")"
+                        c = '"%s"' % tobin(c, w)
             else:
-                if w <= 31:
-                    pre, suf = "to_unsigned(", ", %s)" % w
-                else:
-                    pre, suf = "unsigned'(", ")"
-                    c = '"%s"' % tobin(c, w)
-        else:
-            raise ToVHDLError("Unexpected type for constant signal", s._name)
-        print("%s <= %s%s%s;" % (s._name, pre, c, suf), file=vfile)
-    print(file=vfile)
-    # shadow signal assignments
-    for s in siglist:
-        if hasattr(s, 'toVHDL') and s._read:
-            print(s.toVHDL(), file=vfile)
-    # hack for slice signals in a list
-    for m in memlist:
-        if m._read:
-            for s in m.mem:
-                if hasattr(s, 'toVHDL'):
-                    print(s.toVHDL(), file=vfile)
-    print(file=vfile)
-    vfile.write(blockBuf.getvalue())
-    blockBuf.close()
+                raise ToVHDLError("Unexpected type for constant signal", s._name)
+            print("%s <= %s%s%s;" % (s._name, pre, c, suf), file=vfile)
+        print(file=vfile)
+        # shadow signal assignments
+        for s in siglist:
+            if hasattr(s, 'toVHDL') and s._read:
+                print(s.toVHDL(), file=vfile)
+        # hack for slice signals in a list
+        for m in memlist:
+            if m._read:
+                for s in m.mem:
+                    if hasattr(s, 'toVHDL'):
+                        print(s.toVHDL(), file=vfile)
+        print(file=vfile)
+        blockFile.copy(vfile)
+    finally:
+        funcFile.close()
+        blockFile.close()
 
 
 opmap = {
@@ -2498,5 +2567,6 @@ def _annotateTypes(genlist):
     for tree in genlist:
         if isinstance(tree, _UserVhdlCode):
             continue
-        v = _AnnotateTypesVisitor(tree)
-        v.visit(tree)
+        with _profiler.timed('annotateTypes', tree):
+            v = _AnnotateTypesVisitor(tree)
+            v.visit(tree)
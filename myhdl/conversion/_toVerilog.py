@@ -54,8 +54,13 @@ from myhdl._Signal import _Signal
 from myhdl._ShadowSignal import _TristateSignal, _TristateDriver
 
 from myhdl._block import _Block
+from myhdl._Clock import Clock
 from myhdl._blackbox import SynthesisObject
 from myhdl._getHierarchy import _getHierarchy
+from myhdl.conversion._modules import _ModulePlan
+from myhdl.conversion._cache import _options
+from myhdl.conversion._parallel import _renderGens, _SpillFile
+from myhdl.conversion._profile import _profiler
 
 _converting = 0
 _profileFunc = None
@@ -63,6 +68,8 @@ _profileFunc = None
 
 def _checkArgs(arglist):
     for arg in arglist:
+        if isinstance(arg, Clock):
+            raise ToVerilogError(_error.ClockNotConvertible)
         if not isinstance(arg, (GeneratorType, _Instantiator, _UserVerilogCode, SynthesisObject)):
             raise ToVerilogError(_error.ArgType, arg)
 
@@ -110,7 +117,10 @@ class _ToVerilogConvertor(object):
                  "portmap",
                  "trace",
                  "initial_values",
-                 "name_prefix"
+                 "name_prefix",
+                 "hierarchical",
+                 "cache",
+                 "jobs"
                  )
 
     def __init__(self):
@@ -126,6 +136,9 @@ class _ToVerilogConvertor(object):
         self.trace = False
         self.name_prefix = ""
         self.initial_values = False
+        self.hierarchical = False
+        self.cache = None
+        self.jobs = 1
 
     def __call__(self, func, *args, **kwargs):
         global _converting
@@ -151,14 +164,16 @@ class _ToVerilogConvertor(object):
 
         if isinstance(func, _Block):
             try:
-                h = _getHierarchy(name, func)
+                with _profiler.timed('getHierarchy'):
+                    h = _getHierarchy(name, func)
             finally:
                 _converting = 0
         else:
             warnings.warn(
                 "\n    toVerilog(): Deprecated usage: See http://dev.myhdl.org/meps/mep-114.html", stacklevel=2)
             try:
-                h = _HierExtr(name, func, *args, **kwargs)
+                with _profiler.timed('getHierarchy'):
+                    h = _HierExtr(name, func, *args, **kwargs)
             finally:
                 _converting = 0
 
@@ -170,44 +185,40 @@ class _ToVerilogConvertor(object):
         vfilename = name + ".v"
         vpath = os.path.join(directory, vfilename)
         vfile = open(vpath, 'w')
-
-        ### initialize properly ###
-        _genUniqueSuffix.reset()
-        arglist = _flatten(h.top)
-        # print h.top
-        _checkArgs(arglist)
-        genlist = _analyzeGens(arglist, h.absnames)
-        siglist, memlist = _analyzeSigs(h.hierarchy)
-        _annotateTypes(genlist)
-
-        # infer interface
-        if isinstance(func, _Block):
-            # infer interface after signals have been analyzed
-            func._inferInterface()
-            intf = func
-        else:
-            intf = _analyzeTopFunc(func, *args, **kwargs)
-        
-        # don't write testbench if module has no ports
-        if len(intf.argnames) > 0 and not toVerilog.no_testbench:
+        tbpath = None
+        if not toVerilog.no_testbench:
             tbpath = os.path.join(directory, "tb_" + vfilename)
-            tbfile = open(tbpath, 'w')
-            _writeTestBench(tbfile, intf, self.trace)
-            tbfile.close()
-
-        intf.name = self.name_prefix + name
-
-        doc = _makeDoc(inspect.getdoc(func))
-
-        self._convert_filter(h, intf, siglist, memlist, genlist)
 
         _writeFileHeader(vfile, vpath, self.timescale)
-        _writeModuleHeader(vfile, intf, doc)
-        _writeSigDecls(vfile, intf, siglist, memlist)
-        _convertGens(genlist, vfile)
-        _writeModuleFooter(vfile)
+        if self.hierarchical and isinstance(func, _Block):
+            with _profiler.timed('planModules'):
+                plan = _ModulePlan(func, name, 'Verilog', self.cache,
+                                   _options(self, {}))
+            try:
+                for m in plan.modules:
+                    text = plan.load(m)
+                    if text is None:
+                        mfile = StringIO()
+                        mh = plan.hierarchy(m)
+                        intf, siglist, memlist = self._convertModule(
+                            mh, m.block, m.name, mfile)
+                        plan.record(m, intf)
+                        plan.cleanup(intf, siglist, memlist)
+                        text = mfile.getvalue()
+                        plan.store(m, text)
+                    vfile.write(text)
+                    print(file=vfile)
+                h = plan.hierarchy(plan.topmodule, name)
+                intf, siglist, memlist = self._convertModule(h, func, name,
+                                                             vfile, tbpath)
+            finally:
+                plan.restore()
+        else:
+            intf, siglist, memlist = self._convertModule(h, func, name, vfile,
+                                                         tbpath, args, kwargs)
 
-        vfile.close()
+        with _profiler.timed('writeFile'):
+            vfile.close()
 
 
         # build portmap for cosimulation
@@ -224,6 +235,53 @@ class _ToVerilogConvertor(object):
 
         return h.top
 
+    def _convertModule(self, h, func, name, vfile, tbpath=None,
+                       args=(), kwargs={}):
+        """Convert a hierarchy to a module, and return its interface."""
+        ### initialize properly ###
+        _genUniqueSuffix.reset()
+        _profiler.hierarchy(h)
+        arglist = _flatten(h.top)
+        # print h.top
+        _checkArgs(arglist)
+        with _profiler.timed('analyzeGens'):
+            genlist = _analyzeGens(arglist, h.absnames)
+        with _profiler.timed('analyzeSigs'):
+            siglist, memlist = _analyzeSigs(h.hierarchy)
+        with _profiler.timed('annotateTypes'):
+            _annotateTypes(genlist)
+
+        # infer interface
+        with _profiler.timed('inferInterface'):
+            if isinstance(func, _Block):
+                # infer interface after signals have been analyzed
+                func._inferInterface()
+                intf = func
+            else:
+                intf = _analyzeTopFunc(func, *args, **kwargs)
+        
+        # don't write testbench if module has no ports
+        if len(intf.argnames) > 0 and tbpath is not None:
+            with _profiler.timed('writeTestBench'):
+                tbfile = open(tbpath, 'w')
+                _writeTestBench(tbfile, intf, self.trace)
+                tbfile.close()
+
+        intf.name = self.name_prefix + name
+
+        doc = _makeDoc(inspect.getdoc(func))
+
+        self._convert_filter(h, intf, siglist, memlist, genlist)
+
+        with _profiler.timed('writeSigDecls'):
+            _writeModuleHeader(vfile, intf, doc)
+            _writeSigDecls(vfile, intf, siglist, memlist)
+        with _profiler.timed('convertGens'):
+            _convertGens(genlist, vfile, self.jobs)
+        _writeModuleFooter(vfile)
+
+        return intf, siglist, memlist
+
     def _cleanup(self, siglist, memlist):
         # clean up signals
         for sig in siglist:
@@ -235,6 +293,9 @@ class _ToVerilogConvertor(object):
 
         # clean up attributes
         self.name = None
+        self.hierarchical = False
+        self.cache = None
+        self.jobs = 1
         self.standard = '2001'
         self.prefer_blocking_assignments = True
         self.radix = ''
@@ -502,9 +563,7 @@ def _intRepr(n, radix=''):
         r = "(-%s)" % r
     return r
 
-def _convertGens(genlist, vfile):
-    blockBuf = StringIO()
-    funcBuf = StringIO()
+def _renderTrees(genlist, blockBuf, funcBuf):
     for tree in genlist:
         if isinstance(tree, _UserVerilogCode):
             blockBuf.write(str(tree))
@@ -521,12 +580,22 @@ def _convertGens(genlist, vfile):
             Visitor = _ConvertAlwaysSeqVisitor
         else:  # ALWAYS_COMB
             Visitor = _ConvertAlwaysCombVisitor
-        v = Visitor(tree, blockBuf, funcBuf)
-        v.visit(tree)
-    vfile.write(funcBuf.getvalue())
-    funcBuf.close()
-    vfile.write(blockBuf.getvalue())
-    blockBuf.close()
+        with _profiler.timed('convertGens', tree):
+            v = Visitor(tree, blockBuf, funcBuf)
+            v.visit(tree)
+
+
+def _convertGens(genlist, vfile, jobs=1):
+    # the code is spilled to files, and copied to the output in order
+    blockFile = _SpillFile()
+    funcFile = _SpillFile()
+    try:
+        _renderGens(_renderTrees, genlist, blockFile, funcFile, jobs)
+        funcFile.copy(vfile)
+        blockFile.copy(vfile)
+    finally:
+        funcFile.close()
+        blockFile.close()
 
 
 opmap = {
@@ -1657,5 +1726,6 @@ def _annotateTypes(genlist):
     for tree in genlist:
         if isinstance(tree, _UserVerilogCode):
             continue
-        v = _AnnotateTypesVisitor(tree)
-        v.visit(tree)
+        with _profiler.timed('annotateTypes', tree):
+            v = _AnnotateTypesVisitor(tree)
+            v.visit(tree)
@@ -19,6 +19,7 @@ from myhdl.conversion._misc import (_error, _kind, _context,
 
 from myhdl.conversion.analyze_ng import (_analyzeGens,
 									   _Ram, _Rom, _enumTypeSet, _slice_constDict)
+from myhdl.conversion._profile import _profiler
 
 
 from myhdl import intbv, concat, delay
@@ -1150,7 +1151,9 @@ def convert_hierarchy(h, func, design, trace = False):
 			h.instdict[inst.name] = inst
 		else:
 			print(REDBG + "Instance %s not found" % inst.name + OFF)
-		inst.analyze_signals()
+		_profiler.name(inst, inst.name)
+		with _profiler.timed('analyzeSigs', inst):
+			inst.analyze_signals()
 
 	# Walk from bottom level to top level
 	for inst in sorted(h.hierarchy):
@@ -1166,17 +1169,21 @@ def convert_hierarchy(h, func, design, trace = False):
 		# inst.dump()
 		inst.instances = block_instances
 
-		inst.genlist = _analyzeGens(inst, l, h.absnames)
+		with _profiler.timed('analyzeGens', inst):
+			inst.genlist = _analyzeGens(inst, l, h.absnames)
 
 		print(GREEN + "========================================================" + OFF)
 		print(GREEN + "CREATE Module: '%s'" % inst.name + OFF)
 
 		if not inst.cell:
 			if isinstance(inst.obj, _BlackBox):
-				infer_rtl(h, inst, design)
+				with _profiler.timed('inferRTL', inst):
+					infer_rtl(h, inst, design)
 			else:
-				convert_rtl(h, inst, design)
-				wireup_rtl(h, inst, design)
+				with _profiler.timed('convertRTL', inst):
+					convert_rtl(h, inst, design)
+				with _profiler.timed('wireupRTL', inst):
+					wireup_rtl(h, inst, design)
 
 
 	top = h.hierarchy[0]
@@ -1185,10 +1192,11 @@ def convert_hierarchy(h, func, design, trace = False):
 
 	if write_tb:
 		tbname = top.name
-		tbfile = open("tb_%s_mapped.v" % tbname, 'w')
-		top.obj.name = tbname # Hack to overwrite DUT name
-		_writeTestBench(tbfile, top.obj, trace, "1ps/1ps")
-		tbfile.close()
+		with _profiler.timed('writeTestBench'):
+			tbfile = open("tb_%s_mapped.v" % tbname, 'w')
+			top.obj.name = tbname # Hack to overwrite DUT name
+			_writeTestBench(tbfile, top.obj, trace, "1ps/1ps")
+			tbfile.close()
 
 	return top
 
@@ -1206,17 +1214,20 @@ class YosysModuleConvertor:
 		else:
 			name = str(self.name)
 
-		h = Hierarchy(name, blkfunc, self.private)
+		with _profiler.timed('getHierarchy'):
+			h = Hierarchy(name, blkfunc, self.private)
 
 		_genUniqueSuffix.reset()
 		_enumTypeSet.clear()
 		_slice_constDict.clear()
 		# _enumPortTypeSet = set()
 
-		infer_interface(blkfunc)
+		with _profiler.timed('inferInterface'):
+			infer_interface(blkfunc)
 		# dump_hierarchy(h, blkfunc)
 		top = convert_hierarchy(h, blkfunc, self.design, self.trace)
-		self.design.set_top_module(top, h.private)
+		with _profiler.timed('setTopModule'):
+			self.design.set_top_module(top, h.private)
 
 
 toYosysModule = YosysModuleConvertor()
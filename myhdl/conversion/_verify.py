@@ -13,6 +13,7 @@ import myhdl
 from myhdl._Simulation import Simulation
 from myhdl.conversion._toVHDL import toVHDL
 from myhdl.conversion._toVerilog import toVerilog
+from myhdl.conversion._profile import _profiler
 from myhdl._block import _Block
 
 _version = myhdl.__version__.replace('.', '')
@@ -111,6 +112,8 @@ class _VerificationClass(object):
             raise ValueError("Simulator %s is not registered" % self.simulator)
         hdlsim = _simulators[self.simulator]
         hdl = hdlsim.hdl
+        if _profiler.active and _profiler.hdl is None:
+            _profiler.hdl = hdl
         if hdl == 'Verilog' and toVerilog.name is not None:
             name = toVerilog.name
         elif hdl == 'VHDL' and toVHDL.name is not None:
@@ -179,7 +182,8 @@ class _VerificationClass(object):
                     pass
 
         # print(analyze)
-        ret = subprocess.call(analyze, shell=True)
+        with _profiler.timed('hdlAnalyze'):
+            ret = subprocess.call(analyze, shell=True)
         if ret != 0:
             print("Analysis failed", file=sys.stderr)
             return ret
@@ -190,8 +194,9 @@ class _VerificationClass(object):
 
         f = tempfile.TemporaryFile(mode='w+t')
         sys.stdout = f
-        sim = Simulation(inst)
-        sim.run()
+        with _profiler.timed('simulate'):
+            sim = Simulation(inst)
+            sim.run()
         sys.stdout = sys.__stdout__
         f.flush()
         f.seek(0)
@@ -204,14 +209,16 @@ class _VerificationClass(object):
 
         if elaborate is not None:
             # print(elaborate)
-            ret = subprocess.call(elaborate, shell=True)
+            with _profiler.timed('hdlElaborate'):
+                ret = subprocess.call(elaborate, shell=True)
             if ret != 0:
                 print("Elaboration failed", file=sys.stderr)
                 return ret
 
         g = tempfile.TemporaryFile(mode='w+t')
         # print(simulate)
-        ret = subprocess.call(simulate, stdout=g, shell=True)
+        with _profiler.timed('hdlSimulate'):
+            ret = subprocess.call(simulate, stdout=g, shell=True)
     #    if ret != 0:
     #        print "Simulation run failed"
     #        return
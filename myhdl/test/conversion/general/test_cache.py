@@ -0,0 +1,180 @@
+import os
+from types import ModuleType
+
+import pytest
+
+from myhdl import _block
+from myhdl import Signal, always_comb, always_seq, block, intbv, ResetSignal
+from myhdl.conversion._cache import _Keyer
+from myhdl.conversion._toVerilog import _ToVerilogConvertor
+from myhdl.conversion._toVHDL import _ToVHDLConvertor
+
+consts = ModuleType('consts')
+consts.MAGIC = 5
+
+
+class Params(object):
+    OFFSET = 1
+
+
+@block
+def adder(a, b, c, k):
+
+    @always_comb
+    def logic():
+        c.next = (a + b + k) % 256
+
+    return logic
+
+
+@block
+def magic(a, b):
+
+    @always_comb
+    def logic():
+        b.next = (a + consts.MAGIC + Params.OFFSET) % 256
+
+    return logic
+
+
+@block
+def double(a, b):
+
+    @always_comb
+    def logic():
+        b.next = (2 * a) % 256
+
+    return logic
+
+
+@block
+def pair(a, c):
+    mid = Signal(intbv(0)[8:])
+    x = magic(a, mid)
+    y = double(mid, c)
+    return x, y
+
+
+@block
+def acc(clk, rst, d, q):
+    s = Signal(intbv(0)[8:])
+
+    @always_seq(clk.posedge, reset=rst)
+    def logic():
+        s.next = (s + d) % 256
+
+    add = adder(s, d, q, 1)
+
+    return logic, add
+
+
+def design(monkeypatch, width=8):
+    """Elaborate acc as in a new run, with the same instance names."""
+    monkeypatch.setattr(_block, '_name_set', set())
+    acc.calls = adder.calls = 0
+    return acc(*signals(width))
+
+
+def signals(width=8):
+    clk = Signal(bool(0))
+    rst = ResetSignal(0, active=1, isasync=False)
+    d, q = [Signal(intbv(0)[width:]) for i in range(2)]
+    return clk, rst, d, q
+
+
+def entries(cache):
+    return sorted(os.listdir(str(cache)))
+
+
+def body(path):
+    with open(str(path)) as f:
+        return [l for l in f if not l.startswith(('// Date', '-- Date'))]
+
+
+@pytest.mark.parametrize('hdl, ext', [('Verilog', '.v'), ('VHDL', '.vhd')])
+def test_reuse(tmpdir, monkeypatch, hdl, ext):
+    cache = tmpdir.join('cache')
+    out = tmpdir.mkdir('out')
+    design(monkeypatch).convert(hdl=hdl, path=str(out), cache=str(cache))
+    ref = body(out.join('acc' + ext))
+    assert len(entries(cache)) == 1
+    out.join('acc' + ext).remove()
+    # a new elaboration of the same design is found in the cache
+    design(monkeypatch).convert(hdl=hdl, path=str(out), cache=str(cache))
+    assert len(entries(cache)) == 1
+    assert body(out.join('acc' + ext)) == ref
+    # the result is the same as without cache
+    design(monkeypatch).convert(hdl=hdl, path=str(out))
+    assert body(out.join('acc' + ext)) == ref
+
+
+def test_changes(tmpdir, monkeypatch):
+    cache = tmpdir.join('cache')
+    out = str(tmpdir)
+    design(monkeypatch).convert(path=out, cache=str(cache))
+    design(monkeypatch).convert(path=out, cache=str(cache), testbench=False)
+    assert len(entries(cache)) == 2
+    design(monkeypatch, width=6).convert(path=out, cache=str(cache))
+    assert len(entries(cache)) == 3
+    # the same design again, and converted again
+    top = design(monkeypatch)
+    top.convert(path=out, cache=str(cache))
+    top.convert(path=out, cache=str(cache))
+    assert len(entries(cache)) == 3
+
+
+def test_keys():
+    clk, rst, d, q = signals()
+    key = _Keyer().block(adder(d, d, q, 1), top=True)
+    # parameters, including the connection of ports
+    assert _Keyer().block(adder(d, d, q, 1), top=True) == key
+    assert _Keyer().block(adder(d, d, q, 2), top=True) != key
+    assert _Keyer().block(adder(d, clk, q, 1), top=True) != key
+    assert _Keyer().block(adder(q, q, d, 1), top=True) == key
+    assert _Keyer().block(adder(d, q, q, 1), top=True) != key
+    # the block name is part of the key of subblocks only
+    blk = acc(clk, rst, d, q)
+    assert _Keyer().block(blk.subs[1]) != _Keyer().block(adder(d, d, q, 1))
+
+
+def test_namespaces(monkeypatch):
+    a, b = [Signal(intbv(0)[8:]) for i in range(2)]
+    key = _Keyer().block(magic(a, b), top=True)
+    assert _Keyer().block(magic(a, b), top=True) == key
+    # the attributes of referenced modules and classes are keyed
+    monkeypatch.setattr(consts, 'MAGIC', 9)
+    assert _Keyer().block(magic(a, b), top=True) != key
+    monkeypatch.setattr(consts, 'MAGIC', 5)
+    monkeypatch.setattr(Params, 'OFFSET', 2)
+    assert _Keyer().block(magic(a, b), top=True) != key
+
+
+@pytest.mark.parametrize('hdl, ext, convertor', [
+    ('Verilog', '.v', _ToVerilogConvertor), ('VHDL', '.vhd', _ToVHDLConvertor)])
+def test_modules(tmpdir, monkeypatch, hdl, ext, convertor):
+    cache = str(tmpdir.join('cache'))
+    out = tmpdir.mkdir('out')
+    converted = []
+    convertModule = convertor._convertModule
+
+    def spy(self, h, func, name, *args, **kwargs):
+        converted.append(name)
+        return convertModule(self, h, func, name, *args, **kwargs)
+
+    monkeypatch.setattr(convertor, '_convertModule', spy)
+
+    def convert(**kwargs):
+        monkeypatch.setattr(_block, '_name_set', set())
+        del converted[:]
+        a, c = [Signal(intbv(0)[8:]) for i in range(2)]
+        pair(a, c).convert(hdl=hdl, path=str(out), hierarchical=True,
+                           **kwargs)
+        return body(out.join('pair' + ext))
+
+    convert(cache=cache)
+    assert sorted(converted) == ['pair', 'pair_double', 'pair_magic']
+    # a change in a leaf only converts that module and the top again
+    monkeypatch.setattr(consts, 'MAGIC', 9)
+    code = convert(cache=cache)
+    assert sorted(converted) == ['pair', 'pair_magic']
+    assert convert() == code
@@ -0,0 +1,150 @@
+import pytest
+
+from myhdl import Signal, always_comb, always_seq, block, intbv, ResetSignal
+from myhdl.conversion import analyze
+from myhdl.conversion._toVHDL import toVHDL
+from myhdl.conversion._verify import _simulators
+
+N = 256
+
+
+@block
+def channel(clk, rst, din, dout, k=1):
+    s = Signal(intbv(0)[8:])
+
+    @always_seq(clk.posedge, reset=rst)
+    def logic():
+        s.next = (din + k) % 256
+
+    @always_comb
+    def comb():
+        dout.next = s
+
+    return logic, comb
+
+
+@block
+def channels(clk, rst, din, dout, n=N):
+    links = [Signal(intbv(0)[8:]) for i in range(n + 1)]
+    links[0] = din
+    links[n] = dout
+    insts = [channel(clk, rst, links[i], links[i + 1]) for i in range(n)]
+    return insts
+
+
+@block
+def mixed(clk, rst, din, dout):
+    mid = Signal(intbv(0)[8:])
+    a = channel(clk, rst, din, mid, k=1)
+    b = channel(clk, rst, mid, dout, k=2)
+    return a, b
+
+
+@block
+def peek(clk, rst, din, dout):
+    mid = Signal(intbv(0)[8:])
+
+    @block
+    def spy():
+        # reads a signal that is not one of its ports
+        @always_comb
+        def logic():
+            dout.next = mid
+
+        return logic
+
+    a = channel(clk, rst, din, mid)
+    b = spy()
+    return a, b
+
+
+@block
+def counter(clk, rst, count):
+
+    @always_seq(clk.posedge, reset=rst)
+    def logic():
+        # reads back its output
+        count.next = (count + 1) % 256
+
+    return logic
+
+
+@block
+def readback(clk, rst, count):
+    c = counter(clk, rst, count)
+    return c
+
+
+def signals():
+    clk = Signal(bool(0))
+    rst = ResetSignal(0, active=1, isasync=False)
+    din, dout = [Signal(intbv(0)[8:]) for i in range(2)]
+    return clk, rst, din, dout
+
+
+def convert(top, tmpdir, hdl):
+    ext = {'Verilog': '.v', 'VHDL': '.vhd'}[hdl]
+    name = top.func.__name__
+    top.convert(hdl=hdl, path=str(tmpdir), hierarchical=True)
+    with open(str(tmpdir.join(name + ext))) as f:
+        return f.read()
+
+
+@pytest.mark.parametrize('hdl, module, instance', [
+    ('Verilog', 'module channels_channel (', 'channels_channel channel_'),
+    ('VHDL', 'entity channels_channel is',
+     ': entity work.channels_channel(MyHDL)')])
+def test_dedup(tmpdir, hdl, module, instance):
+    code = convert(channels(*signals()), tmpdir, hdl)
+    assert code.count(module) == 1
+    assert code.count(instance) == N
+    # the module is declared before it is used
+    assert code.index(module) < code.index(instance)
+
+
+def test_parameters(tmpdir):
+    code = convert(mixed(*signals()), tmpdir, 'Verilog')
+    assert code.count('module mixed_channel (') == 1
+    assert code.count('module mixed_channel_1 (') == 1
+    assert 'mixed_channel channel_0 (' in code
+    assert 'mixed_channel_1 channel_1 (' in code
+
+
+def test_inline(tmpdir):
+    code = convert(peek(*signals()), tmpdir, 'Verilog')
+    # spy is flattened, as it reads a signal that is not one of its ports
+    assert code.count('module ') == 2
+    assert 'module peek_channel (' in code
+    assert 'assign dout = mid;' in code
+
+
+def test_restore(tmpdir):
+    top = channels(*signals(), n=4)
+    subs = top.subs
+    names = [b.name for b in subs]
+    convert(top, tmpdir, 'Verilog')
+    assert top.subs is subs
+    assert [b.name for b in subs] == names
+    assert all(b.verilog_code is None for b in subs)
+    # a regular conversion afterwards is flat
+    top.convert(hdl='Verilog', path=str(tmpdir))
+    with open(str(tmpdir.join('channels.v'))) as f:
+        assert f.read().count('module ') == 1
+
+
+def test_readback(tmpdir):
+    clk, rst, din, dout = signals()
+    code = convert(readback(clk, rst, dout), tmpdir, 'VHDL')
+    assert 'entity readback_counter is' in code
+    # the inout port of the module is connected to an inout port
+    assert code.count('count: inout') == 2
+    assert 'count: out' not in code
+
+
+def test_readback_analyze():
+    if analyze.simulator is None or \
+            _simulators[analyze.simulator].hdl != 'VHDL':
+        pytest.skip("requires a VHDL simulator")
+    clk, rst, din, dout = signals()
+    toVHDL.hierarchical = True
+    assert analyze(readback(clk, rst, dout)) == 0
@@ -0,0 +1,93 @@
+import warnings
+
+import pytest
+
+from myhdl import Signal, always, always_comb, block, intbv
+from myhdl.conversion import _misc, _parallel
+
+N = 40
+
+
+def inc(x):
+    if x > 100:
+        return 0
+    return x + 1
+
+
+@block
+def cell(clk, din, dout):
+    s = Signal(intbv(0)[8:])
+
+    @always(clk.posedge)
+    def logic():
+        for i in range(2):
+            if din == i:
+                break
+        s.next = inc(din) % 256
+
+    @always_comb
+    def comb():
+        dout.next = s
+
+    return logic, comb
+
+
+@block
+def chain(clk, din, dout):
+    links = [Signal(intbv(0)[8:]) for i in range(N + 1)]
+    links[0] = din
+    links[N] = dout
+    return [cell(clk, links[i], links[i + 1]) for i in range(N)]
+
+
+def body(path):
+    with open(str(path)) as f:
+        return [l for l in f if not l.startswith(('// Date', '-- Date'))]
+
+
+@pytest.mark.parametrize('hdl, ext, label', [('Verilog', '.v', '_RETURN'),
+                                             ('VHDL', '.vhd', '_inc(')])
+def test_same_output(tmpdir, monkeypatch, hdl, ext, label):
+    top = chain(Signal(bool(0)), Signal(intbv(0)[8:]), Signal(intbv(0)[8:]))
+    results = []
+    for jobs in (1, 3):
+        # labels are numbered by a global counter
+        labels = _misc._LabelGenerator()
+        monkeypatch.setattr(_misc, '_genLabel', labels)
+        top.convert(hdl=hdl, path=str(tmpdir), jobs=jobs)
+        results.append((body(tmpdir.join('chain' + ext)), labels.i))
+    serial, parallel = results
+    assert parallel == serial
+    assert sum(label in l for l in serial[0]) >= N
+
+
+@pytest.mark.parametrize('hdl, ext', [('Verilog', '.v'), ('VHDL', '.vhd')])
+def test_spill(tmpdir, monkeypatch, hdl, ext):
+    top = chain(Signal(bool(0)), Signal(intbv(0)[8:]), Signal(intbv(0)[8:]))
+    results = []
+    for size in (_parallel._SPILLSIZE, 100):
+        # code beyond the chunk size is spilled to disk
+        monkeypatch.setattr(_parallel, '_SPILLSIZE', size)
+        monkeypatch.setattr(_misc, '_genLabel', _misc._LabelGenerator())
+        top.convert(hdl=hdl, path=str(tmpdir))
+        results.append(body(tmpdir.join('chain' + ext)))
+    assert results[1] == results[0]
+
+
+def warnRender(genlist, blockBuf, funcBuf):
+    for g in genlist:
+        warnings.warn("rendered", UserWarning)
+        blockBuf.write("%s\n" % g)
+
+
+def test_warnings():
+    genlist = list(range(4 * _parallel._MINCHUNK))
+    blockFile = _parallel._SpillFile()
+    funcFile = _parallel._SpillFile()
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter('always')
+        _parallel._renderGens(warnRender, genlist, blockFile, funcFile, 2)
+    # once, at the location of the warning in the worker
+    assert len(caught) == 1
+    assert caught[0].filename == __file__.replace('.pyc', '.py')
+    assert caught[0].lineno == warnRender.__code__.co_firstlineno + 2
@@ -0,0 +1,164 @@
+import json
+
+import pytest
+
+from myhdl import (Signal, always_comb, always_seq, block, intbv, ResetSignal,
+                   ConversionError)
+from myhdl.conversion._profile import _profiler
+
+
+@block
+def stage(clk, rst, din, dout):
+    s = Signal(intbv(0)[8:])
+
+    @always_seq(clk.posedge, reset=rst)
+    def logic():
+        s.next = (din + 1) % 256
+
+    @always_comb
+    def comb():
+        dout.next = s
+
+    return logic, comb
+
+
+@block
+def pipeline(clk, rst, din, dout):
+    mid = Signal(intbv(0)[8:])
+    a = stage(clk, rst, din, mid)
+    b = stage(clk, rst, mid, dout)
+    return a, b
+
+
+@block
+def bad(din, dout):
+    s = Signal(intbv(0))
+
+    @always_comb
+    def comb():
+        s.next = din
+
+    @always_comb
+    def out():
+        dout.next = s
+
+    return comb, out
+
+
+def signals():
+    clk = Signal(bool(0))
+    rst = ResetSignal(0, active=1, isasync=False)
+    din, dout = [Signal(intbv(0)[8:]) for i in range(2)]
+    return clk, rst, din, dout
+
+
+@pytest.mark.parametrize('hdl', ['Verilog', 'VHDL'])
+def test_report(tmpdir, capsys, hdl):
+    top = pipeline(*signals())
+    top.convert(hdl=hdl, path=str(tmpdir), profile=True)
+    assert not _profiler.active
+    with open(str(tmpdir.join('pipeline_profile.json'))) as f:
+        report = json.load(f)
+    assert report['name'] == 'pipeline'
+    assert report['hdl'] == hdl
+    passes = dict((p['name'], p) for p in report['passes'])
+    for name in ('getHierarchy', 'analyzeGens', 'analyzeSigs',
+                 'annotateTypes', 'writeSigDecls', 'convertGens'):
+        assert passes[name]['calls'] == 1
+        assert 0 <= passes[name]['time'] <= report['time']
+    blocks = dict((b['name'], b) for b in report['blocks'])
+    assert len(blocks) == 2
+    assert all(name.startswith('pipeline_stage') for name in blocks)
+    for b in blocks.values():
+        counts = dict((p['name'], p['calls']) for p in b['passes'])
+        # two generators per block
+        assert counts == {'analyzeGens': 2, 'annotateTypes': 2,
+                          'convertGens': 2}
+    out = capsys.readouterr().out
+    assert 'Conversion profile of pipeline (%s)' % hdl in out
+    assert report['blocks'][0]['name'] in out
+
+
+def test_error(tmpdir):
+    clk, rst, din, dout = signals()
+    with pytest.raises(ConversionError):
+        bad(din, dout).convert(path=str(tmpdir), profile=True)
+    assert not _profiler.active
+    assert not tmpdir.join('bad_profile.json').check()
+
+
+def test_name():
+    _profiler.start('design', 'Verilog')
+    try:
+        obj = object()
+        _profiler.name(obj, 'blk')
+        with _profiler.timed('analyzeGens', obj):
+            pass
+    finally:
+        report = _profiler.stop()
+    assert report['name'] == 'design'
+    assert [b['name'] for b in report['blocks']] == ['blk']
+
+
+def test_yosys(tmpdir, monkeypatch):
+    pytest.importorskip('pyosys')
+    from myhdl.conversion import yshelper
+    # the test bench is written to the working directory
+    monkeypatch.chdir(str(tmpdir))
+    design = yshelper.Design('pipeline')
+    top = pipeline(*signals())
+    top.convert('yosys_module', design, name='pipeline', path=str(tmpdir),
+                profile=True)
+    with open(str(tmpdir.join('pipeline_profile.json'))) as f:
+        report = json.load(f)
+    assert report['name'] == 'pipeline'
+    passes = dict((p['name'], p) for p in report['passes'])
+    for name in ('getHierarchy', 'analyzeSigs', 'analyzeGens', 'convertRTL'):
+        assert passes[name]['calls'] >= 1
+    assert report['blocks']
+
+
+def test_elaborate(tmpdir):
+    top = pipeline(*signals())
+    top.convert(path=str(tmpdir), profile=True)
+    with open(str(tmpdir.join('pipeline_profile.json'))) as f:
+        report = json.load(f)
+    passes = [p['name'] for p in report['passes']]
+    # elaborated before the passes of the converter
+    assert passes[0] == 'elaborate'
+
+
+@block
+def wide(clk, rst, din, dout):
+    sigs = [din] + [Signal(intbv(0)[8:]) for i in range(15)] + [dout]
+    stages = [stage(clk, rst, sigs[i], sigs[i + 1]) for i in range(16)]
+    return stages
+
+
+@pytest.mark.parametrize('hdl', ['Verilog', 'VHDL'])
+def test_jobs(tmpdir, hdl):
+    from myhdl.conversion._parallel import _pool
+    pool = _pool(2)
+    if pool is None:
+        pytest.skip("fork is not available")
+    pool.terminate()
+    top = wide(*signals())
+    top.convert(hdl=hdl, path=str(tmpdir), jobs=2, profile=True)
+    with open(str(tmpdir.join('wide_profile.json'))) as f:
+        report = json.load(f)
+    blocks = report['blocks']
+    assert len(blocks) == 16
+    for b in blocks:
+        counts = dict((p['name'], p['calls']) for p in b['passes'])
+        assert counts['convertGens'] == 2
+
+
+def test_cache(tmpdir):
+    cache = str(tmpdir.join('cache'))
+    top = pipeline(*signals())
+    top.convert(path=str(tmpdir), cache=cache)
+    top.convert(path=str(tmpdir), cache=cache, profile=True)
+    with open(str(tmpdir.join('pipeline_profile.json'))) as f:
+        report = json.load(f)
+    passes = [p['name'] for p in report['passes']]
+    assert passes == ['cacheKey', 'cacheLoad']
@@ -0,0 +1,155 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  Copyright (C) 2003-2008 Jan Decaluwe
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+""" Run unit tests for Clock """
+from __future__ import absolute_import
+
+import pytest
+
+from myhdl import (Clock, ConversionError, Signal, Simulation,
+                   StopSimulation, always_comb, block, delay, instance, intbv,
+                   now)
+from myhdl.conversion._misc import _error
+
+QUIET = 1
+
+
+def monitor(clk, log, n=20):
+    def gen():
+        for i in range(n):
+            yield clk
+            log.append((now(), int(clk), clk.val))
+        raise StopSimulation()
+    return gen()
+
+
+def clkgen(clk, half):
+    def gen():
+        while 1:
+            yield delay(half)
+            clk.next = not clk
+    return gen()
+
+
+def sampler(clk, log, n=20):
+    def gen():
+        for i in range(n):
+            # wakes up at the same time as the edges
+            yield delay(5)
+            log.append((now(), bool(clk)))
+        raise StopSimulation()
+    return gen()
+
+
+class TestClock:
+
+    def testSameAsGenerator(self):
+        clk = Signal(bool(0))
+        ref = []
+        Simulation(clkgen(clk, 5), monitor(clk, ref)).run(quiet=QUIET)
+        clk = Signal(bool(0))
+        log = []
+        Simulation(Clock(clk, 10), monitor(clk, log)).run(quiet=QUIET)
+        assert log == ref
+        assert type(log[0][2]) is bool
+
+    def testSameDeltaOrder(self):
+        clk = Signal(bool(0))
+        ref = []
+        Simulation(clkgen(clk, 5), sampler(clk, ref)).run(quiet=QUIET)
+        clk = Signal(bool(0))
+        log = []
+        Simulation(Clock(clk, 10), sampler(clk, log)).run(quiet=QUIET)
+        # processes that wake up with an edge see the old value
+        assert log[0] == (5, False)
+        assert log == ref
+
+    def testInitialHigh(self):
+        clk = Signal(bool(1))
+        log = []
+        Simulation(Clock(clk, 10), monitor(clk, log, 4)).run(quiet=QUIET)
+        assert log == [(5, 0, False), (10, 1, True),
+                       (15, 0, False), (20, 1, True)]
+
+    def testDutyCycle(self):
+        clk = Signal(bool(0))
+        log = []
+        Simulation(Clock(clk, 10, duty=0.3), monitor(clk, log, 4)).run(quiet=QUIET)
+        assert [t for t, v, _ in log] == [7, 10, 17, 20]
+
+    def testIntbv(self):
+        clk = Signal(intbv(0)[1:])
+        log = []
+        Simulation(Clock(clk, 4), monitor(clk, log, 4)).run(quiet=QUIET)
+        assert [(t, v) for t, v, _ in log] == [(2, 1), (4, 0), (6, 1), (8, 0)]
+
+    def testResume(self):
+        clk = Signal(bool(0))
+        sim = Simulation(Clock(clk, 10))
+        sim.run(12, quiet=QUIET)
+        assert clk == 0
+        sim.run(3, quiet=QUIET)
+        assert clk == 1
+        sim.quit()
+
+    def testBlock(self):
+        @block
+        def bench(log):
+            clk = Signal(bool(0))
+            clock = Clock(clk, 10)
+
+            @instance
+            def mon():
+                for i in range(4):
+                    yield clk.posedge
+                    log.append(now())
+                raise StopSimulation()
+
+            return clock, mon
+
+        log = []
+        bench(log).run_sim(quiet=QUIET)
+        assert log == [5, 15, 25, 35]
+
+    def testArgs(self):
+        with pytest.raises(TypeError):
+            Clock(0, 10)
+        with pytest.raises(TypeError):
+            Clock(Signal(bool(0)), 2.5)
+        with pytest.raises(ValueError):
+            Clock(Signal(bool(0)), 1)
+        with pytest.raises(ValueError):
+            Clock(Signal(bool(0)), 10, duty=0)
+
+    @pytest.mark.parametrize('hdl', ['Verilog', 'VHDL'])
+    def testConvert(self, tmpdir, hdl):
+        @block
+        def design(q):
+            clk = Signal(bool(0))
+            clock = Clock(clk, 10)
+
+            @always_comb
+            def logic():
+                q.next = clk
+
+            return clock, logic
+
+        with pytest.raises(ConversionError) as e:
+            design(Signal(bool(0))).convert(hdl=hdl, path=str(tmpdir))
+        assert e.value.kind == _error.ClockNotConvertible
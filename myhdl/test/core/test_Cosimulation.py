@@ -21,9 +21,14 @@
 from __future__ import absolute_import
 
 import gc
+import mmap
 import os
 import random
+import struct
 import sys
+import time
+
+import pytest
 
 if sys.platform == "win32":
     import msvcrt
@@ -31,6 +36,8 @@ if sys.platform == "win32":
 from myhdl import Signal
 from myhdl._compat import to_bytes
 from myhdl._Cosimulation import Cosimulation, CosimulationError, _error
+from myhdl._Cosimulation import (_BINARY, _SHM, _SKIP, _EFD, _gather,
+                                  _shmLayout)
 
 if __name__ != '__main__':
     from helpers import raises_kind
@@ -59,6 +66,116 @@ allSigs = fromSigs.copy()
 allSigs.update(toSigs)
 
 
+def words(v, size):
+    # little endian 32 bit words of a value, truncated to its size
+    n = (size + 31) // 32
+    v &= (1 << size) - 1
+    return struct.pack('<%dI' % n, *[(v >> (32 * i)) & 0xFFFFFFFF
+                                     for i in range(n)])
+
+
+def readframe(rf):
+    n, = struct.unpack('<I', os.read(rf, 4))
+    data = b''
+    while len(data) < n:
+        data += os.read(rf, n - len(data))
+    return data
+
+
+def startBinary(wt, rf, offer=_BINARY):
+    buf = "FROM 00 "
+    for s, w in zip(fromSignames, fromSizes):
+        buf += "%s %s " % (s, w)
+    os.write(wt, to_bytes(buf))
+    os.read(rf, MAXLINE)
+    buf = "TO 00 "
+    for s, w in zip(toSignames, toSizes):
+        buf += "%s %s " % (s, w)
+    os.write(wt, to_bytes(buf))
+    os.read(rf, MAXLINE)
+    os.write(wt, to_bytes("START " + offer))
+    ok = to_bytes("OK " + _BINARY)
+    assert os.read(rf, len(ok)) == ok
+
+
+def startShm(wt, rf, offer="%s %s" % (_BINARY, _SHM)):
+    buf = "FROM 00 "
+    for s, w in zip(fromSignames, fromSizes):
+        buf += "%s %s " % (s, w)
+    os.write(wt, to_bytes(buf))
+    os.read(rf, MAXLINE)
+    buf = "TO 00 "
+    for s, w in zip(toSignames, toSizes):
+        buf += "%s %s " % (s, w)
+    os.write(wt, to_bytes(buf))
+    os.read(rf, MAXLINE)
+    os.write(wt, to_bytes("START " + offer))
+    e = os.read(rf, MAXLINE).split()
+    assert e[:3] == [b"OK", to_bytes(_BINARY), to_bytes(_SHM)]
+    if _EFD in offer:
+        assert e[3] == to_bytes(_EFD)
+        e.pop(3)
+    with open(e[3], 'r+b') as f:
+        return mmap.mmap(f.fileno(), 0)
+
+
+def shmWait(shm, rf, last):
+    # a simple HDL side, that sleeps on the pipe
+    while 1:
+        struct.pack_into('<I', shm, 8, 1)
+        seq, = struct.unpack_from('<I', shm, 4)
+        if seq != last:
+            struct.pack_into('<I', shm, 8, 0)
+            return seq
+        os.read(rf, 1)
+
+
+def shmPost(shm, wt, seq):
+    struct.pack_into('<I', shm, 0, seq)
+    if struct.unpack_from('<I', shm, 12)[0]:
+        os.write(wt, b'\0')
+
+
+def shmEventWait(shm, efd, last):
+    # a simple HDL side, that sleeps on the eventfd of MyHDL
+    while 1:
+        seq, = struct.unpack_from('<I', shm, 4)
+        if seq != last:
+            return seq
+        os.eventfd_read(efd)
+
+
+def shmEventPost(shm, efd, seq):
+    struct.pack_into('<I', shm, 0, seq)
+    os.eventfd_write(efd, 1)
+
+
+def spyGet(cosim, name, order):
+    # record the order in which frames are read
+    get = cosim._get
+
+    def _get():
+        if cosim._getMode:
+            order.append(name)
+        get()
+    cosim._get = _get
+
+
+def skipSide(delay):
+    # an HDL side that replies to the jump to time 20 after a delay
+    wt, rf = wtrf()
+    startBinary(wt, rf, "%s %s" % (_BINARY, _SKIP))
+    buf = struct.pack('<QB', 0, 0)
+    os.write(wt, struct.pack('<I', len(buf)) + buf)
+    assert readframe(rf) == struct.pack('<Q', 20)
+    time.sleep(delay)
+    buf = struct.pack('<QB', 20, 0)
+    os.write(wt, struct.pack('<I', len(buf)) + buf)
+    data = readframe(rf)
+    assert data[:9] == struct.pack('<QB', 20, 7)
+    os.write(wt, struct.pack('<I', len(buf)) + buf + b"DONE")
+
+
 def wtrf():
     if sys.platform != "win32":
         wt = int(os.environ['MYHDL_TO_PIPE'])
@@ -259,5 +376,256 @@ class TestCosimulation:
             buf += " "
         os.write(wt, to_bytes(buf))
 
+    def testBinary(self):
+        cosim = Cosimulation(exe + "cosimBinary", **allSigs)
+        assert cosim._binary
+
+    @staticmethod
+    def cosimBinary():
+        wt, rf = wtrf()
+        startBinary(wt, rf)
+
+    def testBinaryFromSignalVals(self):
+        cosim = Cosimulation(exe + "cosimBinaryFromSignalVals", **allSigs)
+        cosim._waiter().next([], {}, [])
+        cosim._hasChange = 1
+        cosim._put(0)
+        fromSigs['bb'].next = 0x7ff
+        for w in fromSigs['bb']._update():
+            w.next([], {}, [])
+        assert cosim._dirty == set([1])
+        cosim._put(5)
+        cosim._put(10)
+        fromSigs['bb']._clear()
+        assert os.read(cosim._rt, MAXLINE) == b"DONE"
+
+    @staticmethod
+    def cosimBinaryFromSignalVals():
+        wt, rf = wtrf()
+        startBinary(wt, rf)
+        # all signals at the first change
+        data = readframe(rf)
+        assert data == (struct.pack('<QB', 0, 7) +
+                        b''.join(words(v, w)
+                                 for v, w in zip(fromVals, fromSizes)))
+        # only the changed signal
+        data = readframe(rf)
+        assert data == struct.pack('<QB', 5, 2) + words(0x7ff, 11)
+        # only the time
+        data = readframe(rf)
+        assert data == struct.pack('<Q', 10)
+        os.write(wt, b"DONE")
+
+    def testBinaryToSignalVals(self):
+        cosim = Cosimulation(exe + "cosimBinaryToSignalVals", **allSigs)
+        for n in toSignames:
+            toSigs[n]._clear()
+        cosim._get()
+        for n, v, w in zip(toSignames, toVals, toSizes):
+            assert toSigs[n].next == v & ((1 << w) - 1)
+        os.write(cosim._wf, b"DUMMY")
+        cosim._getMode = 1
+        cosim._get()
+        assert toSigs['d'].next == 0x3
+        assert toSigs['ee'].next == 0
+        assert toSigs['fff'].next == 0
+        assert toSigs['g'].next == 0
+
+    @staticmethod
+    def cosimBinaryToSignalVals():
+        wt, rf = wtrf()
+        startBinary(wt, rf)
+        buf = struct.pack('<QB', 0, 0xf)
+        for v, w in zip(toVals, toSizes):
+            buf += words(v, w) + words(0, w)
+        os.write(wt, struct.pack('<I', len(buf)) + buf)
+        os.read(rf, MAXLINE)
+        # x and mixed values
+        buf = struct.pack('<QB', 0, 0xe)
+        for w, a, b in [(12, 0xfff, 0xfff), (3, 0x1, 0x4), (6, 0x1, 0x2)]:
+            buf += words(a, w) + words(b, w)
+        os.write(wt, struct.pack('<I', len(buf)) + buf)
+
+    def testShm(self):
+        cosim = Cosimulation(exe + "cosimShm", **allSigs)
+        assert cosim._shm is not None
+        path = cosim._shmPath
+        for n in toSignames:
+            toSigs[n]._clear()
+        cosim._get()
+        assert not os.path.exists(path)
+        for n, v, w in zip(toSignames, toVals, toSizes):
+            assert toSigs[n].next == v & ((1 << w) - 1)
+        cosim._hasChange = 1
+        cosim._put(0)
+        cosim._get()
+        cosim._put(10)
+        cosim._get()
+        assert toSigs['g'].next == 0x2a
+        os.write(cosim._wf, b"\0")
+        assert os.read(cosim._rt, MAXLINE) == b"DONE"
+        cosim._close()
+
+    @staticmethod
+    def cosimShm():
+        wt, rf = wtrf()
+        shm = startShm(wt, rf)
+        up, upSlots, down, downSlots, size = _shmLayout(toSizes, fromSizes)
+        assert len(shm) == size
+        shm[up:up + 9] = struct.pack('<QB', 0, 0xf)
+        for pos, v, w in zip(upSlots, toVals, toSizes):
+            shm[pos:pos + 8 * ((w + 31) // 32)] = words(v, w) + words(0, w)
+        shmPost(shm, wt, 1)
+        seq = shmWait(shm, rf, 0)
+        assert struct.unpack_from('<QIB', shm, down) == (0, 1, 7)
+        for pos, v, w in zip(downSlots, fromVals, fromSizes):
+            assert shm[pos:pos + 4 * ((w + 31) // 32)] == words(v, w)
+        shm[up:up + 9] = struct.pack('<QB', 0, 0)
+        shmPost(shm, wt, 2)
+        seq = shmWait(shm, rf, seq)
+        assert struct.unpack_from('<QI', shm, down) == (10, 0)
+        shm[up:up + 9] = struct.pack('<QB', 10, 0x8)
+        shm[upSlots[3]:upSlots[3] + 8] = words(0x2a, 6) + words(0, 6)
+        shmPost(shm, wt, 3)
+        os.read(rf, MAXLINE)
+        os.write(wt, b"DONE")
+
+    @pytest.mark.skipif(not hasattr(os, 'eventfd'), reason="no eventfd")
+    def testShmEvent(self, monkeypatch):
+        # sleep right away, on the eventfd
+        monkeypatch.setattr('myhdl._Cosimulation._SPIN', 0)
+        cosim = Cosimulation(exe + "cosimShmEvent", **allSigs)
+        assert cosim._upEvent is not None
+        for n in toSignames:
+            toSigs[n]._clear()
+        cosim._get()
+        assert toSigs['d'].next == toVals[0]
+        for t in (10, 20):
+            cosim._put(t)
+            cosim._get()
+            assert toSigs['g'].next == t
+        # the flags are not used
+        assert cosim._shm[8:16] == b'\0' * 8
+        assert os.read(cosim._rt, MAXLINE) == b"DONE"
+        cosim._close()
+        assert cosim._upEvent is None
+
+    @staticmethod
+    def cosimShmEvent():
+        wt, rf = wtrf()
+        upEvent = int(os.environ['MYHDL_UP_EVENT'])
+        downEvent = int(os.environ['MYHDL_DOWN_EVENT'])
+        shm = startShm(wt, rf, "%s %s %s" % (_BINARY, _SHM, _EFD))
+        up, upSlots, down, downSlots, size = _shmLayout(toSizes, fromSizes)
+        shm[up:up + 9] = struct.pack('<QB', 0, 0x1)
+        shm[upSlots[0]:upSlots[0] + 8] = words(toVals[0], 32) + words(0, 32)
+        seq = 0
+        for i, t in enumerate((0, 10, 20)):
+            if t:
+                shm[up:up + 9] = struct.pack('<QB', t, 0x8)
+                shm[upSlots[3]:upSlots[3] + 8] = words(t, 6) + words(0, 6)
+                # MyHDL sleeps on the eventfd by now
+                time.sleep(0.1)
+            shmEventPost(shm, upEvent, i + 1)
+            if t < 20:
+                seq = shmEventWait(shm, downEvent, seq)
+        os.write(wt, b"DONE")
+
+    def testGather(self):
+        slow = Cosimulation(exe + "cosimGatherSlow", **allSigs)
+        fast = Cosimulation(exe + "cosimGatherFast", **allSigs)
+        order = []
+
+        spyGet(slow, 'slow', order)
+        spyGet(fast, 'fast', order)
+        _gather([slow, fast])
+        assert order == ['fast', 'slow']
+        assert toSigs['g'].next == 0x12
+
+    @staticmethod
+    def cosimGatherSlow():
+        wt, rf = wtrf()
+        startBinary(wt, rf)
+        time.sleep(0.5)
+        buf = struct.pack('<QB', 0, 0x8) + words(0x12, 6) + words(0, 6)
+        os.write(wt, struct.pack('<I', len(buf)) + buf)
+        os.read(rf, MAXLINE)
+
+    @staticmethod
+    def cosimGatherFast():
+        wt, rf = wtrf()
+        startBinary(wt, rf)
+        buf = struct.pack('<QB', 0, 0x8) + words(0x11, 6) + words(0, 6)
+        os.write(wt, struct.pack('<I', len(buf)) + buf)
+        os.read(rf, MAXLINE)
+
+    def testSkip(self):
+        cosim = Cosimulation(exe + "cosimSkip", **allSigs)
+        assert cosim._skip
+        cosim._waiter().next([], {}, [])
+        cosim._get()
+        # no change: no frame
+        cosim._put(10)
+        assert not cosim._getMode
+        fromSigs['a'].next = 3
+        for w in fromSigs['a']._update():
+            w.next([], {}, [])
+        # move to time 20, then send the change
+        cosim._put(20)
+        _gather([cosim])
+        assert os.read(cosim._rt, MAXLINE) == b"DONE"
+        fromSigs['a']._clear()
+
+    @staticmethod
+    def cosimSkip():
+        wt, rf = wtrf()
+        startBinary(wt, rf, "%s %s" % (_BINARY, _SKIP))
+        for t in (0, 20, 20):
+            buf = struct.pack('<QB', t, 0)
+            os.write(wt, struct.pack('<I', len(buf)) + buf)
+            data = readframe(rf)
+            if t == 0:
+                assert data == struct.pack('<Q', 20)
+            else:
+                # the first values are sent for all signals
+                vals = [3] + fromVals[1:]
+                assert data == (struct.pack('<QB', 20, 7) +
+                                b''.join(words(v, w)
+                                         for v, w in zip(vals, fromSizes)))
+                break
+        buf = struct.pack('<QB', 20, 0)
+        os.write(wt, struct.pack('<I', len(buf)) + buf + b"DONE")
+
+    def testSkipGather(self):
+        slow = Cosimulation(exe + "cosimSkipSlow", **allSigs)
+        fast = Cosimulation(exe + "cosimSkipFast", **allSigs)
+        order = []
+        for cosim, name in ((slow, 'slow'), (fast, 'fast')):
+            spyGet(cosim, name, order)
+            cosim._waiter().next([], {}, [])
+            cosim._get()
+        fromSigs['a'].next = 3
+        for w in fromSigs['a']._update():
+            w.next([], {}, [])
+        del order[:]
+        # the jumps to time 20 run concurrently
+        slow._put(20)
+        fast._put(20)
+        _gather([slow, fast])
+        assert order[:2] == ['fast', 'slow']
+        assert sorted(order[2:]) == ['fast', 'slow']
+        for cosim in (slow, fast):
+            assert os.read(cosim._rt, MAXLINE) == b"DONE"
+        fromSigs['a']._clear()
+
+    @staticmethod
+    def cosimSkipSlow():
+        skipSide(0.5)
+
+    @staticmethod
+    def cosimSkipFast():
+        skipSide(0)
+
+
 if __name__ == "__main__":
     getattr(TestCosimulation, sys.argv[1])()
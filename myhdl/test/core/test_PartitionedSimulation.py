@@ -0,0 +1,221 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  Copyright (C) 2003-2008 Jan Decaluwe
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+""" Run unit tests for PartitionedSimulation """
+from __future__ import absolute_import
+
+import os
+
+import pytest
+
+from myhdl import (Clock, PartitionedSimulation, Signal, SimulationError,
+                   StopSimulation, TristateSignal, always, always_comb, block, delay,
+                   instance, intbv, now)
+from myhdl._PartitionedSimulation import _error, _autoPartition
+from helpers import raises_kind
+
+pytestmark = pytest.mark.skipif(not hasattr(os, 'fork'),
+                                reason="requires os.fork")
+
+QUIET = 1
+
+
+@block
+def stage(clk, din, dout):
+
+    @always(clk.posedge)
+    def logic():
+        dout.next = (din + 1) % 256
+
+    return logic
+
+
+@block
+def pipeline(clk, din, dout, n):
+    sigs = [Signal(intbv(0)[8:]) for i in range(n - 1)]
+    ins = [din] + sigs
+    outs = sigs + [dout]
+    stages = [stage(clk, ins[i], outs[i]) for i in range(n)]
+    return stages
+
+
+@block
+def checker(clk, din, dout, n, cycles):
+
+    @instance
+    def check():
+        history = []
+        for i in range(cycles):
+            din.next = i % 256
+            yield clk.posedge
+            history.append(i % 256)
+            yield delay(1)
+            if len(history) >= n:
+                assert dout == (history[-n] + n) % 256
+        raise StopSimulation("checked")
+
+    return check
+
+
+class TestPartitionedSimulation:
+
+    def testPipeline(self):
+        clk = Signal(bool(0))
+        din, dout = [Signal(intbv(0)[8:]) for i in range(2)]
+        p = pipeline(clk, din, dout, 4)
+        c = checker(clk, din, dout, 4, 50)
+        sim = PartitionedSimulation([c, Clock(clk, 10), p.subs[:2]],
+                                    p.subs[2:])
+        # clk, dout and the middle pipeline signal
+        assert len(sim.boundarySigs) == 3
+        assert sim.run(quiet=QUIET) == 0
+
+    def testDeltaCycles(self):
+        a, b, c = [Signal(intbv(0)[8:]) for i in range(3)]
+
+        @always_comb
+        def inc():
+            b.next = a + 1
+
+        @always_comb
+        def double():
+            c.next = 2 * b
+
+        @instance
+        def stimulus():
+            for i in range(20):
+                a.next = i
+                yield delay(0)
+                assert b == 0 or b == (a + 1 if i else 1)
+                yield delay(0)
+                yield delay(0)
+                assert c == 2 * (i + 1)
+                yield delay(10)
+            raise StopSimulation
+
+        sim = PartitionedSimulation(stimulus, inc, double)
+        assert sim.run(quiet=QUIET) == 0
+
+    def testSuspend(self):
+        clk = Signal(bool(0))
+        count = Signal(intbv(0)[8:])
+
+        @always(clk.posedge)
+        def counter():
+            count.next = count + 1
+
+        @instance
+        def check():
+            while 1:
+                yield clk.posedge
+                yield delay(1)
+                assert count == (now() - 6) // 10 + 1
+
+        sim = PartitionedSimulation([Clock(clk, 10), check], counter)
+        assert sim.run(100, quiet=QUIET) == 1
+        assert now() == 100
+        assert count == 10
+        assert sim.run(100, quiet=QUIET) == 1
+        assert now() == 200
+        assert count == 20
+        sim.quit()
+
+    def testShadow(self):
+        a = Signal(intbv(0)[8:])
+        lo = a(4, 0)
+
+        @instance
+        def drive():
+            for i in range(1, 7):
+                a.next = i
+                yield delay(10)
+
+        @instance
+        def check():
+            for i in range(1, 7):
+                yield delay(5) if i == 1 else delay(10)
+                assert lo == i
+            raise StopSimulation
+
+        sim = PartitionedSimulation(drive, check)
+        # the source of the shadow signal crosses the boundary
+        assert a in sim.boundarySigs
+        assert sim.run(quiet=QUIET) == 0
+
+    def testTristate(self):
+        t = TristateSignal(intbv(0)[8:])
+        d = t.driver()
+
+        @instance
+        def drive():
+            d.next = 1
+            yield delay(10)
+
+        @instance
+        def read():
+            yield t
+
+        with raises_kind(SimulationError, _error.Tristate):
+            PartitionedSimulation(drive, read)
+
+    def testWorkerError(self):
+        a = Signal(0)
+
+        @instance
+        def fail():
+            yield delay(10)
+            a.next = 1
+            yield delay(10)
+            raise ValueError("oops")
+
+        @instance
+        def other():
+            yield a
+            yield delay(100)
+
+        sim = PartitionedSimulation(fail, other)
+        with raises_kind(SimulationError, _error.Worker):
+            sim.run(quiet=QUIET)
+
+    def testAutoPartition(self):
+        clk = Signal(bool(0))
+        din, dout = [Signal(intbv(0)[8:]) for i in range(2)]
+        p = pipeline(clk, din, dout, 5)
+        c = checker(clk, din, dout, 5, 10)
+        parts = _autoPartition([p, c, Clock(clk, 10)], 3)
+        # the pipeline is too large for one partition and is cut
+        assert sorted(len(part) for part in parts) == [2, 2, 3]
+        sim = PartitionedSimulation(p, c, Clock(clk, 10), nprocs=3)
+        assert sim.run(quiet=QUIET) == 0
+
+    def testArgs(self):
+        a = Signal(0)
+
+        def gen():
+            yield a
+
+        with raises_kind(SimulationError, _error.NrOfPartitions):
+            PartitionedSimulation(gen())
+
+    def testFork(self, monkeypatch):
+        monkeypatch.delattr(os, 'fork')
+        clk = Signal(bool(0))
+        din, dout = [Signal(intbv(0)[8:]) for i in range(2)]
+        with raises_kind(SimulationError, _error.Fork):
+            PartitionedSimulation(pipeline(clk, din, dout, 2), Clock(clk, 10))
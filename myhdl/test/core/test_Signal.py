@@ -208,7 +208,7 @@ class TestSig:
         assert s1._negedgeWaiters == self.negedgeWaiters
 
     def testNextAccess(self):
-        """ each next attribute access puts a sig in a global siglist """
+        """ next attribute access puts a sig once in a global siglist """
         del _siglist[:]
         s = [None] * 4
         for i in range(len(s)):
@@ -219,8 +219,10 @@ class TestSig:
         s[3].next = 0
         s[3].next = 1
         s[3].next = 3
-        for i in range(len(s)):
-            assert _siglist.count(s[i]) == i
+        assert _siglist.count(s[0]) == 0
+        for i in range(1, len(s)):
+            assert _siglist.count(s[i]) == 1
+        del _siglist[:]
 
 
 class TestSignalAsNum:
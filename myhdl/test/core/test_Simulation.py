@@ -878,3 +878,33 @@ class TimeZeroEvents(TestCase):
         s = Signal(1)
         testBench = self.bench(sig=s, next=0, clause=s.negedge)
         Simulation(testBench).run(quiet=QUIET)
+
+
+class UpdateCounters(TestCase):
+    """ Counters of scheduled and applied signal updates """
+
+    def testCounters(self):
+        a = Signal(0)
+        b = Signal(intbv(0)[8:])
+        counts = []
+
+        def stimulus():
+            yield delay(10)
+            # shadow signals of other tests may be updated at time 0
+            counts.append((sim.scheduledUpdates, sim.appliedUpdates))
+            a.next = 1
+            a.next = 2
+            b.next[3] = 1
+            b.next[4] = 1
+            yield delay(10)
+            a.next = 2
+            b.next = 24
+            yield delay(10)
+            counts.append((sim.scheduledUpdates, sim.appliedUpdates))
+            raise StopSimulation
+
+        sim = Simulation(stimulus())
+        sim.run(quiet=QUIET)
+        (s0, a0), (s1, a1) = counts
+        assert s1 - s0 == 4
+        assert a1 - a0 == 2
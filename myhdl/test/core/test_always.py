@@ -26,7 +26,8 @@ from myhdl import (AlwaysError, Signal, Simulation, StopSimulation, delay,
                    instances, intbv, now)
 from myhdl._always import _error, always
 from myhdl._Waiter import (_DelayWaiter, _EdgeTupleWaiter, _EdgeWaiter,
-                           _SignalTupleWaiter, _SignalWaiter, _Waiter)
+                           _SignalTupleWaiter, _SignalWaiter,
+                           _StaticTupleWaiter, _StaticWaiter, _Waiter)
 from helpers import raises_kind
 
 # random.seed(3) # random, but deterministic
@@ -129,12 +130,13 @@ def GeneralFunc(a, b, c, d, r):
 
 class TestInferWaiter:
 
-    def bench(self, MyHDLFunc, waiterType):
+    def bench(self, MyHDLFunc, waiterType, kernelType):
 
         a, b, c, d, r, s = [Signal(intbv(0)) for i in range(6)]
 
         inst_r = MyHDLFunc(a, b, c, d, r)
-        assert type(inst_r.waiter) == waiterType
+        assert inst_r._waiter() == waiterType
+        assert type(inst_r.waiter) == kernelType
 
         inst_s = MyHDLFunc(a, b, c, d, s)
 
@@ -157,25 +159,68 @@ class TestInferWaiter:
         return inst_r, _Waiter(inst_s.gen), _Waiter(stimulus()), _Waiter(check())
 
     def testSignal1(self):
-        sim = Simulation(self.bench(SignalFunc1, _SignalWaiter))
+        sim = Simulation(self.bench(SignalFunc1, _SignalWaiter, _StaticWaiter))
         sim.run()
 
     def testSignalTuple1(self):
-        sim = Simulation(self.bench(SignalTupleFunc1, _SignalTupleWaiter))
+        sim = Simulation(self.bench(SignalTupleFunc1, _SignalTupleWaiter, _StaticTupleWaiter))
         sim.run()
 
     def testDelay(self):
-        sim = Simulation(self.bench(DelayFunc, _DelayWaiter))
+        sim = Simulation(self.bench(DelayFunc, _DelayWaiter, _DelayWaiter))
         sim.run()
 
     def testEdge1(self):
-        sim = Simulation(self.bench(EdgeFunc1, _EdgeWaiter))
+        sim = Simulation(self.bench(EdgeFunc1, _EdgeWaiter, _StaticWaiter))
         sim.run()
 
     def testEdgeTuple1(self):
-        sim = Simulation(self.bench(EdgeTupleFunc1, _EdgeTupleWaiter))
+        sim = Simulation(self.bench(EdgeTupleFunc1, _EdgeTupleWaiter, _StaticTupleWaiter))
         sim.run()
 
     def testGeneral(self):
-        sim = Simulation(self.bench(GeneralFunc, _Waiter))
+        sim = Simulation(self.bench(GeneralFunc, _Waiter, _StaticTupleWaiter))
         sim.run()
+
+
+class TestStaticSensitivity:
+
+    def testRunOncePerDelta(self):
+        a, b, c = [Signal(bool(0)) for i in range(3)]
+        count = [0]
+
+        @always(a, b, c.posedge)
+        def logic():
+            count[0] += 1
+
+        def stimulus():
+            yield delay(10)
+            a.next = 1
+            b.next = 1
+            c.next = 1
+            yield delay(10)
+            a.next = 0
+            yield delay(0)
+            b.next = 0
+            yield delay(10)
+            raise StopSimulation
+
+        Simulation(logic, stimulus()).run(quiet=1)
+        assert count[0] == 3
+
+    def testFanoutCleared(self):
+        a, b = [Signal(bool(0)) for i in range(2)]
+
+        @always(a.posedge)
+        def logic():
+            b.next = a
+
+        def stimulus():
+            yield delay(10)
+            a.next = 1
+            yield delay(10)
+            assert len(a._posedgeFanout) == 1
+            raise StopSimulation
+
+        Simulation(logic, stimulus()).run(quiet=1)
+        assert a._posedgeFanout == []
@@ -26,7 +26,8 @@ from random import randrange
 from myhdl import (AlwaysCombError, Signal, Simulation, StopSimulation, delay,
                    instances, intbv, now)
 from myhdl._always_comb import _error, always_comb
-from myhdl._Waiter import _SignalTupleWaiter, _SignalWaiter, _Waiter
+from myhdl._Waiter import (_SignalTupleWaiter, _SignalWaiter,
+                           _StaticTupleWaiter, _StaticWaiter, _Waiter)
 from helpers import raises_kind
 
 # random.seed(3) # random, but deterministic
@@ -369,12 +370,13 @@ def SignalTupleGen1(a, b, c, d, r):
 
 class TestInferWaiter:
 
-    def bench(self, MyHDLFunc, waiterType):
+    def bench(self, MyHDLFunc, waiterType, kernelType):
 
         a, b, c, d, r, s = [Signal(intbv(0)) for i in range(6)]
 
         inst_r = MyHDLFunc(a, b, c, d, r)
-        assert type(inst_r.waiter) == waiterType
+        assert inst_r._waiter() == waiterType
+        assert type(inst_r.waiter) == kernelType
 
         inst_s = MyHDLFunc(a, b, c, d, s)
 
@@ -397,9 +399,9 @@ class TestInferWaiter:
         return inst_r, _Waiter(inst_s.gen), _Waiter(stimulus()), _Waiter(check())
 
     def testSignal1(self):
-        sim = Simulation(self.bench(SignalGen1, _SignalWaiter))
+        sim = Simulation(self.bench(SignalGen1, _SignalWaiter, _StaticWaiter))
         sim.run()
 
     def testSignalTuple1(self):
-        sim = Simulation(self.bench(SignalTupleGen1, _SignalTupleWaiter))
+        sim = Simulation(self.bench(SignalTupleGen1, _SignalTupleWaiter, _StaticTupleWaiter))
         sim.run()
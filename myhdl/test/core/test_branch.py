@@ -0,0 +1,121 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  Copyright (C) 2003-2008 Jan Decaluwe
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+
+""" Run unit tests for forked simulation branches """
+from __future__ import absolute_import
+
+import os
+
+import pytest
+
+from myhdl import (Clock, Signal, Simulation, SimulationError, always,
+                   block, instance, intbv, modbv, now, traceSignals)
+
+pytestmark = pytest.mark.skipif(not hasattr(os, 'fork'),
+                                reason="requires os.fork()")
+
+QUIET = 1
+
+
+@block
+def counter(clk, step, count, events):
+
+    @always(clk.posedge)
+    def logic():
+        count.next = count + step
+
+    @instance
+    def watch():
+        n = 0
+        while True:
+            yield count
+            n += 1
+            events[:] = [n]
+
+    return logic, watch
+
+
+@block
+def bench(step, count, events):
+    clk = Signal(bool(0))
+    return counter(clk, step, count, events), Clock(clk, 10)
+
+
+class TestBranch:
+
+    def setup_method(self, method):
+        self.step = Signal(intbv(1)[4:])
+        self.count = Signal(modbv(0)[16:])
+        self.events = [0]
+        self.sim = Simulation(bench(self.step, self.count, self.events))
+
+    def teardown_method(self, method):
+        self.sim.quit()
+
+    def variant(self, i):
+        self.step.next = i
+        self.sim.run(100, quiet=QUIET)
+        # the watch generator continues from the state of the parent
+        return now(), int(self.count), self.events[0]
+
+    def testBranch(self):
+        self.sim.run(100, quiet=QUIET)
+        assert int(self.count) == 10
+        results = self.sim.branch(4, self.variant)
+        assert results == [(200, 10 + 10 * i, 10 + 10 * (i > 0))
+                           for i in range(4)]
+        # the parent is not affected by its branches
+        assert now() == 100
+        self.sim.run(100, quiet=QUIET)
+        assert int(self.count) == 20
+        assert self.events[0] == 20
+
+    def testError(self):
+        def fail(i):
+            if i == 1:
+                raise ValueError("branch failure")
+            return i
+        self.sim.run(100, quiet=QUIET)
+        with pytest.raises(SimulationError) as excinfo:
+            self.sim.branch(2, fail)
+        assert "branch failure" in str(excinfo.value)
+
+
+def testBranchTrace(tmpdir):
+    step = Signal(intbv(1)[4:])
+    count = Signal(modbv(0)[16:])
+    with tmpdir.as_cwd():
+        dut = traceSignals(bench(step, count, [0]))
+        sim = Simulation(dut)
+        sim.run(50, quiet=QUIET)
+
+        def variant(i):
+            step.next = i + 2
+            sim.run(50, quiet=QUIET)
+            return int(count)
+
+        assert sim.branch(2, variant) == [5 + 2 * 5, 5 + 3 * 5]
+        sim.quit()
+        base = open('bench.vcd').read()
+        for i in range(2):
+            trace = open('bench_branch%d.vcd' % i).read()
+            assert trace.startswith(base)
+            assert '#100' in trace
+        assert '#100' not in base
@@ -0,0 +1,172 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  Copyright (C) 2003-2008 Jan Decaluwe
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+
+""" Run unit tests for columnar capture """
+from __future__ import absolute_import
+
+import pytest
+
+from myhdl import (Signal, Simulation, StopSimulation, always, block, delay,
+                   enum, instance, intbv, modbv)
+
+np = pytest.importorskip("numpy")
+
+QUIET = 1
+
+t_state = enum('IDLE', 'RUN')
+
+
+@block
+def design(clk, count, wide, state):
+
+    @always(clk.posedge)
+    def logic():
+        count.next = count + 1
+        wide.next = wide - 3
+        state.next = t_state.RUN if count % 2 == 0 else t_state.IDLE
+
+    @instance
+    def clkgen():
+        for i in range(20):
+            yield delay(5)
+            clk.next = not clk
+        raise StopSimulation
+
+    return logic, clkgen
+
+
+def signals():
+    return dict(clk=Signal(bool(0)),
+                count=Signal(modbv(0)[8:]),
+                wide=Signal(intbv(0, min=-2**99, max=2**99)),
+                state=Signal(t_state.IDLE))
+
+
+def words(v, n):
+    # little endian 64 bit words of a two's complement value
+    return [(v >> (64 * i)) & (2**64 - 1) for i in range(n)]
+
+
+class TestCapture:
+
+    def testChanges(self):
+        sigs = signals()
+        sim = Simulation(design(**sigs))
+        cap = sim.capture(sigs)
+        sim.run(quiet=QUIET)
+        times, values = cap['clk']
+        assert times.dtype == np.int64
+        assert values.dtype == np.bool_
+        assert list(times) == list(range(0, 100, 5))
+        assert list(values) == [i % 2 == 1 for i in range(20)]
+        times, values = cap['count']
+        assert values.dtype == np.int64
+        assert list(times) == [0] + list(range(5, 100, 10))
+        assert list(values) == list(range(11))
+        assert sim.captures == [cap]
+
+    def testWide(self):
+        sigs = signals()
+        sim = Simulation(design(**sigs))
+        cap = sim.capture(dict(wide=sigs['wide']))
+        sim.run(quiet=QUIET)
+        times, values = cap['wide']
+        assert values.dtype == np.uint64
+        assert values.shape == (11, 2)
+        for i, row in enumerate(values):
+            assert list(row) == words(-3 * i, 2)
+
+    def testObject(self):
+        sigs = signals()
+        sim = Simulation(design(**sigs))
+        cap = sim.capture([sigs['state']])
+        sim.run(quiet=QUIET)
+        times, values = cap['0']
+        assert values.dtype == object
+        assert list(times) == [0] + list(range(5, 100, 10))
+        assert list(values) == [t_state.IDLE, t_state.RUN] * 5 + [t_state.IDLE]
+
+    def testSampled(self):
+        sigs = signals()
+        sim = Simulation(design(**sigs))
+        cap = sim.capture(sigs, mode='sampled', clock=sigs['clk'])
+        sim.run(quiet=QUIET)
+        assert list(cap.times) == list(range(5, 100, 10))
+        times, values = cap['count']
+        assert times.shape == values.shape == (10,)
+        # the values before the edge
+        assert list(values) == list(range(10))
+        times, values = cap['wide']
+        assert values.shape == (10, 2)
+
+    def testSampledNegedge(self):
+        sigs = signals()
+        sim = Simulation(design(**sigs))
+        cap = sim.capture([sigs['count']], mode='sampled',
+                          clock=sigs['clk'].negedge)
+        sim.run(quiet=QUIET)
+        times, values = cap['0']
+        assert list(times) == list(range(10, 100, 10))
+        assert list(values) == list(range(1, 10))
+
+    def testChunks(self):
+        sigs = signals()
+        sim = Simulation(design(**sigs))
+        from myhdl._capture import _Capture
+        cap = _Capture([sigs['clk']], chunk=3)
+        from myhdl._simulator import _sinks
+        _sinks.append(cap)
+        cap._start()
+        sim.run(quiet=QUIET)
+        times, values = cap['0']
+        assert list(times) == list(range(0, 100, 5))
+
+    def testPath(self, tmpdir):
+        sigs = signals()
+        sim = Simulation(design(**sigs))
+        del sigs['state']
+        cap = sim.capture(sigs, path=str(tmpdir))
+        sim.run(50, quiet=QUIET)
+        times, values = cap['count']
+        assert isinstance(values, np.memmap)
+        assert list(values) == list(range(6))
+        sim.run(quiet=QUIET)
+        times, values = cap['count']
+        assert list(times) == [0] + list(range(5, 100, 10))
+        assert list(values) == list(range(11))
+        times, values = cap['wide']
+        assert values.shape == (11, 2)
+        assert list(values[3]) == words(-9, 2)
+
+    def testPathObject(self, tmpdir):
+        sigs = signals()
+        sim = Simulation(design(**sigs))
+        with pytest.raises(TypeError):
+            sim.capture(sigs, path=str(tmpdir))
+        sim.quit()
+
+    def testMode(self):
+        sigs = signals()
+        sim = Simulation(design(**sigs))
+        with pytest.raises(ValueError):
+            sim.capture(sigs, mode='all')
+        with pytest.raises(TypeError):
+            sim.capture(sigs, mode='sampled')
+        sim.quit()
@@ -0,0 +1,182 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  Copyright (C) 2003-2008 Jan Decaluwe
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+
+""" Run unit tests for simulation checkpoints """
+from __future__ import absolute_import
+
+import pytest
+
+from myhdl import (Clock, ResetSignal, Signal, Simulation, SimulationError,
+                   always, always_comb, always_seq, block, delay, instance,
+                   intbv, modbv, now)
+
+QUIET = 1
+
+
+@block
+def core(clk, rst, q, slow):
+    acc = modbv(0)[16:]
+    count = Signal(modbv(0)[8:])
+
+    @always_seq(clk.posedge, reset=rst)
+    def seq():
+        acc[:] = acc + count
+        count.next = count + 1
+        q.next = acc[8:]
+
+    @always(delay(7))
+    def tick():
+        slow.next = not slow
+
+    return seq, tick
+
+
+@block
+def bench(log, prologue, step=1, extra=None):
+    clk = Signal(bool(0))
+    rst = ResetSignal(0, active=1, isasync=False)
+    q = Signal(intbv(0)[8:])
+    slow = Signal(bool(0))
+    dq = Signal(intbv(0)[8:], delay=3)
+    din = Signal(intbv(0)[8:])
+
+    dut = core(clk, rst, q, slow)
+
+    @always_comb
+    def comb():
+        dq.next = q ^ din
+
+    @always(clk.negedge)
+    def monitor():
+        entry = (now(), int(q), bool(slow), int(dq))
+        if extra is not None:
+            entry += (int(extra),)
+        log.append(entry)
+
+    @instance
+    def stimulus():
+        if prologue:
+            rst.next = 1
+            yield delay(25)
+            rst.next = 0
+        while True:
+            yield delay(40)
+            din.next = (din + step) % 256
+
+    return dut, Clock(clk, 10), comb, monitor, stimulus
+
+
+def counter(c):
+    # a plain generator
+    while True:
+        yield delay(1)
+        c.next = c + 1
+
+
+class Box(object):
+    pass
+
+
+def bump(box):
+    # the signal has no name in the simulation
+    while True:
+        yield delay(5)
+        box.sig.next = box.sig + 1
+
+
+class TestCheckpoint:
+
+    def testResume(self):
+        ref = []
+        sim = Simulation(bench(ref, True, step=0))
+        sim.run(1000, quiet=QUIET)
+        sim.quit()
+        log = []
+        sim = Simulation(bench(log, True, step=0))
+        sim.run(503, quiet=QUIET)
+        cp = sim.checkpoint()
+        sim.quit()
+        assert cp.time == 503
+        for i in range(2):
+            log = []
+            sim = Simulation(bench(log, False, step=0))
+            sim.restore(cp)
+            assert now() == 503
+            sim.run(497, quiet=QUIET)
+            sim.quit()
+            assert log == [e for e in ref if e[0] > 503]
+
+    def testResumeStimulus(self):
+        def sim(log, prologue):
+            c = Signal(intbv(0)[16:])
+            return Simulation(bench(log, prologue, step=3, extra=c),
+                              counter(c))
+
+        ref = []
+        s = sim(ref, True)
+        s.run(1000, quiet=QUIET)
+        s.quit()
+        s = sim([], True)
+        s.run(503, quiet=QUIET)
+        cp = s.checkpoint()
+        s.quit()
+        log = []
+        s = sim(log, False)
+        s.restore(cp)
+        s.run(497, quiet=QUIET)
+        s.quit()
+        # the stimulus changes din at the same times
+        assert log == [e for e in ref if e[0] > 503]
+
+    def testUncaptured(self):
+        box = Box()
+        box.sig = Signal(intbv(0)[8:])
+        sim = Simulation(bench([], True), bump(box))
+        sim.run(100, quiet=QUIET)
+        with pytest.raises(SimulationError):
+            sim.checkpoint()
+        sim.quit()
+
+    def testVariants(self):
+        log = []
+        sim = Simulation(bench(log, True))
+        sim.run(503, quiet=QUIET)
+        cp = sim.checkpoint()
+        sim.quit()
+        results = []
+        for step in (3, 5):
+            log = []
+            sim = Simulation(bench(log, False, step=step))
+            sim.restore(cp)
+            sim.run(200, quiet=QUIET)
+            sim.quit()
+            results.append(log)
+        assert results[0] != results[1]
+        assert [e[:3] for e in results[0]] == [e[:3] for e in results[1]]
+
+    def testErrors(self):
+        sim = Simulation(bench([], True))
+        sim.run(100, quiet=QUIET)
+        cp = sim.checkpoint()
+        with pytest.raises(SimulationError):
+            sim.restore(cp)
+        sim.quit()
+        with pytest.raises(SimulationError):
+            sim.checkpoint()
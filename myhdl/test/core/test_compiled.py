@@ -0,0 +1,236 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  Copyright (C) 2003-2008 Jan Decaluwe
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+""" Run unit tests for compiled simulation """
+from __future__ import absolute_import
+
+import pytest
+
+from myhdl import (Clock, ResetSignal, Signal, Simulation, StopSimulation,
+                   always, always_comb, always_seq, block, concat, delay,
+                   enum, instance, intbv, modbv, now)
+from myhdl.conversion import _misc
+
+QUIET = 1
+
+t_state = enum('IDLE', 'RUN', 'DONE')
+
+
+@block
+def datapath(clk, rst, din, q, flag, parity):
+    count = Signal(modbv(0)[8:])
+    acc = Signal(intbv(0, min=-512, max=512))
+    state = Signal(t_state.IDLE)
+    low = Signal(intbv(0)[4:])
+    n = Signal(0)
+
+    @always_seq(clk.posedge, reset=rst)
+    def seq():
+        count.next = count + 3
+        if state == t_state.IDLE:
+            if din[0] and not din[7]:
+                state.next = t_state.RUN
+        elif state == t_state.RUN:
+            acc.next = (acc + din[6:2] - low) % 256 - 128
+            if count[7:5] == 7:
+                state.next = t_state.DONE
+        else:
+            state.next = t_state.IDLE
+        n.next = n + 1
+
+    @always_comb
+    def comb():
+        low.next = ~din[4:0]
+        q.next = (acc + 512) >> 2
+        flag.next = count > 100 or din == 0
+        parity.next = din[0] ^ din[1] ^ din[2]
+
+    return seq, comb
+
+
+@block
+def bench(log, compiled):
+    clk = Signal(bool(0))
+    rst = ResetSignal(0, active=1, isasync=False)
+    din = Signal(intbv(0)[8:])
+    q = Signal(intbv(0)[8:])
+    flag = Signal(bool(0))
+    parity = Signal(bool(0))
+
+    dut = datapath(clk, rst, din, q, flag, parity)
+    if compiled:
+        dut.config_sim(compiled=True)
+
+    @instance
+    def stimulus():
+        rst.next = 1
+        yield clk.negedge
+        rst.next = 0
+        for i in range(500):
+            din.next = (i * 37) % 256
+            yield clk.negedge
+            log.append((now(), int(q), bool(flag), bool(parity)))
+        raise StopSimulation
+
+    return dut, Clock(clk, 10), stimulus
+
+
+@block
+def overflow(clk, count):
+
+    @always(clk.posedge)
+    def logic():
+        count.next = count + 1
+
+    return logic
+
+
+@block
+def reads(clk, a, z):
+
+    @always(clk.posedge)
+    def logic():
+        a.next = (a + 1) % 256
+        z[0].next = a.next == 3
+        z[1].next = len(a) == 8
+        z[2].next = a.signed() < 0
+        z[3].next = a == a.max - 1
+        z[4].next = concat(a, a) == 0
+
+    return logic
+
+
+def readsBench(log, compiled):
+    clk = Signal(bool(0))
+    a = Signal(intbv(0)[8:])
+    z = [Signal(bool(0)) for i in range(5)]
+    dut = reads(clk, a, z)
+    if compiled:
+        dut.config_sim(compiled=True)
+        assert dut.subs[0].simfunc is not dut.subs[0].func
+
+    @instance
+    def monitor():
+        for i in range(300):
+            yield clk.negedge
+            log.append(tuple(bool(s) for s in z))
+        raise StopSimulation
+
+    return dut, Clock(clk, 10), monitor
+
+
+@block
+def listcomp(clk, count):
+
+    @always(clk.posedge)
+    def logic():
+        x = [i for i in range(3)]
+        count.next = count + len(x)
+
+    return logic
+
+
+@block
+def printer(clk, count):
+
+    @always(clk.posedge)
+    def logic():
+        print("count %d" % count)
+
+    return logic
+
+
+class TestCompiled:
+
+    def testSameAsInterpreted(self):
+        ref = []
+        Simulation(bench(ref, False)).run(quiet=QUIET)
+        log = []
+        Simulation(bench(log, True)).run(quiet=QUIET)
+        assert len(log) == 500
+        assert log == ref
+
+    def testProcessesCompiled(self):
+        clk = Signal(bool(0))
+        rst = ResetSignal(0, active=1, isasync=False)
+        din, q = [Signal(intbv(0)[8:]) for i in range(2)]
+        flag, parity = [Signal(bool(0)) for i in range(2)]
+        dut = datapath(clk, rst, din, q, flag, parity)
+        for inst in dut.subs:
+            assert inst.simfunc is inst.func
+        dut.config_sim(compiled=True)
+        for inst in dut.subs:
+            assert inst.simfunc is not inst.func
+
+    def testSignalReads(self):
+        # a signal that is not an operand itself keeps its type
+        ref = []
+        Simulation(readsBench(ref, False)).run(quiet=QUIET)
+        log = []
+        Simulation(readsBench(log, True)).run(quiet=QUIET)
+        assert len(log) == 300
+        for i in range(5):
+            assert any(v[i] for v in ref)
+        assert log == ref
+
+    def testNoSideEffects(self):
+        clk = Signal(bool(0))
+        count = Signal(intbv(0)[8:])
+        dut = overflow(clk, count)
+        label = _misc._genLabel.i
+        dut.config_sim(compiled=True)
+        assert dut.subs[0].simfunc is not dut.subs[0].func
+        assert count._driven is None
+        assert not count._read
+        assert _misc._genLabel.i == label
+
+    def testBoundError(self):
+        clk = Signal(bool(0))
+        count = Signal(intbv(0, min=0, max=5))
+        dut = overflow(clk, count)
+        dut.config_sim(compiled=True)
+        assert dut.subs[0].simfunc is not dut.subs[0].func
+        with pytest.raises(ValueError):
+            Simulation(dut, Clock(clk, 10)).run(100, quiet=QUIET)
+
+    def testFallback(self):
+        clk = Signal(bool(0))
+        count = Signal(intbv(0)[8:])
+        dut = printer(clk, count)
+        with pytest.warns(RuntimeWarning, match='logic: print'):
+            dut.config_sim(compiled=True)
+        assert dut.subs[0].simfunc is dut.subs[0].func
+
+    def testUnsupported(self):
+        clk = Signal(bool(0))
+        count = Signal(intbv(0)[8:])
+        dut = listcomp(clk, count)
+        # the process that falls back is reported
+        with pytest.warns(RuntimeWarning, match='(?s)logic: .*list comprehension'):
+            dut.config_sim(compiled=True)
+        assert dut.subs[0].simfunc is dut.subs[0].func
+
+    def testUncompile(self):
+        clk = Signal(bool(0))
+        count = Signal(intbv(0)[8:])
+        dut = overflow(clk, count)
+        dut.config_sim(compiled=True)
+        assert dut.subs[0].simfunc is not dut.subs[0].func
+        dut.config_sim(compiled=False)
+        assert dut.subs[0].simfunc is dut.subs[0].func
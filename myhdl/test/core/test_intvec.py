@@ -0,0 +1,235 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  Copyright (C) 2003-2008 Jan Decaluwe
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+""" Run the intvec unit tests and lane-parallel simulation tests. """
+from __future__ import absolute_import
+
+import random
+from random import randrange
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from myhdl import (Signal, Simulation, StopSimulation, always, always_comb,
+                   delay, instance, intbv, intvec, laneselect, modbv, modvec)
+from myhdl._intvec import _LaneSignal
+
+random.seed(2)  # random, but deterministic
+
+LANES = 16
+
+
+class TestIntvec:
+
+    def testConstruction(self):
+        v = intvec([1, 2, 3])
+        assert v.lanes == 3
+        assert v.lane(2) == 3
+        v = intvec(5, lanes=4)
+        assert list(v._val) == [5] * 4
+        with pytest.raises(ValueError):
+            intvec([1, 2, 3], lanes=4)
+        with pytest.raises(TypeError):
+            intvec([1.5, 2])
+
+    def testBounds(self):
+        v = intvec([1, 2], min=0, max=4)
+        assert len(v) == 2
+        with pytest.raises(ValueError):
+            intvec([1, 4], min=0, max=4)
+        with pytest.raises(ValueError):
+            v += 2
+        v = intvec(0, lanes=2)[8:]
+        assert (v.min, v.max, len(v)) == (0, 256, 8)
+
+    def testModvecWraps(self):
+        v = modvec([250, 3])[8:]
+        v += 10
+        assert list(v._val) == [4, 13]
+        v = modvec([0, 1])[4:]
+        v -= 2
+        assert list(v._val) == [14, 15]
+
+    def testWideLanes(self):
+        seeds = [randrange(2**64) for i in range(LANES)]
+        v = modvec(seeds)[64:]
+        v[:] = v * 1103515245 + 12345
+        for i, s in enumerate(seeds):
+            ref = modbv(s)[64:]
+            ref[:] = ref * 1103515245 + 12345
+            assert v.lane(i) == ref
+            assert intvec(v[32:]).lane(i) == ref[32:]
+
+    def testIndexing(self):
+        vals = [randrange(256) for i in range(LANES)]
+        v = intvec(vals)[8:]
+        for i in range(8):
+            assert list(v[i]) == [bool(intbv(x)[i]) for x in vals]
+        s = v[6:2]
+        assert len(s) == 4
+        assert list(s._val) == [int(intbv(x)[6:2]) for x in vals]
+
+    def testSetItem(self):
+        vals = [randrange(256) for i in range(LANES)]
+        bits = [randrange(2) for i in range(LANES)]
+        v = intvec(vals)[8:]
+        v[3] = np.array(bits)
+        v[7:5] = 2
+        for i, x in enumerate(vals):
+            ref = intbv(x)[8:]
+            ref[3] = bits[i]
+            ref[7:5] = 2
+            assert v.lane(i) == ref
+        with pytest.raises(ValueError):
+            v[0] = 2
+
+    def testOperators(self):
+        a = [randrange(1, 100) for i in range(LANES)]
+        b = [randrange(1, 100) for i in range(LANES)]
+        va, vb = intvec(a), intvec(b)
+        assert list(va + vb) == [x + y for x, y in zip(a, b)]
+        assert list(3 - va) == [3 - x for x in a]
+        assert list(va * vb) == [x * y for x, y in zip(a, b)]
+        assert list(va // vb) == [x // y for x, y in zip(a, b)]
+        assert list(va % 7) == [x % 7 for x in a]
+        assert list(va << 2) == [x << 2 for x in a]
+        assert list(va ^ vb) == [x ^ y for x, y in zip(a, b)]
+        assert list(va < vb) == [x < y for x, y in zip(a, b)]
+        assert list(np.arange(LANES) + va) == [i + x for i, x in enumerate(a)]
+        assert list(~intvec(a)[8:]) == [int(~intbv(x)[8:]) for x in a]
+
+    def testOverflow(self):
+        # machine word lanes don't wrap around silently
+        a = [randrange(2**39, 2**40) for i in range(LANES)]
+        va = intvec(a)
+        assert va._val.dtype == np.int64
+        assert list(va * va) == [x * x for x in a]
+        assert list(va * intvec(a)) == [x * x for x in a]
+        assert list(va << 30) == [x << 30 for x in a]
+        assert list(va ** 2) == [x ** 2 for x in a]
+        assert list(2 ** intvec([70, 3])) == [2 ** 70, 8]
+        big = intvec([2**62 - 1, 1])
+        assert list(big + big) == [2**63 - 2, 2]
+        assert list(-big - big - big) == [-3 * (2**62 - 1), -3]
+        # as with intbv, a result out of bounds raises
+        v = intvec(a, min=0, max=2**62)
+        with pytest.raises(ValueError):
+            v *= va
+
+    def testTruthValue(self):
+        with pytest.raises(TypeError):
+            bool(intvec([0, 1]))
+
+    def testLaneselect(self):
+        v = intvec([1, 2, 3, 4])
+        assert list(laneselect(v > 2, v, 0)) == [0, 0, 3, 4]
+
+
+def lcg(clk, state):
+
+    @always(clk.posedge)
+    def logic():
+        state.next = (state * 1103515245 + 12345) % 2**31
+
+    return logic
+
+
+class TestLaneSimulation:
+
+    def testSignalType(self):
+        s = Signal(intvec(0, lanes=4)[8:])
+        assert isinstance(s, _LaneSignal)
+        assert len(s) == 8
+        assert (s.min, s.max) == (0, 256)
+        with pytest.raises(ValueError):
+            s.next = 256
+        with pytest.raises(ValueError):
+            s.next = [1, 2]
+
+    def testSeedSweep(self):
+        seeds = [randrange(2**31) for i in range(LANES)]
+        cycles = 20
+
+        def run(seed):
+            clk = Signal(bool(0))
+            state = Signal(seed)
+            result = []
+
+            @instance
+            def stimulus():
+                for i in range(cycles):
+                    yield delay(5)
+                    clk.next = 1
+                    yield delay(5)
+                    clk.next = 0
+                result.append(state.val)
+                raise StopSimulation
+
+            Simulation(lcg(clk, state), stimulus).run(quiet=1)
+            return result[0]
+
+        lanes = run(intvec(seeds)[31:])
+        for i, seed in enumerate(seeds):
+            assert lanes.lane(i) == run(intbv(seed)[31:])
+
+    def testAnyLaneTriggers(self):
+        a = Signal(intvec(0, lanes=4)[4:])
+        b = Signal(intvec(0, lanes=4)[4:])
+        count = [0]
+
+        @always_comb
+        def logic():
+            count[0] += 1
+            b.next = a + 1
+
+        @instance
+        def stimulus():
+            yield delay(10)
+            a.next = [0, 0, 3, 0]
+            yield delay(10)
+            assert list(a.changed) == [False, False, True, False]
+            assert list(b._val._val) == [1, 1, 4, 1]
+            a.next = [0, 0, 3, 0]
+            yield delay(10)
+            raise StopSimulation
+
+        Simulation(logic, stimulus).run(quiet=1)
+        # initial run plus a single change
+        assert count[0] == 2
+
+    def testEdgeMasks(self):
+        clk = Signal(intvec(0, lanes=4)[1:])
+        count = Signal(intvec(0, lanes=4)[8:])
+
+        @always(clk.posedge)
+        def logic():
+            count.next = laneselect(clk.rose, count + 1, count)
+
+        @instance
+        def stimulus():
+            for phases in ([1, 0, 1, 0], [0, 1, 1, 0], [1, 0, 0, 0]):
+                yield delay(10)
+                clk.next = phases
+            yield delay(10)
+            assert list(clk.fell) == [False, True, True, False]
+            assert list(count._val._val) == [2, 1, 1, 0]
+            raise StopSimulation
+
+        Simulation(logic, stimulus).run(quiet=1)
@@ -0,0 +1,77 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  Copyright (C) 2003-2008 Jan Decaluwe
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+""" Run unit tests for the simulator internals """
+from __future__ import absolute_import
+
+import random
+from random import randrange
+
+from myhdl._simulator import _FutureEvents
+
+random.seed(1)  # random, but deterministic
+
+
+class TestFutureEvents:
+
+    def testEmpty(self):
+        q = _FutureEvents()
+        assert not q
+        assert len(q) == 0
+
+    def testTimeOrder(self):
+        q = _FutureEvents()
+        times = [randrange(1000) for i in range(500)]
+        for i, t in enumerate(times):
+            q.schedule(t, i)
+        assert len(q) == len(times)
+        popped = []
+        while q:
+            t, events = q.pop()
+            popped.append(t)
+        assert popped == sorted(set(times))
+
+    def testFifoSameTime(self):
+        q = _FutureEvents()
+        for i in range(100):
+            q.schedule(i % 3, i)
+        for t in range(3):
+            assert q.nextTime() == t
+            newt, events = q.pop()
+            assert newt == t
+            assert events == list(range(t, 100, 3))
+        assert not q
+
+    def testRescheduleCurrentTime(self):
+        q = _FutureEvents()
+        q.schedule(10, 'a')
+        q.schedule(20, 'b')
+        t, events = q.pop()
+        q.schedule(t, 'c')
+        assert q.pop() == (10, ['c'])
+        assert q.pop() == (20, ['b'])
+
+    def testClear(self):
+        q = _FutureEvents()
+        for i in range(10):
+            q.schedule(i, i)
+        q.clear()
+        assert not q
+        q.schedule(5, 'x')
+        assert q.pop() == (5, ['x'])
@@ -25,7 +25,9 @@ import random
 
 import pytest
 
-from myhdl import block, Signal, Simulation, _simulator, delay, instance, intbv
+from myhdl import (block, Signal, Simulation, WaveFile, _simulator, always,
+                   delay, enum, instance, intbv, modbv, now)
+from myhdl import _wave
 from myhdl._traceSignals import TraceSignalsError, _error, traceSignals
 from helpers import raises_kind
 
@@ -116,6 +118,68 @@ def topTristate():
     return inst
 
 
+t_state = enum('IDLE', 'RUN')
+
+
+@block
+def changes(log):
+    clk = Signal(bool(0))
+    count = Signal(intbv(0, min=-8, max=8))
+    wide = Signal(intbv(0)[80:])
+    state = Signal(t_state.IDLE)
+    pulse = Signal(bool(0))
+
+    @instance
+    def logic():
+        for i in range(40):
+            yield delay(10)
+            clk.next = not clk
+            count.next = i % 16 - 8
+            wide.next = i << 70
+            state.next = t_state.RUN if i % 3 else t_state.IDLE
+            log.append((now(), i % 16 - 8, i << 70, bool(i % 3)))
+
+    @instance
+    def glitch():
+        while 1:
+            yield clk.posedge
+            pulse.next = 1
+            yield pulse.posedge
+            pulse.next = 0
+
+    return logic, glitch
+
+
+@block
+def sub(clk, q):
+    mem = [Signal(intbv(0)[4:]) for i in range(8)]
+    inner = Signal(bool(0))
+
+    @always(clk.posedge)
+    def logic():
+        q.next = q + 1
+        mem[q % 8].next = q % 16
+        inner.next = not inner
+
+    return logic
+
+
+@block
+def hier(trig):
+    clk = Signal(bool(0))
+    q = Signal(modbv(0)[8:])
+    inst = sub(clk, q)
+
+    @instance
+    def clkgen():
+        for i in range(60):
+            yield delay(5)
+            clk.next = not clk
+            trig.next = 100 <= now() < 150
+
+    return inst, clkgen
+
+
 @pytest.yield_fixture
 def vcd_dir(tmpdir):
     with tmpdir.as_cwd():
@@ -198,3 +262,113 @@ class TestTraceSigs:
         assert not path.exists(psub)
         assert path.exists(pdutd)
         assert not path.exists(psubd)
+
+
+class TestTraceFormats:
+
+    def teardown_method(self, method):
+        traceSignals.format = 'vcd'
+
+    def testUnknownFormat(self, vcd_dir):
+        traceSignals.format = 'fsdb'
+        with raises_kind(TraceSignalsError, _error.Format):
+            traceSignals(fun())
+
+    def testVcdSteps(self, vcd_dir):
+        sim = Simulation(traceSignals(changes([])))
+        sim.run(quiet=QUIET)
+        lines = open('changes.vcd').read().split('\n')
+        times = [int(l[1:]) for l in lines if l.startswith('#')]
+        assert times == sorted(set(times))
+        codes = {}
+        for l in lines:
+            if l.startswith('$var'):
+                codes[l.split()[4]] = l.split()[3]
+        # count changes to -8 at time 10, in two's complement
+        i = lines.index('#10')
+        assert 'b1000 %s' % codes['count'] in lines[i:]
+        # the pulse is a delta cycle glitch, only its final value is kept
+        pulse = [l for l in lines[i:] if l[1:] == codes['pulse']]
+        assert pulse == ['0' + codes['pulse']] * 20
+
+    def testWave(self, vcd_dir, monkeypatch):
+        monkeypatch.setattr(_wave, '_BLOCKSIZE', 200)
+        traceSignals.format = 'wave'
+        log = []
+        sim = Simulation(traceSignals(changes(log)))
+        sim.run(quiet=QUIET)
+        w = WaveFile('changes.wave')
+        assert w.timescale == '1ns'
+        assert 'changes.count' in w.signals
+        assert len(w._index) > 1
+        count = [(t, v) for t, n, v in w.changes(['changes.count'])]
+        assert count[0] == (0, 0)
+        assert count[1:] == [(t, c) for t, c, x, r in log]
+        wide = [(t, v) for t, n, v in w.changes(['changes.wide'])]
+        assert wide[1:] == [(t, x) for t, c, x, r in log if x]
+        window = list(w.changes(['changes.state'], start=100, end=200))
+        ref = [(t, 'RUN' if r else 'IDLE') for (t, c, x, r), (p, d, y, q)
+               in zip(log[1:], log) if r != q and 100 <= t < 200]
+        assert [(t, v) for t, n, v in window] == ref
+
+
+class TestTraceSelection:
+
+    def teardown_method(self, method):
+        for n in ('include', 'exclude', 'depth', 'maxmem', 'windows',
+                  'trigger'):
+            setattr(traceSignals, n, None)
+        traceSignals.format = 'vcd'
+
+    def trace(self, trig=None, **kwargs):
+        traceSignals.format = 'wave'
+        for n, v in kwargs.items():
+            setattr(traceSignals, n, v)
+        if trig is None:
+            trig = Signal(bool(0))
+        sim = Simulation(traceSignals(hier(trig)))
+        sim.run(quiet=QUIET)
+        return WaveFile('hier.wave')
+
+    def testAll(self, vcd_dir):
+        w = self.trace()
+        assert 'hier.clk' in w.signals
+        assert len([n for n in w.signals if '.inner' in n]) == 1
+        assert len([n for n in w.signals if '.mem(' in n]) == 8
+
+    def testFilters(self, vcd_dir):
+        w = self.trace(exclude=['*.inner', 'hier.q'])
+        assert 'hier.q' not in w.signals
+        assert not [n for n in w.signals if 'inner' in n]
+        # a signal is still traced under its other names
+        assert [n for n in w.signals if n.endswith('.q')]
+        w = self.trace(include=['*.mem(*)'])
+        assert len(w.signals) == 8
+
+    def testDepth(self, vcd_dir):
+        w = self.trace(depth=1)
+        assert w.signals == ['hier.clk', 'hier.q', 'hier.trig']
+
+    def testMaxmem(self, vcd_dir):
+        w = self.trace(maxmem=4)
+        assert not [n for n in w.signals if '.mem(' in n]
+        w = self.trace(maxmem=8)
+        assert len([n for n in w.signals if '.mem(' in n]) == 8
+
+    def testWindows(self, vcd_dir):
+        w = self.trace(windows=[(100, 150), (250, 260)])
+        times = sorted(set(t for t, n, v in w.changes()))
+        assert times == [0] + list(range(100, 150, 5)) + [250, 255]
+        # tracing restarts with the values of all signals
+        assert len([n for t, n, v in w.changes(start=250, end=251)]) == \
+            len(list(w.changes(start=0, end=1)))
+
+    def testTrigger(self, vcd_dir):
+        trig = Signal(bool(0))
+        w = self.trace(trig, trigger=trig)
+        times = sorted(set(t for t, n, v in w.changes(['hier.clk'])))
+        # the trigger is true in [100, 150), as the first window of
+        # testWindows, so the clock edge at 150 is not written
+        assert times == [0] + list(range(100, 150, 5))
+        ref = self.trace(windows=[(100, 150)], trigger=None)
+        assert times == sorted(set(t for t, n, v in ref.changes(['hier.clk'])))
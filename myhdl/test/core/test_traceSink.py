@@ -0,0 +1,131 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  Copyright (C) 2003-2008 Jan Decaluwe
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+
+""" Run unit tests for trace sinks """
+from __future__ import absolute_import
+
+import pytest
+
+from myhdl import (Signal, Simulation, StopSimulation, TraceSink, WaveFile,
+                   always, block, delay, enum, instance, intbv, modbv,
+                   traceSignals)
+
+QUIET = 1
+
+t_state = enum('IDLE', 'RUN')
+
+
+@block
+def design(clk, count, state, pulse):
+
+    @always(clk.posedge)
+    def logic():
+        count.next = count + 1
+        state.next = t_state.RUN if count % 2 else t_state.IDLE
+
+    @instance
+    def glitch():
+        while 1:
+            yield clk.posedge
+            pulse.next = 1
+            yield pulse.posedge
+            pulse.next = 0
+
+    @instance
+    def clkgen():
+        for i in range(20):
+            yield delay(5)
+            clk.next = not clk
+        raise StopSimulation
+
+    return logic, glitch, clkgen
+
+
+class TestTraceSink:
+
+    def setup_method(self, method):
+        self.clk = Signal(bool(0))
+        self.count = Signal(modbv(0)[4:])
+        self.state = Signal(t_state.IDLE)
+        self.pulse = Signal(bool(0))
+        self.sigs = {'clk': self.clk, 'count': self.count,
+                     'state': self.state, 'pulse': self.pulse}
+
+    def design(self):
+        return design(self.clk, self.count, self.state, self.pulse)
+
+    def testRecords(self):
+        batches = []
+        sink = TraceSink(self.sigs, batches.append)
+        assert sink.names == ['clk', 'count', 'pulse', 'state']
+        Simulation(self.design(), sink).run(quiet=QUIET)
+        assert len(batches) == 1
+        records = batches[0]
+        assert records[:4] == [(0, 0, False), (0, 1, 0), (0, 2, False),
+                               (0, 3, t_state.IDLE)]
+        count = [(t, v) for t, c, v in records if c == 1]
+        assert count[1:] == [(t, (t + 5) // 10) for t in range(5, 100, 10)]
+        # the pulse is a delta cycle glitch, only its final value is kept
+        assert [v for t, c, v in records if c == 2] == [False] * 11
+        assert not self.clk._tracing
+
+    def testBatch(self):
+        batches = []
+        sink = TraceSink([self.clk, self.count], batches.append, batch=0)
+        assert sink.names == ['0', '1']
+        Simulation(self.design(), sink).run(quiet=QUIET)
+        assert len(batches) == 20
+        for records in batches:
+            assert len(set(t for t, c, v in records)) == 1
+
+    def testNumpy(self):
+        np = pytest.importorskip("numpy")
+        batches = []
+        sink = TraceSink([self.clk, self.count], batches.append, batch=8,
+                         numpy=True)
+        Simulation(self.design(), sink).run(quiet=QUIET)
+        records = np.concatenate(batches)
+        assert records.dtype['value'] == np.int64
+        assert list(records['time'][:2]) == [0, 0]
+        assert list(records['value'][records['code'] == 1]) == \
+            list(range(11))
+        sink = TraceSink(self.sigs, batches.append, numpy=True)
+        assert sink._dtype['value'] == object
+
+    def testWithTrace(self, tmpdir):
+        records = []
+        sink = TraceSink([self.clk], records.extend)
+        with tmpdir.as_cwd():
+            traceSignals.format = 'wave'
+            traceSignals.windows = [(50, 60)]
+            try:
+                dut = traceSignals(self.design())
+            finally:
+                traceSignals.format = 'vcd'
+                traceSignals.windows = None
+            Simulation(dut, sink).run(quiet=QUIET)
+            w = WaveFile('design.wave')
+            times = [t for t, n, v in w.changes(['design.clk'])]
+        assert times == [0, 50, 55]
+        assert len(records) == 20
+
+    def testArgType(self):
+        with pytest.raises(TypeError):
+            TraceSink([self.clk, 1], print)
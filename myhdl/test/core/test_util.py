@@ -0,0 +1,123 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  Copyright (C) 2003-2008 Jan Decaluwe
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+
+""" Run the unit tests for the source and AST cache """
+from __future__ import absolute_import
+
+import ast
+import os
+import sys
+
+import pytest
+
+from myhdl import _util
+from myhdl._util import _getAST, _makeAST
+
+
+def gen(a, b):
+    while 1:
+        yield a
+        b.next = a.x
+
+
+def load(tmpdir, name, body):
+    path = tmpdir.join(name + '.py')
+    path.write(body)
+    sys.path.insert(0, str(tmpdir))
+    try:
+        mod = __import__(name)
+    finally:
+        sys.path.pop(0)
+    return mod, path
+
+
+class TestAST:
+
+    def testSource(self):
+        tree = _makeAST(gen)
+        assert isinstance(tree.body[0], ast.FunctionDef)
+        assert tree.body[0].name == 'gen'
+        assert tree.sourcefile == __file__.replace('.pyc', '.py')
+        assert tree.lineoffset + 1 == gen.__code__.co_firstlineno
+
+    def testCopies(self):
+        tree = _makeAST(gen)
+        tree.body[0].name = 'changed'
+        tree.symdict = {}
+        tree = _makeAST(gen)
+        assert tree.body[0].name == 'gen'
+        assert not hasattr(tree, 'symdict')
+
+    def testCached(self, monkeypatch):
+        _makeAST(gen)
+        calls = []
+        parse = _util._parse
+        monkeypatch.setattr(_util, '_parse', lambda c: calls.append(c) or parse(c))
+        _makeAST(gen)
+        _getAST(gen.__code__)
+        assert calls == []
+
+    def testModified(self, tmpdir):
+        mod, path = load(tmpdir, 'astcache_mod', "def f():\n    return 1\n")
+        assert isinstance(_makeAST(mod.f).body[0].body[0].value, ast.Constant)
+        path.write("def f():\n    return x\n")
+        st = os.stat(str(path))
+        os.utime(str(path), (st.st_atime, st.st_mtime + 10))
+        assert isinstance(_makeAST(mod.f).body[0].body[0].value, ast.Name)
+
+    def testDiskCache(self, tmpdir, monkeypatch):
+        mod, path = load(tmpdir, 'astcache_disk', "def f():\n    return 1\n")
+        cachedir = tmpdir.join('cache')
+        monkeypatch.setattr(_util, '_astCacheDir', str(cachedir))
+        tree = _makeAST(mod.f)
+        assert len(cachedir.listdir()) == 1
+        # a new run finds the tree on disk
+        _util._astCache.clear()
+        monkeypatch.setattr(_util, '_parse', None)
+        assert ast.dump(_makeAST(mod.f)) == ast.dump(tree)
+
+    def testDiskCacheShared(self, tmpdir, monkeypatch):
+        mod, path = load(tmpdir, 'astcache_shared', "def f():\n    return 1\n")
+        cachedir = tmpdir.join('cache')
+        cachedir.mkdir()
+        # others could replace the pickles
+        cachedir.chmod(0o777)
+        monkeypatch.setattr(_util, '_astCacheDir', str(cachedir))
+        with pytest.warns(RuntimeWarning):
+            _makeAST(mod.f)
+        assert cachedir.listdir() == []
+
+    def testSameCode(self, tmpdir):
+        # the code objects are equal, but the files differ
+        body = "def f():\n    return 1\n"
+        mod1, path1 = load(tmpdir, 'astcache_same1', body)
+        mod2, path2 = load(tmpdir, 'astcache_same2', body)
+        assert mod1.f.__code__ == mod2.f.__code__
+        assert _makeAST(mod1.f).sourcefile == str(path1)
+        assert _makeAST(mod2.f).sourcefile == str(path2)
+
+    def testBounded(self, tmpdir, monkeypatch):
+        monkeypatch.setattr(_util, '_ASTCACHESIZE', 2)
+        body = "".join("def f%d():\n    return %d\n" % (i, i) for i in range(3))
+        mod, path = load(tmpdir, 'astcache_bounded', body)
+        for f in (mod.f0, mod.f1, mod.f2):
+            _makeAST(f)
+        codes = [key[2] for key in _util._astCache]
+        assert codes == [mod.f1.__code__, mod.f2.__code__]
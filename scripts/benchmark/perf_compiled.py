@@ -0,0 +1,97 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  Copyright (C) 2003-2008 Jan Decaluwe
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+""" Compare interpreted and compiled simulation of process bodies
+
+A bank of timers, as in timer.py, plus a combinatorial flag decoder,
+is simulated with and without config_sim(compiled=True).
+"""
+from __future__ import absolute_import
+from __future__ import print_function
+
+import time
+
+from myhdl import *
+
+MAXVAL = 1234
+N = 16
+CYCLES = 20000
+
+
+@block
+def timer(flag, clock, reset, MAXVAL):
+
+    count = Signal(intbv(0, min=0, max=MAXVAL + 1))
+
+    @always_seq(clock.posedge, reset=reset)
+    def logic():
+        flag.next = 0
+        if count == MAXVAL:
+            flag.next = 1
+            count.next = 0
+        else:
+            count.next = count + 1
+
+    return logic
+
+
+@block
+def timers(flaglist, any_flag, clock, reset):
+
+    insts = [timer(flaglist[i], clock, reset, MAXVAL - i) for i in range(N)]
+    flags = ConcatSignal(*reversed(flaglist))
+
+    @always_comb
+    def decode():
+        any_flag.next = flags != 0
+
+    return insts, decode
+
+
+@block
+def bench(compiled):
+    clock = Signal(bool(0))
+    reset = ResetSignal(0, active=1, isasync=False)
+    flaglist = [Signal(bool(0)) for i in range(N)]
+    any_flag = Signal(bool(0))
+    dut = timers(flaglist, any_flag, clock, reset)
+    if compiled:
+        dut.config_sim(compiled=True)
+
+    @instance
+    def stop():
+        yield delay(10 * CYCLES)
+        raise StopSimulation
+
+    return dut, Clock(clock, 10), stop
+
+
+def measure(compiled):
+    sim = Simulation(bench(compiled))
+    start = time.time()
+    sim.run(quiet=1)
+    return time.time() - start
+
+
+if __name__ == '__main__':
+    interpreted = measure(False)
+    compiled = measure(True)
+    print("interpreted: %.3f s" % interpreted)
+    print("compiled:    %.3f s" % compiled)
+    print("speedup:     %.2f" % (interpreted / compiled))
@@ -0,0 +1,72 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  Copyright (C) 2003-2008 Jan Decaluwe
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+""" Measure the elaboration time of a deep and wide block hierarchy
+
+Each node instantiates WIDTH child nodes down to DEPTH levels, and each
+leaf has a clocked and a combinatorial process.
+"""
+from __future__ import absolute_import
+from __future__ import print_function
+
+import time
+
+from myhdl import *
+
+WIDTH = 4
+DEPTH = 6
+
+
+@block
+def leaf(clock, reset, din, dout):
+    acc = Signal(intbv(0)[8:])
+
+    @always_seq(clock.posedge, reset=reset)
+    def seq():
+        acc.next = (acc + din) % 256
+
+    @always_comb
+    def comb():
+        dout.next = acc ^ din
+
+    return instances()
+
+
+@block
+def node(clock, reset, din, dout, depth):
+    links = [Signal(intbv(0)[8:]) for i in range(WIDTH + 1)]
+    links[0] = din
+    links[WIDTH] = dout
+    if depth == 1:
+        insts = [leaf(clock, reset, links[i], links[i + 1])
+                 for i in range(WIDTH)]
+    else:
+        insts = [node(clock, reset, links[i], links[i + 1], depth - 1)
+                 for i in range(WIDTH)]
+    return insts
+
+
+if __name__ == '__main__':
+    clock = Signal(bool(0))
+    reset = ResetSignal(0, active=1, isasync=False)
+    din, dout = [Signal(intbv(0)[8:]) for i in range(2)]
+    start = time.time()
+    top = node(clock, reset, din, dout, DEPTH)
+    t = time.time() - start
+    print("%d leaves: %.2f s" % (WIDTH ** DEPTH, t))
@@ -0,0 +1,63 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  Copyright (C) 2003-2008 Jan Decaluwe
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+""" Measure the scaling of the future event queue with its size
+
+Each bench keeps N delay waiters pending, with random delays, and
+runs for a fixed number of time steps. With a properly scaling queue
+the time per step should grow only logarithmically with N.
+"""
+from __future__ import absolute_import
+from __future__ import print_function
+
+import random
+import time
+from random import randrange
+random.seed(1) # random, but deterministic
+
+from myhdl import *
+
+STEPS = 20000
+
+
+def bench(n):
+
+    def waiter():
+        while 1:
+            yield delay(randrange(1, 1000))
+
+    return [waiter() for i in range(n)]
+
+
+def measure(n):
+    sim = Simulation(bench(n))
+    start = time.time()
+    sim.run(STEPS, quiet=1)
+    elapsed = time.time() - start
+    sim.quit()
+    return elapsed
+
+
+if __name__ == '__main__':
+    print("%10s %12s %14s" % ("waiters", "time (s)", "us / waiter"))
+    for n in (100, 1000, 10000, 50000):
+        elapsed = measure(n)
+        # every waiter wakes up about STEPS / 500 times
+        wakeups = n * STEPS / 500.0
+        print("%10d %12.3f %14.2f" % (n, elapsed, 1e6 * elapsed / wakeups))
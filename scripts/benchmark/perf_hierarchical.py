@@ -0,0 +1,50 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  Copyright (C) 2003-2008 Jan Decaluwe
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+""" Compare flat and hierarchical conversion of a deep and wide hierarchy
+
+The design is the block tree of perf_elaborate. In the hierarchical
+output, each level of the tree is a single module.
+"""
+from __future__ import absolute_import
+from __future__ import print_function
+
+import os
+import tempfile
+import time
+
+from myhdl import *
+
+from perf_elaborate import WIDTH, DEPTH, node
+
+
+if __name__ == '__main__':
+    path = tempfile.mkdtemp()
+    clock = Signal(bool(0))
+    reset = ResetSignal(0, active=1, isasync=False)
+    din, dout = [Signal(intbv(0)[8:]) for i in range(2)]
+    top = node(clock, reset, din, dout, DEPTH)
+    for hdl, ext in (('Verilog', '.v'), ('VHDL', '.vhd')):
+        for hierarchical in (False, True):
+            start = time.time()
+            top.convert(hdl=hdl, path=path, hierarchical=hierarchical)
+            t = time.time() - start
+            size = os.path.getsize(os.path.join(path, 'node' + ext))
+            print("%s %d leaves, hierarchical=%s: %.2f s, %d bytes" %
+                  (hdl, WIDTH ** DEPTH, hierarchical, t, size))
@@ -0,0 +1,82 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  Copyright (C) 2003-2008 Jan Decaluwe
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+""" Compare a seed sweep with separate simulations and with lanes
+
+A clocked linear congruential generator, as in glibc_random.py, is run
+for N seeds. The first measurement runs a Simulation per seed, the
+second runs a single lane-parallel Simulation with a lane per seed.
+Requires numpy.
+"""
+from __future__ import absolute_import
+from __future__ import print_function
+
+import time
+
+from myhdl import *
+
+CYCLES = 1000
+
+
+def lcg(clk, state):
+
+    @always(clk.posedge)
+    def logic():
+        state.next = (state * 1103515245 + 12345) % 2**31
+
+    return logic
+
+
+def bench(seed, result):
+    clk = Signal(bool(0))
+    state = Signal(seed)
+    return Clock(clk, 10), lcg(clk, state), check(clk, state, result)
+
+
+def check(clk, state, result):
+
+    @instance
+    def logic():
+        for i in range(CYCLES):
+            yield clk.negedge
+        result.append(state.val)
+        raise StopSimulation
+
+    return logic
+
+
+def measure(seeds):
+    result = []
+    start = time.time()
+    for seed in seeds:
+        Simulation(bench(intbv(seed)[31:], result)).run(quiet=1)
+    separate = time.time() - start
+    lanes = []
+    start = time.time()
+    Simulation(bench(intvec(seeds)[31:], lanes)).run(quiet=1)
+    parallel = time.time() - start
+    assert [int(v) for v in result] == [lanes[0].lane(i) for i in range(len(seeds))]
+    return separate, parallel
+
+
+if __name__ == '__main__':
+    print("%8s %14s %14s %10s" % ("seeds", "separate (s)", "lanes (s)", "speedup"))
+    for n in (64, 256, 1024):
+        separate, parallel = measure(list(range(1, n + 1)))
+        print("%8d %14.3f %14.3f %10.1f" % (n, separate, parallel, separate / parallel))
@@ -0,0 +1,49 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  Copyright (C) 2003-2008 Jan Decaluwe
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+""" Compare serial and parallel rendering in the conversion of a large design
+
+The design is the block tree of perf_elaborate, converted flat. Only the
+rendering of the generators is done by the worker processes.
+"""
+from __future__ import absolute_import
+from __future__ import print_function
+
+import multiprocessing
+import tempfile
+import time
+
+from myhdl import *
+
+from perf_elaborate import WIDTH, DEPTH, node
+
+
+if __name__ == '__main__':
+    path = tempfile.mkdtemp()
+    clock = Signal(bool(0))
+    reset = ResetSignal(0, active=1, isasync=False)
+    din, dout = [Signal(intbv(0)[8:]) for i in range(2)]
+    top = node(clock, reset, din, dout, DEPTH)
+    for hdl in ('Verilog', 'VHDL'):
+        for jobs in (1, multiprocessing.cpu_count()):
+            start = time.time()
+            top.convert(hdl=hdl, path=path, jobs=jobs)
+            t = time.time() - start
+            print("%s %d leaves, jobs=%d: %.2f s" %
+                  (hdl, WIDTH ** DEPTH, jobs, t))
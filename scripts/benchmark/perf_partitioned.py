@@ -0,0 +1,99 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  Copyright (C) 2003-2008 Jan Decaluwe
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+""" Compare a serial and a partitioned simulation of the same design
+
+The design is a chain of stages, each with a clocked process that does
+WORK iterations of arithmetic per clock edge. The partitioned simulation
+exchanges the boundary signals with every worker in each delta cycle,
+so it only pays off when the stages do enough work per delta cycle. With
+little work per stage, the coupling dominates and it is slower than the
+serial simulation.
+"""
+from __future__ import absolute_import
+from __future__ import print_function
+
+import multiprocessing
+import time
+
+from myhdl import *
+
+STAGES = 16
+CYCLES = 200
+
+
+@block
+def stage(clk, din, dout, work):
+
+    @always(clk.posedge)
+    def logic():
+        acc = int(din)
+        for i in range(work):
+            acc = (acc * 5 + i) % 256
+        dout.next = acc
+
+    return logic
+
+
+@block
+def chain(clk, din, dout, work):
+    links = [din] + [Signal(intbv(0)[8:]) for i in range(STAGES - 1)] + [dout]
+    return [stage(clk, links[i], links[i + 1], work) for i in range(STAGES)]
+
+
+@block
+def stimulus(clk, din):
+
+    @instance
+    def logic():
+        for i in range(CYCLES):
+            din.next = i % 256
+            yield clk.negedge
+        raise StopSimulation
+
+    return logic
+
+
+def design(work):
+    clk = Signal(bool(0))
+    din, dout = [Signal(intbv(0)[8:]) for i in range(2)]
+    return chain(clk, din, dout, work), stimulus(clk, din), Clock(clk, 10)
+
+
+def measure(work, nprocs):
+    start = time.time()
+    sim = Simulation(design(work))
+    sim.run(quiet=1)
+    sim.quit()
+    serial = time.time() - start
+    start = time.time()
+    sim = PartitionedSimulation(design(work), nprocs=nprocs)
+    sim.run(quiet=1)
+    sim.quit()
+    partitioned = time.time() - start
+    return serial, partitioned
+
+
+if __name__ == '__main__':
+    nprocs = max(2, min(multiprocessing.cpu_count(), 4))
+    print("%d partitions" % nprocs)
+    print("%8s %12s %16s" % ("work", "serial (s)", "partitioned (s)"))
+    for work in (1, 100, 10000):
+        serial, partitioned = measure(work, nprocs)
+        print("%8d %12.3f %16.3f" % (work, serial, partitioned))
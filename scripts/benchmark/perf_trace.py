@@ -0,0 +1,84 @@
+#  This file is part of the myhdl library, a Python package for using
+#  Python as a Hardware Description Language.
+#
+#  Copyright (C) 2003-2008 Jan Decaluwe
+#
+#  The myhdl library is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU Lesser General Public License as
+#  published by the Free Software Foundation; either version 2.1 of the
+#  License, or (at your option) any later version.
+#
+#  This library is distributed in the hope that it will be useful, but
+#  WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+#  Lesser General Public License for more details.
+
+#  You should have received a copy of the GNU Lesser General Public
+#  License along with this library; if not, write to the Free Software
+#  Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA 02111-1307 USA
+
+""" Measure the cost of signal tracing with each trace format
+
+A bank of counters of different widths is simulated without tracing,
+and with traceSignals.format set to 'vcd' and to 'wave'.
+"""
+from __future__ import absolute_import
+from __future__ import print_function
+
+import os
+import time
+
+from myhdl import *
+
+N = 32
+CYCLES = 5000
+
+
+@block
+def counter(clock, count, step):
+
+    @always(clock.posedge)
+    def logic():
+        count.next = count + step
+
+    return logic
+
+
+@block
+def counters(clock):
+    counts = [Signal(modbv(0)[8 + 2 * i:]) for i in range(N)]
+    insts = [counter(clock, counts[i], i + 1) for i in range(N)]
+    return insts
+
+
+@block
+def bench():
+    clock = Signal(bool(0))
+    dut = counters(clock)
+
+    @instance
+    def stop():
+        yield delay(10 * CYCLES)
+        raise StopSimulation
+
+    return dut, Clock(clock, 10), stop
+
+
+def measure(format):
+    top = bench()
+    if format:
+        traceSignals.format = format
+        top = traceSignals(top)
+    sim = Simulation(top)
+    start = time.time()
+    sim.run(quiet=1)
+    return time.time() - start
+
+
+if __name__ == '__main__':
+    base = measure(None)
+    print("no tracing: %.3f s" % base)
+    for format, ext in (('vcd', '.vcd'), ('wave', '.wave')):
+        t = measure(format)
+        size = os.path.getsize('bench' + ext)
+        print("%-10s  %.3f s  %.2fx  %d bytes" % (format + ':', t, t / base, size))
@@ -42,6 +42,8 @@ setup(
     author_email="jan@jandecaluwe.com",
     url="http://www.myhdl.org",
     packages=['myhdl', 'myhdl.conversion'],
+    # intvec, Simulation.capture and TraceSink arrays use numpy
+    extras_require={'numpy': ['numpy']},
     data_files=[(os.path.join(data_root, k), v) for k, v in cosim_data.items()],
     license="LGPL",
     platforms='any',